@@ -0,0 +1,50 @@
+"""
+Measures the cost of a suppressed exception when nothing is written to the log.
+
+Run it from the root of the repository with "python -m benchmarks.bench_logging".
+"""
+import logging
+from timeit import timeit
+
+import escape
+
+
+NUMBER = 200_000
+
+
+class ExpensiveError(KeyError):
+    def __str__(self) -> str:
+        return ''.join(str(x) for x in range(1000))
+
+
+def bare(data):
+    try:
+        return data['key']
+    except KeyError:
+        return None
+
+
+def raising(data):
+    return data['key']
+
+
+def expensive_raising(data):
+    raise ExpensiveError
+
+
+disabled_logger = logging.getLogger('escape_benchmark_disabled')
+disabled_logger.setLevel(logging.CRITICAL)
+
+cases = {
+    'bare try/except': bare,
+    '@escape, empty logger': escape(KeyError)(raising),
+    '@escape, disabled stdlib logger': escape(KeyError, logger=disabled_logger)(raising),
+    '@escape, empty logger, expensive __str__': escape(KeyError)(expensive_raising),
+    '@escape, disabled stdlib logger, expensive __str__': escape(KeyError, logger=disabled_logger)(expensive_raising),
+}
+
+
+if __name__ == '__main__':
+    for name, function in cases.items():
+        seconds = timeit(lambda: function({}), number=NUMBER)  # noqa: B023
+        print(f'{name:<55} {seconds / NUMBER * 1e9:8.1f} ns per call')
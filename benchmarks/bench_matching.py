@@ -0,0 +1,35 @@
+"""
+Measures how the length of the exceptions tuple affects the cost of a suppressed exception.
+
+Run it from the root of the repository with "python -m benchmarks.bench_matching".
+"""
+from timeit import timeit
+
+import escape
+
+
+NUMBER = 200_000
+
+
+def make_exceptions(length):
+    return tuple(type(f'Error{index}', (LookupError,), {}) for index in range(length - 1)) + (KeyError,)
+
+
+def raising(data):
+    return data['key']
+
+
+def run_context_manager(exceptions):
+    def run():
+        with escape(*exceptions):
+            raise KeyError('key')
+    return run
+
+
+if __name__ == '__main__':
+    for length in (1, 5, 20, 40):
+        exceptions = make_exceptions(length)
+        decorated = escape(*exceptions)(raising)
+        decorator_seconds = timeit(lambda: decorated({}), number=NUMBER)  # noqa: B023
+        context_seconds = timeit(run_context_manager(exceptions), number=NUMBER)
+        print(f'{length:>3} exception types: decorator {decorator_seconds / NUMBER * 1e9:8.1f} ns, context manager {context_seconds / NUMBER * 1e9:8.1f} ns')
@@ -0,0 +1,43 @@
+"""
+Measures how much memory it takes to decorate a large number of functions.
+
+Run it from the root of the repository with "python -m benchmarks.bench_memory".
+"""
+import logging
+import tracemalloc
+
+import escape
+
+
+NUMBER = 100_000
+
+
+def make_functions():
+    functions = []
+    for index in range(NUMBER):
+        def function(a, index=index):
+            return a + index
+        functions.append(function)
+    return functions
+
+
+def measure(name, decorate):
+    functions = make_functions()
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    decorated = [decorate(function) for function in functions]
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f'{name:<45} {(after - before) / NUMBER:8.1f} bytes per function, peak {(peak - before) / 2 ** 20:6.1f} MiB')
+    return decorated
+
+
+if __name__ == '__main__':
+    logger = logging.getLogger('escape_benchmark')
+    policy = escape.policy(ValueError, logger=logger)
+
+    measure('@escape', escape)
+    measure('@escape(ValueError)', lambda function: escape(ValueError)(function))
+    measure('@policy, with logger', policy)
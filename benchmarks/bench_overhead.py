@@ -0,0 +1,61 @@
+"""
+Measures the per-call overhead of "@escape" on the success path and on the suppression path, compared with an undecorated call.
+
+Run it from the root of the repository with "python -m benchmarks.bench_overhead" under each interpreter you want to compare (CPython 3.8 - 3.13).
+"""
+import logging
+import platform
+from timeit import timeit
+
+import escape
+
+
+NUMBER = 1_000_000
+
+logger = logging.getLogger('escape_benchmark_disabled')
+logger.setLevel(logging.CRITICAL)
+
+
+def function(a, b=1):
+    return a + b
+
+
+def raising_function(a, b=1):
+    raise ValueError
+
+
+async def coroutine_function(a, b=1):
+    return a + b
+
+
+def run_coroutine(coroutine):
+    try:
+        coroutine.send(None)
+    except StopIteration as e:
+        return e.value
+
+
+cases = {
+    'undecorated function': (function, False),
+    '@escape': (escape(function), False),
+    '@escape(ValueError, logger=logger)': (escape(ValueError, logger=logger)(function), False),
+    'undecorated coroutine function': (coroutine_function, True),
+    '@escape, coroutine function': (escape(coroutine_function), True),
+    '@escape(ValueError, logger=logger), coroutine function': (escape(ValueError, logger=logger)(coroutine_function), True),
+    '@escape, suppression': (escape(raising_function), False),
+    '@escape(ValueError, logger=logger), suppression': (escape(ValueError, logger=logger)(raising_function), False),
+}
+
+
+if __name__ == '__main__':
+    print(f'{platform.python_implementation()} {platform.python_version()}')
+
+    baselines = {}
+    for name, (callable_object, is_coroutine) in cases.items():
+        if is_coroutine:
+            seconds = timeit(lambda: run_coroutine(callable_object(1, b=2)), number=NUMBER)  # noqa: B023
+        else:
+            seconds = timeit(lambda: callable_object(1, b=2), number=NUMBER)  # noqa: B023
+        nanoseconds = seconds / NUMBER * 1e9
+        baselines.setdefault(is_coroutine, nanoseconds)
+        print(f'{name:<60} {nanoseconds:8.1f} ns per call ({nanoseconds - baselines[is_coroutine]:+7.1f} ns)')
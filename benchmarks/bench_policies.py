@@ -0,0 +1,57 @@
+"""
+Compares the cost of entering the "escape" context manager in a loop with "contextlib.suppress".
+
+Run it from the root of the repository with "python -m benchmarks.bench_policies".
+"""
+import logging
+from contextlib import suppress
+from timeit import timeit
+
+import escape
+
+
+NUMBER = 500_000
+
+logger = logging.getLogger('escape_benchmark_disabled')
+logger.setLevel(logging.CRITICAL)
+policy = escape.policy(ValueError, logger=logger)
+
+
+def with_suppress():
+    with suppress(ValueError):
+        pass
+
+
+def with_escape_call():
+    with escape(ValueError, logger=logger):
+        pass
+
+
+def with_escape_policy():
+    with policy:
+        pass
+
+
+def with_escape_call_and_exception():
+    with escape(ValueError, logger=logger):
+        raise ValueError
+
+
+def with_suppress_and_exception():
+    with suppress(ValueError):
+        raise ValueError
+
+
+cases = {
+    'contextlib.suppress(ValueError)': with_suppress,
+    'escape(ValueError, logger=logger)': with_escape_call,
+    'escape.policy(...), created in advance': with_escape_policy,
+    'contextlib.suppress(ValueError), exception': with_suppress_and_exception,
+    'escape(ValueError, logger=logger), exception': with_escape_call_and_exception,
+}
+
+
+if __name__ == '__main__':
+    for name, function in cases.items():
+        seconds = timeit(function, number=NUMBER)
+        print(f'{name:<50} {seconds / NUMBER * 1e9:8.1f} ns per block')
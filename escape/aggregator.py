@@ -0,0 +1,72 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Tuple, List
+
+
+Fingerprint = Tuple[bool, str, str]
+Aggregate = Tuple[Fingerprint, int, float]
+
+AGGREGATION_LIMIT = 1024
+
+
+class Aggregator:
+    """
+    Collapses repeated messages about the same exception (the same type, the same message and the same outcome) within one call site.
+
+    The first message with a fingerprint is written as usual and opens a window. Repeats inside the window are only counted, and when the window is over, they are written as one aggregate message. The fingerprints are kept in a bounded LRU: when an old fingerprint is pushed out, its aggregate is written right away.
+
+    There is no timer: the aggregates are written lazily, with the next message from the same call site or when the buffers are flushed. The repeats always fall inside the window, so the span in an aggregate is never longer than the window, however late it is written.
+    """
+    __slots__ = ('window', 'limit', 'entries', 'swept_at', 'lock')
+
+    def __init__(self, window: float, limit: int = AGGREGATION_LIMIT) -> None:
+        self.window = window
+        self.limit = limit
+        self.entries: 'OrderedDict[Fingerprint, List[float]]' = OrderedDict()
+        self.swept_at = monotonic()
+        self.lock = Lock()
+
+    def register(self, fingerprint: Fingerprint) -> Tuple[bool, List[Aggregate]]:
+        """
+        Returns whether the message should be written right now, and the aggregates that are ready to be written.
+        """
+        aggregates: List[Aggregate] = []
+
+        with self.lock:
+            now = monotonic()
+
+            if now - self.swept_at >= self.window:
+                self.swept_at = now
+                for key, (started_at, count) in list(self.entries.items()):
+                    if now - started_at >= self.window:
+                        del self.entries[key]
+                        if count:
+                            aggregates.append((key, int(count), min(now - started_at, self.window)))
+
+            entry = self.entries.get(fingerprint)
+
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                self.entries.move_to_end(fingerprint)
+                return False, aggregates
+
+            if entry is not None and entry[1]:
+                aggregates.append((fingerprint, int(entry[1]), min(now - entry[0], self.window)))
+
+            self.entries[fingerprint] = [now, 0]
+            self.entries.move_to_end(fingerprint)
+
+            while len(self.entries) > self.limit:
+                key, (started_at, count) = self.entries.popitem(last=False)
+                if count:
+                    aggregates.append((key, int(count), min(now - started_at, self.window)))
+
+        return True, aggregates
+
+    def flush(self) -> List[Aggregate]:
+        with self.lock:
+            now = monotonic()
+            aggregates = [(key, int(count), min(now - started_at, self.window)) for key, (started_at, count) in self.entries.items() if count]
+            self.entries.clear()
+        return aggregates
@@ -0,0 +1,85 @@
+import asyncio
+from typing import TYPE_CHECKING, Awaitable, AsyncIterator, Iterable, List, Set, Optional, Any
+
+from escape.callsite import CallSite
+
+if TYPE_CHECKING:  # pragma: no cover
+    from escape.wrapper import Wrapper
+
+
+AWAITING_UNSUPPORTED_OPTIONS = ('fallback', 'stale_cache', 'failure_cache', 'retries', 'timeout', 'breaker_threshold', 'max_concurrency')
+
+
+def get_awaitable_name(awaitable: Awaitable[Any]) -> str:
+    return getattr(awaitable, '__qualname__', None) or type(awaitable).__name__
+
+
+async def await_with_policy(policy: 'Wrapper', callsite: Optional[CallSite], awaitable: Awaitable[Any], semaphore: Optional[asyncio.Semaphore]) -> Any:
+    """
+    Cancellation is never suppressed: it is the way for the caller to stop the work, and not a failure of the awaitable.
+    """
+    if semaphore is not None:
+        async with semaphore:
+            return await await_with_policy(policy, callsite, awaitable, None)
+
+    policy.count_call(callsite)
+    try:
+        return await awaitable
+    except asyncio.CancelledError:
+        raise
+    except BaseException as e:
+        if policy.handle_function_exception(e, callsite, 'coroutine', get_awaitable_name(awaitable)):
+            result = policy.get_default(e, (), {})
+            if policy.is_factory_async:
+                result = await result
+            return result
+        raise
+
+
+async def cancel_tasks(tasks: Iterable['asyncio.Future[Any]']) -> None:
+    tasks = [task for task in tasks if not task.done()]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def start_tasks(policy: 'Wrapper', callsite: Optional[CallSite], awaitables: Iterable[Awaitable[Any]], limit: Optional[int]) -> List['asyncio.Future[Any]']:
+    semaphore = asyncio.Semaphore(limit) if limit is not None else None
+    return [asyncio.ensure_future(await_with_policy(policy, callsite, awaitable, semaphore)) for awaitable in awaitables]
+
+
+async def gather_with_policy(policy: 'Wrapper', callsite: Optional[CallSite], awaitables: List[Awaitable[Any]], limit: Optional[int]) -> List[Any]:
+    """
+    The first exception that is not suppressed cancels all the other awaitables and is raised, in the same way as in "asyncio.TaskGroup". If the caller is cancelled, the awaitables are cancelled too.
+    """
+    tasks = start_tasks(policy, callsite, awaitables, limit)
+
+    try:
+        pending: Set['asyncio.Future[Any]'] = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                exception = None if task.cancelled() else task.exception()
+                if exception is not None:
+                    raise exception
+    finally:
+        await cancel_tasks(tasks)
+
+    return [task.result() for task in tasks]
+
+
+async def as_completed_with_policy(policy: 'Wrapper', callsite: Optional[CallSite], awaitables: List[Awaitable[Any]], limit: Optional[int]) -> AsyncIterator[Any]:
+    """
+    Results are yielded as soon as they are ready. The exceptions that are not suppressed are handled as in "gather_with_policy()". If the iteration is stopped early, the rest of the awaitables are cancelled.
+    """
+    tasks = start_tasks(policy, callsite, awaitables, limit)
+
+    try:
+        pending: Set['asyncio.Future[Any]'] = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        await cancel_tasks(tasks)
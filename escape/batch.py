@@ -0,0 +1,122 @@
+import os
+from multiprocessing import get_context
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Tuple, List, Deque, Union, Optional, Any
+
+from escape.callsite import CallSite
+
+if TYPE_CHECKING:  # pragma: no cover
+    from escape.wrapper import Wrapper
+
+
+Outcome = Tuple[bool, Any]
+
+PROCESS_UNSUPPORTED_OPTIONS = ('fallback', 'stale_cache', 'failure_cache', 'retries', 'timeout', 'breaker_threshold', 'max_concurrency')
+
+
+def call_for_chunk(function: Callable[[Any], Any], chunk: List[Any]) -> List[Any]:
+    return [function(item) for item in chunk]
+
+
+def call_for_chunk_safely(function: Callable[[Any], Any], chunk: List[Any]) -> List[Outcome]:
+    """
+    Runs in a worker process. The exceptions are sent back to the main process as values, so that one failed item does not take the rest of the chunk with it.
+    """
+    outcomes: List[Outcome] = []
+
+    for item in chunk:
+        try:
+            outcomes.append((True, function(item)))
+        except Exception as e:
+            outcomes.append((False, e))
+
+    return outcomes
+
+
+def map_with_policy(policy: 'Wrapper', function: Callable[[Any], Any], iterable: Iterable[Any], executor: Union[None, str, Executor], workers: Optional[int], chunksize: int, ordered: bool) -> Iterator[Any]:
+    """
+    Results are produced lazily. No more than two chunks per worker are in flight at a time, so that a large (or infinite) input is not read into memory all at once, and the input is not read further while the results are not consumed.
+
+    The own process pool starts its workers with "spawn" and not with "fork": the library runs threads of its own (for the log queues, timeouts and thread pools), and forking a process with threads may leave the child deadlocked.
+    """
+    if executor is None:
+        protected_function = policy(function)
+        for item in iterable:
+            yield protected_function(item)
+        return
+
+    pool: Executor
+    if isinstance(executor, Executor):
+        pool = executor
+        workers = workers or os.cpu_count() or 1
+    elif executor == 'thread':
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        pool = ThreadPoolExecutor(max_workers=workers)
+    else:
+        workers = workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+
+    is_process = isinstance(pool, ProcessPoolExecutor)
+    limit = 2 * workers
+    callsite = CallSite(f'{function.__module__}.{function.__qualname__}', policy) if policy.is_extended and is_process else None
+    wrapped_function: Callable[..., Any] = function
+    if not is_process:
+        wrapped_function = policy(function)
+    iterator = iter(iterable)
+    in_flight: Deque[Tuple[List[Any], 'Future[List[Any]]']] = deque()
+
+    def unpack(chunk: List[Any], results: List[Any]) -> Iterator[Any]:
+        if not is_process:
+            yield from results
+            return
+
+        for item, (is_successful, result) in zip(chunk, results):
+            if is_successful:
+                policy.count_call(callsite)
+                yield result
+            else:
+                yield replay_exception(policy, callsite, function, item, result)
+
+    def fill() -> None:
+        while len(in_flight) < limit:
+            chunk = list(islice(iterator, chunksize))
+            if not chunk:
+                break
+            in_flight.append((chunk, pool.submit(call_for_chunk_safely if is_process else call_for_chunk, wrapped_function, chunk)))
+
+    try:
+        fill()
+        while in_flight:
+            if ordered:
+                chunk, future = in_flight.popleft()
+                results = future.result()
+            else:
+                wait([future for _, future in in_flight], return_when=FIRST_COMPLETED)
+                index = next(index for index, (_, future) in enumerate(in_flight) if future.done())
+                chunk, future = in_flight[index]
+                del in_flight[index]
+                results = future.result()
+
+            fill()
+            yield from unpack(chunk, results)
+
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+        if pool is not executor:
+            pool.shutdown(wait=True)
+
+
+def replay_exception(policy: 'Wrapper', callsite: Optional[CallSite], function: Callable[[Any], Any], item: Any, exception: BaseException) -> Any:
+    """
+    An exception from a worker process is raised again in the main process, so that it is matched, counted and logged (with "logger.exception") as if the function had been called here. The options that need to wrap the call itself (see PROCESS_UNSUPPORTED_OPTIONS) are rejected before the work starts.
+    """
+    policy.count_call(callsite)
+    try:
+        raise exception
+    except BaseException as e:
+        if policy.handle_function_exception(e, callsite, 'function', function.__name__):
+            return policy.get_default(e, (item,), {})
+        raise
@@ -0,0 +1,90 @@
+from collections import deque
+from threading import Lock
+from time import monotonic
+from typing import Deque
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker:
+    """
+    Counts suppressed exceptions of one decorated function in a sliding window. When there are "threshold" of them within "window" seconds, the breaker opens, and the calls return the default value without calling the function. After "cooldown" seconds one call is let through as a probe: if it succeeds, the breaker closes, otherwise it opens again.
+
+    The probe holds a lease for "cooldown" seconds. If it ends without any outcome being recorded (for example, it was cancelled), another probe is let through when the lease expires, so the breaker can not get stuck half-open.
+    """
+    __slots__ = ('threshold', 'window', 'cooldown', 'failures', 'state', 'opened_at', 'lock')
+
+    def __init__(self, threshold: int, window: float, cooldown: float) -> None:
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.failures: Deque[float] = deque()
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.lock = Lock()
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+
+            now = monotonic()
+            if now - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self.opened_at = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        if self.state == CLOSED:
+            return
+
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                self.failures.clear()
+
+    def record_failure(self) -> bool:
+        """
+        Returns True if the breaker has just opened.
+        """
+        with self.lock:
+            now = monotonic()
+
+            if self.state == HALF_OPEN:
+                self.open(now)
+                return True
+            elif self.state == OPEN:
+                return False
+
+            self.failures.append(now)
+            while self.failures and now - self.failures[0] > self.window:
+                self.failures.popleft()
+
+            if len(self.failures) >= self.threshold:
+                self.open(now)
+                return True
+
+            return False
+
+    def record_unexpected_failure(self) -> None:
+        """
+        An exception that is not suppressed does not count as a failure, but a probe that ended with it still has to reopen the breaker.
+        """
+        if self.state == CLOSED:
+            return
+
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.open(monotonic())
+
+    def open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.failures.clear()
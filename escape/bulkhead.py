@@ -0,0 +1,112 @@
+import asyncio
+from collections import deque
+from threading import Event, Lock
+from typing import Callable, Deque, Optional
+
+
+class Waiter:
+    __slots__ = ('wake', 'is_granted')
+
+    def __init__(self, wake: Callable[[], None]) -> None:
+        self.wake = wake
+        self.is_granted = False
+
+
+class Bulkhead:
+    """
+    Limits the number of calls of one decorated function that are running at the same time.
+
+    A call that finds all the places taken either gives up at once or waits in a bounded queue no longer than the given time. A released place is handed over directly to the first waiter, so a new call cannot take it out of turn. The same object serves threads and coroutines (even from different event loops), so it uses a lock from "threading" and wakes coroutines through their own loops.
+    """
+    __slots__ = ('limit', 'max_waiting', 'active', 'waiters', 'lock')
+
+    def __init__(self, limit: int, max_waiting: Optional[int]) -> None:
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiters: Deque[Waiter] = deque()
+        self.lock = Lock()
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            if self.active < self.limit:
+                self.active += 1
+                return True
+            return False
+
+    def enqueue(self, waiter: Waiter) -> Optional[bool]:
+        """
+        Returns True if a place is free right now, False if the queue is full, and None if the waiter has been queued.
+        """
+        with self.lock:
+            if self.active < self.limit:
+                self.active += 1
+                return True
+            elif self.max_waiting is not None and len(self.waiters) >= self.max_waiting:
+                return False
+            self.waiters.append(waiter)
+            return None
+
+    def leave(self, waiter: Waiter) -> bool:
+        """
+        Called by a waiter when it stops waiting. Returns whether it has got a place after all.
+        """
+        with self.lock:
+            if waiter.is_granted:
+                return True
+            self.waiters.remove(waiter)
+            return False
+
+    def acquire(self, timeout: Optional[float]) -> bool:
+        if self.try_acquire():
+            return True
+        elif timeout is None:
+            return False
+
+        event = Event()
+        waiter = Waiter(event.set)
+        is_acquired = self.enqueue(waiter)
+        if is_acquired is not None:
+            return is_acquired
+
+        event.wait(timeout)
+        return self.leave(waiter)
+
+    async def acquire_async(self, timeout: Optional[float]) -> bool:
+        if self.try_acquire():
+            return True
+        elif timeout is None:
+            return False
+
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def resolve() -> None:
+            if not future.done():
+                future.set_result(None)
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(resolve)
+
+        waiter = Waiter(wake)
+        is_acquired = self.enqueue(waiter)
+        if is_acquired is not None:
+            return is_acquired
+
+        try:
+            await asyncio.wait({future}, timeout=timeout)
+        except BaseException:
+            if self.leave(waiter):
+                self.release()
+            raise
+
+        return self.leave(waiter)
+
+    def release(self) -> None:
+        with self.lock:
+            if self.waiters:
+                waiter = self.waiters.popleft()
+                waiter.is_granted = True
+                waiter.wake()
+            else:
+                self.active -= 1
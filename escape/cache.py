@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import NamedTuple, Tuple, Dict, Hashable, Optional, Any
+
+
+MISSING = object()
+KWARGS_MARKER = object()
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+def make_key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Optional[Hashable]:
+    """
+    Returns None if some of the arguments are not hashable: such calls are not cached.
+
+    The keyword arguments are separated from the positional ones by a marker that can not be passed by the caller, so that no positional arguments give the same key.
+    """
+    key: Hashable = (*args, KWARGS_MARKER, *sorted(kwargs.items())) if kwargs else args
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class ExpiringCache:
+    """
+    A bounded LRU cache whose entries also expire "ttl" seconds after they were written.
+    """
+    __slots__ = ('size', 'ttl', 'entries', 'hits', 'misses', 'lock')
+
+    def __init__(self, size: int, ttl: float) -> None:
+        self.size = size
+        self.ttl = ttl
+        self.entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Returns MISSING if there is no fresh value for the key.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            elif monotonic() >= entry[0]:
+                del self.entries[key]
+                self.misses += 1
+                return MISSING
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            self.entries[key] = (monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def info(self) -> CacheInfo:
+        with self.lock:
+            return CacheInfo(self.hits, self.misses, self.size, len(self.entries))
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
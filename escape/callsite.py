@@ -0,0 +1,151 @@
+import atexit
+from typing import TYPE_CHECKING, Optional, Tuple, Dict, List, Hashable, Any
+from weakref import WeakSet
+
+from escape.aggregator import Aggregator, Aggregate
+from escape.breaker import CircuitBreaker
+from escape.bulkhead import Bulkhead
+from escape.cache import ExpiringCache, MISSING, make_key
+from escape.counters import Counters, get_counters
+from escape.log_queue import flush_log_queues
+from escape.throttle import Throttle
+
+if TYPE_CHECKING:  # pragma: no cover
+    from escape.wrapper import Wrapper
+
+
+DROPPED_TEMPLATE = '%d messages about exceptions in "%s" were dropped by the rate limit.'
+BREAKER_OPENED_TEMPLATE = 'The circuit breaker of "%s" has opened, the default value will be returned without calling the function for %.1f seconds.'
+AGGREGATE_TEMPLATE = 'The exception "%s"%s was %s %d more times within %.1f seconds in "%s".'
+
+flushable_callsites: 'WeakSet[CallSite]' = WeakSet()
+
+
+class CallSite:
+    """
+    The state that belongs to one decorated function or to one place in the code where a policy is used as a context manager.
+    """
+    __slots__ = ('name', 'policy', 'counters', 'throttle', 'aggregator', 'breaker', 'failure_cache', 'stale_cache', 'bulkhead', '__weakref__')
+
+    def __init__(self, name: str, policy: 'Wrapper') -> None:
+        self.name = name
+        self.policy = policy
+        self.counters: Optional[Counters] = None
+        self.throttle: Optional[Throttle] = None
+        self.aggregator: Optional[Aggregator] = None
+        self.breaker: Optional[CircuitBreaker] = None
+        self.failure_cache: Optional[ExpiringCache] = None
+        self.stale_cache: Optional[ExpiringCache] = None
+        self.bulkhead: Optional[Bulkhead] = None
+
+        if policy.stats:
+            self.counters = get_counters(policy.stats if isinstance(policy.stats, str) else name)
+
+        if policy.log_rate_limit is not None or policy.log_sample_rate < 1.0:
+            self.throttle = Throttle(policy.log_rate_limit, policy.log_sample_rate)
+            flushable_callsites.add(self)
+
+        if policy.log_aggregation is not None:
+            self.aggregator = Aggregator(policy.log_aggregation)
+            flushable_callsites.add(self)
+
+        if policy.breaker_threshold is not None:
+            self.breaker = CircuitBreaker(policy.breaker_threshold, policy.breaker_window, policy.breaker_cooldown)
+
+        if policy.failure_cache is not None:
+            self.failure_cache = ExpiringCache(policy.failure_cache_size, policy.failure_cache)
+
+        if policy.stale_cache is not None:
+            self.stale_cache = ExpiringCache(policy.stale_cache_size, policy.stale_cache)
+
+        if policy.max_concurrency is not None:
+            self.bulkhead = Bulkhead(policy.max_concurrency, policy.max_waiting)
+
+    def make_key(self, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Optional[Hashable]:
+        """
+        The arguments are turned into a key only if there is a cache that needs it.
+        """
+        if self.failure_cache is None and self.stale_cache is None:
+            return None
+        return make_key(args, kwargs)
+
+    def is_known_failure(self, key: Optional[Hashable]) -> bool:
+        return key is not None and self.failure_cache is not None and self.failure_cache.get(key) is not MISSING
+
+    def remember_failure(self, key: Optional[Hashable]) -> None:
+        if key is not None and self.failure_cache is not None:
+            self.failure_cache.set(key, True)
+
+    def remember_result(self, key: Optional[Hashable], result: Any) -> None:
+        if key is not None and self.stale_cache is not None:
+            self.stale_cache.set(key, result)
+
+    def get_stale_result(self, key: Optional[Hashable]) -> Any:
+        """
+        Returns the last successful result for the same arguments, or MISSING if there is none.
+        """
+        if key is None or self.stale_cache is None:
+            return MISSING
+        return self.stale_cache.get(key)
+
+    def record_failure(self, is_suppressed: bool) -> None:
+        if self.breaker is not None:
+            if not is_suppressed:
+                self.breaker.record_unexpected_failure()
+            elif self.breaker.record_failure() and self.policy.reporter.is_enabled():
+                self.emit('warn', BREAKER_OPENED_TEMPLATE, (self.name, self.breaker.cooldown))
+
+    def report(self, is_suppressed: bool, exception: Optional[BaseException], template: str, *args: Any) -> None:
+        """
+        Repeats are collapsed first, so that they do not use up the rate limit. The decision to drop a message because of sampling or the rate limit is made before anything is formatted.
+        """
+        reporter = self.policy.reporter
+        if not reporter.is_enabled():
+            return
+
+        if self.aggregator is not None:
+            is_new, aggregates = self.aggregator.register((is_suppressed, type(exception).__name__, str(exception)))
+            self.report_aggregates(aggregates)
+            if not is_new:
+                return
+
+        if self.throttle is not None:
+            is_allowed, dropped = self.throttle.allow()
+            if dropped:
+                self.emit('warn', DROPPED_TEMPLATE, (dropped, self.name))
+            if not is_allowed:
+                return
+
+        self.emit('report', template, args, exception)
+
+    def emit(self, method: str, template: str, args: Tuple[Any, ...], exception: Optional[BaseException] = None) -> None:
+        if self.policy.queue is not None:
+            self.policy.queue.put(method, template, args, exception)
+        else:
+            getattr(self.policy.reporter, method)(template, *args)
+
+    def report_aggregates(self, aggregates: List[Aggregate]) -> None:
+        for (is_suppressed, exception_name, message), count, seconds in aggregates:
+            self.emit('error', AGGREGATE_TEMPLATE, (exception_name, f' ("{message}")' if message else '', 'suppressed' if is_suppressed else 'not suppressed', count, seconds, self.name))
+
+    def flush(self) -> None:
+        if self.aggregator is not None:
+            aggregates = self.aggregator.flush()
+            if self.policy.reporter.is_enabled():
+                self.report_aggregates(aggregates)
+
+        if self.throttle is not None:
+            dropped = self.throttle.take_dropped()
+            if dropped and self.policy.reporter.is_enabled():
+                self.emit('warn', DROPPED_TEMPLATE, (dropped, self.name))
+
+
+@atexit.register
+def flush_callsites() -> None:
+    """
+    Aggregates and counters of dropped messages may go to the log queues, so the queues are flushed last.
+    """
+    for callsite in list(flushable_callsites):
+        callsite.flush()
+
+    flush_log_queues()
@@ -0,0 +1,97 @@
+import sys
+from collections import OrderedDict
+from threading import Lock
+from types import TracebackType
+from typing import TYPE_CHECKING, Callable, Hashable, List, Type, Optional, Any
+
+if TYPE_CHECKING:  # pragma: no cover
+    from escape.wrapper import Wrapper
+
+
+if sys.version_info < (3, 11):
+    def make_group(message: str, exceptions: List[BaseException]) -> BaseException:  # pragma: no cover
+        raise RuntimeError('Exception groups are available only since Python 3.11.')
+else:
+    def make_group(message: str, exceptions: List[BaseException]) -> BaseException:
+        return BaseExceptionGroup(message, exceptions)
+
+
+class Collector:
+    """
+    Keeps the last suppressed exceptions in a ring buffer of a fixed size, so that they can be inspected or reported after the work is done. The older exceptions are pushed out and only counted, so the memory consumption does not depend on the number of failures.
+
+    With deduplication, only one exception of each type and message is kept, and its repeats are counted. The kinds of exceptions that have not been seen for the longest time are pushed out first.
+    """
+    __slots__ = ('size', 'dedup', 'policy', 'entries', 'total', 'lock')
+
+    def __init__(self, size: int, dedup: bool, make_policy: Callable[['Collector'], 'Wrapper']) -> None:
+        self.size = size
+        self.dedup = dedup
+        self.entries: 'OrderedDict[Hashable, List[Any]]' = OrderedDict()
+        self.total = 0
+        self.lock = Lock()
+        self.policy = make_policy(self)
+
+    def __call__(self, function: Callable[..., Any]) -> Callable[..., Any]:
+        return self.policy(function)
+
+    def __enter__(self) -> 'Collector':
+        self.policy.enter_context(sys._getframe(1))
+        return self
+
+    def __exit__(self, exception_type: Optional[Type[BaseException]], exception_value: Optional[BaseException], traceback: Optional[TracebackType]) -> bool:
+        return self.policy.exit_context(exception_type, exception_value, sys._getframe(1))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, exception: BaseException) -> None:
+        with self.lock:
+            self.total += 1
+            key: Hashable = (type(exception), str(exception)) if self.dedup else self.total
+
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry[1] += 1
+                self.entries.move_to_end(key)
+                return
+
+            self.entries[key] = [exception, 1]
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    @property
+    def exceptions(self) -> List[BaseException]:
+        with self.lock:
+            return [exception for exception, _ in self.entries.values()]
+
+    @property
+    def counts(self) -> List[int]:
+        """
+        The number of times each of the kept exceptions has been suppressed, in the same order as "exceptions". Without deduplication, it is always 1.
+        """
+        with self.lock:
+            return [count for _, count in self.entries.values()]
+
+    @property
+    def dropped(self) -> int:
+        """
+        The number of suppressed exceptions that are not kept (or not counted) anymore, because they have been pushed out of the buffer.
+        """
+        with self.lock:
+            kept: int = sum(count for _, count in self.entries.values())
+            return self.total - kept
+
+    def group(self, message: str = 'Suppressed exceptions') -> Optional[BaseException]:
+        """
+        Returns the kept exceptions as an "ExceptionGroup" (or "BaseExceptionGroup"), or None if there are no exceptions.
+        """
+        exceptions = self.exceptions
+        if not exceptions:
+            return None
+        return make_group(message, exceptions)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.total = 0
@@ -0,0 +1,61 @@
+import re
+from typing import Type, Tuple, Callable, Pattern, Union, Optional, Any
+
+from escape.cache import MISSING
+
+
+class Condition:
+    """
+    Matches exceptions of a type (and its subclasses) that also satisfy all the given checks: the values of attributes, a regular expression for the message and a predicate. The checks run in this order, from the cheapest one.
+
+    If the expected value of an attribute is a set, the actual value must be one of its elements, otherwise it must be equal to the expected value.
+    """
+    __slots__ = ('exception_type', 'attributes', 'pattern', 'predicate')
+
+    def __init__(self, exception_type: Type[BaseException], attributes: Tuple[Tuple[str, Any], ...], pattern: Optional[Pattern[str]], predicate: Optional[Callable[[BaseException], bool]]) -> None:
+        self.exception_type = exception_type
+        self.attributes = attributes
+        self.pattern = pattern
+        self.predicate = predicate
+
+    def __hash__(self) -> int:
+        return hash((self.exception_type, self.attributes, self.pattern, self.predicate))
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Condition):
+            return NotImplemented
+        return (self.exception_type, self.attributes, self.pattern, self.predicate) == (other.exception_type, other.attributes, other.pattern, other.predicate)
+
+    def __repr__(self) -> str:
+        arguments = [self.exception_type.__name__]
+        arguments.extend(f'{name}={value!r}' for name, value in self.attributes)
+        if self.pattern is not None:
+            arguments.append(f'message={self.pattern.pattern!r}')
+        if self.predicate is not None:
+            arguments.append(f'predicate={self.predicate!r}')
+        return f'{type(self).__name__}({", ".join(arguments)})'
+
+    @classmethod
+    def create(cls, exception_type: Type[BaseException], message: Union[None, str, Pattern[str]], predicate: Optional[Callable[[BaseException], bool]], attributes: Tuple[Tuple[str, Any], ...]) -> 'Condition':
+        """
+        Sets are frozen, so that the condition is hashable, and the message pattern is compiled once, here.
+        """
+        attributes = tuple((name, frozenset(value) if isinstance(value, (set, frozenset)) else value) for name, value in sorted(attributes))
+        return cls(exception_type, attributes, re.compile(message) if isinstance(message, str) else message, predicate)
+
+    def matches(self, exception: BaseException) -> bool:
+        for name, expected_value in self.attributes:
+            value = getattr(exception, name, MISSING)
+            if isinstance(expected_value, frozenset):
+                try:
+                    if value not in expected_value:
+                        return False
+                except TypeError:
+                    return False
+            elif value is MISSING or value != expected_value:
+                return False
+
+        if self.pattern is not None and self.pattern.search(str(exception)) is None:
+            return False
+
+        return self.predicate is None or bool(self.predicate(exception))
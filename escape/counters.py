@@ -0,0 +1,107 @@
+from threading import get_ident, Lock
+from typing import Type, Dict, Any
+
+
+class Shard:
+    __slots__ = ('calls', 'suppressed', 'reraised', 'retries', 'exceptions')
+
+    def __init__(self) -> None:
+        self.calls: int = 0
+        self.suppressed: int = 0
+        self.reraised: int = 0
+        self.retries: int = 0
+        self.exceptions: Dict[str, int] = {}
+
+    def count_exception(self, exception_type: Type[BaseException], is_suppressed: bool) -> None:
+        if is_suppressed:
+            self.suppressed += 1
+        else:
+            self.reraised += 1
+
+        name = get_exception_name(exception_type)
+        self.exceptions[name] = self.exceptions.get(name, 0) + 1
+
+
+class Counters:
+    """
+    Counters of one call site. Each thread writes only to its own shard, so no locks are taken on the hot path; the shards are merged when a snapshot is read.
+    """
+    __slots__ = ('name', 'shards')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.shards: Dict[int, Shard] = {}
+
+    def shard(self) -> Shard:
+        shard = self.shards.get(get_ident())
+        if shard is None:
+            shard = self.shards.setdefault(get_ident(), Shard())
+        return shard
+
+    def snapshot(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {'calls': 0, 'suppressed': 0, 'reraised': 0, 'retries': 0, 'exceptions': {}}
+
+        for shard in list(self.shards.values()):
+            result['calls'] += shard.calls
+            result['suppressed'] += shard.suppressed
+            result['reraised'] += shard.reraised
+            result['retries'] += shard.retries
+            for name, number in list(shard.exceptions.items()):
+                result['exceptions'][name] = result['exceptions'].get(name, 0) + number
+
+        return result
+
+
+registry: Dict[str, Counters] = {}
+registry_lock = Lock()
+
+
+def get_exception_name(exception_type: Type[BaseException]) -> str:
+    if exception_type.__module__ == 'builtins':
+        return exception_type.__qualname__
+    return f'{exception_type.__module__}.{exception_type.__qualname__}'
+
+
+def get_counters(name: str) -> Counters:
+    """
+    Call sites with the same name (for example, several functions created by the same factory) share the counters.
+    """
+    counters = registry.get(name)
+    if counters is None:
+        with registry_lock:
+            counters = registry.setdefault(name, Counters(name))
+    return counters
+
+
+def take_snapshot() -> Dict[str, Dict[str, Any]]:
+    with registry_lock:
+        counters_list = list(registry.values())
+
+    return {counters.name: counters.snapshot() for counters in counters_list}
+
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    lines = []
+
+    for metric, key, description in (
+        ('escape_calls_total', 'calls', 'Calls of decorated functions and entries into context managers.'),
+        ('escape_suppressed_total', 'suppressed', 'Suppressed exceptions.'),
+        ('escape_reraised_total', 'reraised', 'Exceptions that were not suppressed.'),
+        ('escape_retries_total', 'retries', 'Repeated calls after suppressed exceptions.'),
+    ):
+        lines.append(f'# HELP {metric} {description}')
+        lines.append(f'# TYPE {metric} counter')
+        for name, data in snapshot.items():
+            lines.append(f'{metric}{{callsite="{escape_label(name)}"}} {data[key]}')
+
+    lines.append('# HELP escape_exceptions_total Exceptions by type, both suppressed and not.')
+    lines.append('# TYPE escape_exceptions_total counter')
+    for name, data in snapshot.items():
+        for exception_name, number in data['exceptions'].items():
+            lines.append(f'escape_exceptions_total{{callsite="{escape_label(name)}",exception="{escape_label(exception_name)}"}} {number}')
+
+    return '\n'.join(lines) + '\n'
@@ -1,2 +1,30 @@
 class SetDefaultReturnValueForContextManagerError(Exception):
     pass
+
+
+class SetDefaultReturnValueForAsyncGeneratorError(Exception):
+    pass
+
+
+class SetAsyncDefaultFactoryForSyncFunctionError(Exception):
+    pass
+
+
+class SetTimeoutForSyncFunctionError(Exception):
+    pass
+
+
+class FunctionTimeoutError(TimeoutError):
+    pass
+
+
+class ConcurrencyLimitError(Exception):
+    pass
+
+
+class SetAsyncFallbackForSyncFunctionError(Exception):
+    pass
+
+
+class UnsupportedOptionError(Exception):
+    pass
@@ -0,0 +1,132 @@
+import asyncio
+from concurrent.futures import Executor, Future, wait, FIRST_COMPLETED
+from functools import wraps
+from inspect import iscoroutinefunction, isgeneratorfunction, isasyncgenfunction
+from typing import TYPE_CHECKING, Callable, Tuple, Dict, Set, Union, Optional, Any
+
+from escape.callsite import CallSite
+from escape.errors import SetAsyncDefaultFactoryForSyncFunctionError, SetAsyncFallbackForSyncFunctionError
+from escape.timeouts import get_executor
+
+if TYPE_CHECKING:  # pragma: no cover
+    from escape.wrapper import Wrapper
+
+
+HEDGE_UNSUPPORTED_OPTIONS = ('retries', 'timeout', 'breaker_threshold', 'failure_cache', 'stale_cache', 'max_concurrency')
+
+
+class Hedge:
+    """
+    Calls the function once, and if there is no result after "delay" seconds (or the attempt has failed), calls it again, up to "attempts" times. The first successful result wins, and the other attempts are cancelled.
+
+    Each pass of the loop follows either the start, or a timeout, or a failed attempt, so each of them starts a new attempt while there are attempts left. When all the attempts have failed, the fallbacks and the default value of the policy are used. The options that wrap a single call of the function (see HEDGE_UNSUPPORTED_OPTIONS) do not fit the attempts, and they are rejected when the hedge is created.
+    """
+    __slots__ = ('policy', 'attempts', 'delay', 'executor')
+
+    def __init__(self, policy: 'Wrapper', attempts: int, delay: float, executor: Union[str, Executor]) -> None:
+        self.policy = policy
+        self.attempts = attempts
+        self.delay = delay
+        self.executor = executor
+
+    def __call__(self, function: Callable[..., Any]) -> Callable[..., Any]:
+        if isgeneratorfunction(function) or isasyncgenfunction(function):
+            raise ValueError('Only ordinary functions and coroutine functions can be hedged.')
+        if self.policy.is_factory_async and not iscoroutinefunction(function):
+            raise SetAsyncDefaultFactoryForSyncFunctionError('An async default factory can only be used with coroutine functions.')
+        if not iscoroutinefunction(function) and any(iscoroutinefunction(fallback_function) for fallback_function, _ in self.policy.iterate_fallbacks()):
+            raise SetAsyncFallbackForSyncFunctionError('Coroutine functions can be used as fallbacks only for coroutine functions.')
+
+        callsite = CallSite(f'{function.__module__}.{function.__qualname__}', self.policy) if self.policy.is_extended else None
+
+        if iscoroutinefunction(function):
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                return await self.call_coroutine_function(function, callsite, args, kwargs)
+            return wraps(function)(async_wrapper)
+
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return self.call_function(function, callsite, args, kwargs)
+        return wraps(function)(wrapper)
+
+    def check_exception(self, exception: BaseException, callsite: Optional[CallSite], kind: str, name: str) -> None:
+        """
+        The exception of a failed attempt is raised again here, so that it is written to the log with its traceback. If it should not be suppressed, it goes up.
+        """
+        try:
+            raise exception
+        except BaseException as e:
+            if not self.policy.handle_function_exception(e, callsite, kind, name):
+                raise
+
+    async def call_coroutine_function(self, function: Callable[..., Any], callsite: Optional[CallSite], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        self.policy.count_call(callsite)
+        tasks: Set['asyncio.Future[Any]'] = set()
+        launched = 0
+        failed = 0
+        last_exception = None
+
+        try:
+            while True:
+                if launched < self.attempts:
+                    tasks.add(asyncio.ensure_future(function(*args, **kwargs)))
+                    launched += 1
+
+                done, tasks = await asyncio.wait(tasks, timeout=self.delay if launched < self.attempts else None, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    if task.cancelled():
+                        raise asyncio.CancelledError()
+                    exception = task.exception()
+                    if exception is None:
+                        return task.result()
+                    self.check_exception(exception, callsite, 'coroutine function', function.__name__)
+                    failed += 1
+                    last_exception = exception
+
+                if failed == self.attempts:
+                    if callsite is not None:
+                        return await self.policy.get_substitute_async(callsite, None, last_exception, args, kwargs)
+                    result = self.policy.get_default(last_exception, args, kwargs)
+                    if self.policy.is_factory_async:
+                        result = await result
+                    return result
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def call_function(self, function: Callable[..., Any], callsite: Optional[CallSite], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        """
+        A running thread cannot be stopped, so the attempts that lost keep running in the executor, but nobody waits for them.
+        """
+        self.policy.count_call(callsite)
+        executor = get_executor(self.executor)
+        futures: Set['Future[Any]'] = set()
+        launched = 0
+        failed = 0
+        last_exception = None
+
+        try:
+            while True:
+                if launched < self.attempts:
+                    futures.add(executor.submit(function, *args, **kwargs))
+                    launched += 1
+
+                done, futures = wait(futures, timeout=self.delay if launched < self.attempts else None, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    exception = future.exception()
+                    if exception is None:
+                        return future.result()
+                    self.check_exception(exception, callsite, 'function', function.__name__)
+                    failed += 1
+                    last_exception = exception
+
+                if failed == self.attempts:
+                    if callsite is not None:
+                        return self.policy.get_substitute(callsite, None, last_exception, args, kwargs)
+                    return self.policy.get_default(last_exception, args, kwargs)
+
+        finally:
+            for future in futures:
+                future.cancel()
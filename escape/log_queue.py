@@ -0,0 +1,124 @@
+from queue import Queue, Full
+from threading import Thread, Lock
+from traceback import StackSummary, walk_tb
+from typing import Optional, Tuple, Any
+from weakref import WeakSet
+
+from escape.reporter import Reporter, ExceptionDescription
+
+
+QUEUE_OVERFLOWED_TEMPLATE = '%d messages about exceptions were dropped because the log queue was full.'
+
+Event = Tuple[str, str, Tuple[Any, ...]]
+
+log_queues: 'WeakSet[LogQueue]' = WeakSet()
+
+
+class TracebackDescription:
+    """
+    A lazy "%s" argument with a traceback. Only a light summary of the stack is kept (without the frames and their local variables), and it is turned into text only when the message is rendered.
+    """
+    __slots__ = ('summary', 'exception_name', 'message')
+
+    def __init__(self, exception: BaseException) -> None:
+        self.summary = StackSummary.extract(walk_tb(exception.__traceback__), lookup_lines=False)
+        self.exception_name = type(exception).__name__
+        self.message = str(exception)
+
+    def __str__(self) -> str:
+        lines = ['Traceback (most recent call last):\n']
+        lines.extend(self.summary.format())
+        lines.append(f'{self.exception_name}: {self.message}' if self.message else self.exception_name)
+        return ''.join(lines)
+
+
+class LogQueue:
+    """
+    Moves writing to the log out of the code that suppresses exceptions. The events are put into a bounded queue, and a background thread passes them to the real logger.
+
+    When the queue is full, the event is either dropped (and counted) or the caller waits for a free place, depending on the overflow policy.
+    """
+    __slots__ = ('reporter', 'queue', 'overflow', 'dropped', 'thread', 'lock', '__weakref__')
+
+    def __init__(self, reporter: Reporter, size: int, overflow: str) -> None:
+        self.reporter = reporter
+        self.queue: 'Queue[Optional[Event]]' = Queue(maxsize=size)
+        self.overflow = overflow
+        self.dropped = 0
+        self.thread: Optional[Thread] = None
+        self.lock = Lock()
+
+        log_queues.add(self)
+
+    def put(self, method: str, template: str, args: Tuple[Any, ...], exception: Optional[BaseException] = None) -> None:
+        """
+        Captures the event in the current thread. The exception itself is not stored, since its traceback would keep all the frames alive: only its text and a summary of the stack are taken.
+        """
+        args = tuple(str(x) if isinstance(x, ExceptionDescription) else x for x in args)
+
+        if method == 'report':
+            method = 'error'
+            if exception is not None:
+                template = f'{template}\n%s'
+                args = (*args, TracebackDescription(exception))
+
+        self.start()
+
+        if self.overflow == 'block':
+            self.queue.put((method, template, args))
+            return
+
+        try:
+            self.queue.put_nowait((method, template, args))
+        except Full:
+            with self.lock:
+                self.dropped += 1
+
+    def start(self) -> None:
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = Thread(target=self.work, name='escape-log-queue', daemon=True)
+                    self.thread.start()
+
+    def work(self) -> None:
+        while True:
+            event = self.queue.get()
+            try:
+                if event is None:
+                    return
+                self.write(event)
+            finally:
+                self.queue.task_done()
+
+    def write(self, event: Event) -> None:
+        method, template, args = event
+
+        with self.lock:
+            dropped = self.dropped
+            self.dropped = 0
+
+        try:
+            if dropped:
+                self.reporter.warn(QUEUE_OVERFLOWED_TEMPLATE, dropped)
+            getattr(self.reporter, method)(template, *args)
+        except Exception:  # pragma: no cover
+            pass
+
+    def flush(self) -> None:
+        """
+        Waits until all the events that are already in the queue are written.
+        """
+        if self.thread is not None:
+            self.queue.join()
+
+        with self.lock:
+            dropped = self.dropped
+            self.dropped = 0
+        if dropped:
+            self.reporter.warn(QUEUE_OVERFLOWED_TEMPLATE, dropped)
+
+
+def flush_log_queues() -> None:
+    for log_queue in list(log_queues):
+        log_queue.flush()
@@ -0,0 +1,52 @@
+from typing import Type, Tuple, Dict, Union, Any
+from weakref import ref
+
+from escape.conditions import Condition
+
+
+Decision = Union[bool, Tuple[Condition, ...]]
+
+
+class ExceptionsMatcher:
+    """
+    Decides whether exceptions of a given type should be suppressed and remembers the decision for each type.
+
+    The decisions are keyed by the identifier of the type. Types are referenced only weakly, and when a type is collected, its decision is forgotten, so dynamically created exception classes do not leak.
+
+    With conditions, the decision for a type is either final (True or False) or the tuple of the conditions that can match its exceptions, so the exceptions of other types are rejected without running any checks.
+    """
+    __slots__ = ('exceptions', 'conditions', 'decisions', 'references')
+
+    def __init__(self, exceptions: Tuple[Type[BaseException], ...], conditions: Tuple[Condition, ...] = ()) -> None:
+        self.exceptions: Tuple[Type[BaseException], ...] = exceptions
+        self.conditions: Tuple[Condition, ...] = conditions
+        self.decisions: Dict[int, Decision] = {}
+        self.references: Dict[int, 'ref[Any]'] = {}
+
+    def __call__(self, exception_type: Type[BaseException]) -> Decision:
+        decision = self.decisions.get(id(exception_type))
+        if decision is None:
+            return self.learn(exception_type)
+        return decision
+
+    def matches(self, exception: BaseException) -> bool:
+        decision = self(type(exception))
+        if decision.__class__ is bool:
+            return decision  # type: ignore[return-value]
+        return any(condition.matches(exception) for condition in decision)  # type: ignore[union-attr]
+
+    def learn(self, exception_type: Type[BaseException]) -> Decision:
+        key = id(exception_type)
+        decision: Decision = issubclass(exception_type, self.exceptions) or tuple(x for x in self.conditions if issubclass(exception_type, x.exception_type)) or False
+
+        decisions = self.decisions
+        references = self.references
+
+        def forget(reference: 'ref[Any]') -> None:
+            decisions.pop(key, None)
+            references.pop(key, None)
+
+        references[key] = ref(exception_type, forget)
+        decisions[key] = decision
+
+        return decision
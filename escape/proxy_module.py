@@ -1,16 +1,27 @@
+import re
 import sys
-from typing import Type, Tuple, Callable, Union, Optional, Any
-from types import TracebackType
-from inspect import isclass
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Type, Tuple, Dict, Callable, Awaitable, AsyncIterator, Iterable, Iterator, List, Pattern, Union, Optional, Hashable, Any
+from types import TracebackType, FrameType
+from inspect import isclass, isawaitable, iscoroutinefunction, isgeneratorfunction, isasyncgenfunction
 from itertools import chain
+from threading import Lock
 
 try:
     from types import EllipsisType  # type: ignore[attr-defined]
 except ImportError:  # pragma: no cover
     EllipsisType = type(...)  # pragma: no cover
 
-from emptylog import LoggerProtocol, EmptyLogger
+from emptylog import EmptyLogger
 
+from escape.aio import gather_with_policy, as_completed_with_policy, AWAITING_UNSUPPORTED_OPTIONS
+from escape.batch import map_with_policy, PROCESS_UNSUPPORTED_OPTIONS
+from escape.callsite import CallSite
+from escape.collector import Collector
+from escape.conditions import Condition
+from escape.counters import take_snapshot, render_prometheus
+from escape.hedging import Hedge, HEDGE_UNSUPPORTED_OPTIONS
+from escape.matcher import ExceptionsMatcher
 from escape.wrapper import Wrapper
 
 
@@ -19,49 +30,215 @@ if sys.version_info < (3, 11):
 else:
     muted_by_default_exceptions = (Exception, BaseExceptionGroup)
 
+muted_by_default_matcher = ExceptionsMatcher(muted_by_default_exceptions)
+
+INTERNED_POLICIES_LIMIT = 1024
+INTERNED_DEFAULT_TYPES = frozenset((type(None), bool, int, float, complex, str, bytes))
+interned_policies: Dict[Hashable, Wrapper] = {}
+interned_policies_lock = Lock()
+empty_logger = EmptyLogger()
+
+
+def make_policy_key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+    """
+    Returns None if the policy should not be interned. The key compares the default value by equality, so only simple immutable values can be used, otherwise an equal but different object would be returned by the policy. A collector is a mutable object with its own state, and the table would also keep it (and the collected exceptions) alive.
+    """
+    default = kwargs.get('default')
+    if type(default) not in INTERNED_DEFAULT_TYPES or kwargs.get('collector') is not None:
+        return None
+    return (args, type(default), *kwargs.items())
+
+
+def find_policy(key: Optional[Tuple[Any, ...]]) -> Optional[Wrapper]:
+    if key is None:
+        return None
+    try:
+        return interned_policies.get(key)
+    except TypeError:
+        return None
+
+
+def intern_policy(key: Optional[Tuple[Any, ...]], policy: Wrapper) -> Wrapper:
+    """
+    The order of keyword arguments is a part of the key, so that the key can be built quickly. When a policy is created, it is also stored with the keyword arguments sorted by name, so that the same arguments in another order give the same object.
+    """
+    if key is None:
+        return policy
+
+    try:
+        canonical_key = (key[0], key[1], *sorted(key[2:]))
+        hash(canonical_key)
+    except TypeError:
+        return policy
+
+    with interned_policies_lock:
+        while len(interned_policies) >= INTERNED_POLICIES_LIMIT - 1:
+            del interned_policies[next(iter(interned_policies))]
+        policy = interned_policies.setdefault(canonical_key, policy)
+        interned_policies[key] = policy
+        return policy
+
+
 class ProxyModule(sys.modules[__name__].__class__):  # type: ignore[misc]
-    def __call__(self, *args: Union[Callable[..., Any], Type[BaseException], EllipsisType], default: Any = None, logger: LoggerProtocol = EmptyLogger()) -> Union[Callable[..., Any], Callable[[Callable[..., Any]], Callable[..., Any]]]:
+    def __call__(self, *args: Union[Callable[..., Any], Type[BaseException], Condition, EllipsisType], **kwargs: Any) -> Union[Callable[..., Any], Callable[[Callable[..., Any]], Callable[..., Any]]]:
         """
         https://docs.python.org/3/library/exceptions.html#exception-hierarchy
-        """
-        if self.are_it_function(args):
-            exceptions: Tuple[Type[BaseException], ...] = muted_by_default_exceptions
-        else:
-            if self.is_there_ellipsis(args):
-                exceptions = tuple(chain((x for x in args if x is not Ellipsis), muted_by_default_exceptions))  # type: ignore[misc]
-            else:
-                exceptions = args  # type: ignore[assignment]
 
-        wrapper_of_wrappers = Wrapper(default, exceptions, logger)
+        The keyword arguments are the same as for "escape.policy()".
+        """
+        key = make_policy_key(args, kwargs)
+        policy = find_policy(key)
+        if policy is not None:
+            return policy
 
         if self.are_it_exceptions(args):
-            return wrapper_of_wrappers
+            return self.create_policy(key, args, kwargs)
 
         elif self.are_it_function(args):
-            return wrapper_of_wrappers(args[0])
+            return self.policy(..., **kwargs)(args[0])  # type: ignore[arg-type]
 
         else:
             raise ValueError('You are using the decorator for the wrong purpose.')
 
+    def policy(self, *args: Union[Type[BaseException], Condition, EllipsisType], **kwargs: Any) -> Wrapper:
+        """
+        Creates a reusable policy object, which can be used both as a decorator and as a context manager. Identical arguments give the same object (if the default value is a simple immutable value, like a number or a string). The keyword arguments are described in the "Wrapper" class.
+        """
+        key = make_policy_key(args, kwargs)
+        policy = find_policy(key)
+        if policy is not None:
+            return policy
+
+        if not self.are_it_exceptions(args):
+            raise ValueError('Only exception types, conditions and Ellipsis can be used to create a policy.')
+
+        return self.create_policy(key, args, kwargs)
+
+    def create_policy(self, key: Optional[Tuple[Any, ...]], args: Tuple[Union[Type[BaseException], Condition, EllipsisType], ...], kwargs: Dict[str, Any]) -> Wrapper:
+        options = dict(kwargs)
+        default = options.pop('default', None)
+        logger = options.pop('logger', empty_logger)
+        return intern_policy(key, Wrapper(default, self.expand_exceptions(args), logger, **options))
+
+    def map(self, function: Callable[[Any], Any], iterable: Iterable[Any], *args: Union[Type[BaseException], Condition, EllipsisType], executor: Union[None, str, Executor] = None, workers: Optional[int] = None, chunksize: int = 1, ordered: bool = True, **kwargs: Any) -> Iterator[Any]:
+        """
+        Works like the built-in "map()", but each call of the function is protected by the policy created from the other arguments, as in "escape.policy()". The results are produced lazily, so everything that can be checked is checked here, before the first result is requested.
+        """
+        if not callable(function) or iscoroutinefunction(function) or isgeneratorfunction(function) or isasyncgenfunction(function):
+            raise ValueError('Only ordinary functions can be used with escape.map().')
+        if not (executor is None or executor in ('thread', 'process') or isinstance(executor, Executor)):
+            raise ValueError('The executor must be None, "thread", "process" or an instance of concurrent.futures.Executor.')
+        if workers is not None and workers <= 0:
+            raise ValueError('The number of workers must be a positive number.')
+        if chunksize <= 0:
+            raise ValueError('The size of a chunk must be a positive number.')
+
+        policy = self.policy(*args, **kwargs)
+        if executor == 'process' or isinstance(executor, ProcessPoolExecutor):
+            policy.check_options(PROCESS_UNSUPPORTED_OPTIONS, 'with a process pool')
+        policy.check_function(function)
+
+        return map_with_policy(policy, function, iterable, executor, workers, chunksize, ordered)
+
+    def gather(self, *awaitables: Awaitable[Any], exceptions: Union[Type[BaseException], Condition, EllipsisType, Tuple[Union[Type[BaseException], Condition, EllipsisType], ...]] = ..., limit: Optional[int] = None, **kwargs: Any) -> Awaitable[List[Any]]:
+        """
+        Works like "asyncio.gather()", but the suppressed exceptions are replaced with the default value. The first exception that is not suppressed cancels the rest of the awaitables and is raised.
+        """
+        policy, callsite = self.prepare_awaiting(awaitables, exceptions, limit, kwargs, 'escape.gather()', sys._getframe(1))
+        return gather_with_policy(policy, callsite, list(awaitables), limit)
+
+    def as_completed(self, *awaitables: Awaitable[Any], exceptions: Union[Type[BaseException], Condition, EllipsisType, Tuple[Union[Type[BaseException], Condition, EllipsisType], ...]] = ..., limit: Optional[int] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        """
+        The same as "escape.gather()", but the results are yielded by an async iterator as soon as they are ready.
+        """
+        policy, callsite = self.prepare_awaiting(awaitables, exceptions, limit, kwargs, 'escape.as_completed()', sys._getframe(1))
+        return as_completed_with_policy(policy, callsite, list(awaitables), limit)
+
+    def prepare_awaiting(self, awaitables: Tuple[Awaitable[Any], ...], exceptions: Union[Type[BaseException], Condition, EllipsisType, Tuple[Union[Type[BaseException], Condition, EllipsisType], ...]], limit: Optional[int], kwargs: Dict[str, Any], name: str, frame: FrameType) -> Tuple[Wrapper, Optional[CallSite]]:
+        """
+        The call site is the function that calls "escape.gather()" or "escape.as_completed()", as for a context manager. The awaitables are already created, so the options that need to call the function again (or instead of it) are rejected, and the concurrency is limited by "limit".
+        """
+        if not all(isawaitable(x) for x in awaitables):
+            raise ValueError('Only awaitable objects can be awaited.')
+        if limit is not None and limit <= 0:
+            raise ValueError('The limit of concurrency must be a positive number.')
+
+        policy = self.policy(*(exceptions if isinstance(exceptions, tuple) else (exceptions,)), **kwargs)
+        policy.check_options(AWAITING_UNSUPPORTED_OPTIONS, f'with {name}')
+
+        return policy, policy.get_context_callsite(frame) if policy.is_extended else None
+
+    def hedge(self, *args: Union[Type[BaseException], Condition, EllipsisType], attempts: int = 2, delay: float = 0.1, executor: Union[str, Executor] = 'thread', **kwargs: Any) -> Hedge:
+        """
+        Creates a decorator that starts a new attempt to call the function if the previous ones have not finished in "delay" seconds. Other arguments are the same as for "escape.policy()".
+        """
+        if not isinstance(attempts, int) or attempts <= 0:
+            raise ValueError('The number of attempts must be a positive integer.')
+        if delay < 0:
+            raise ValueError('The delay between attempts must be a non-negative number of seconds.')
+        if not (executor == 'thread' or isinstance(executor, Executor)):
+            raise ValueError('The executor must be "thread" or an instance of concurrent.futures.Executor.')
+
+        policy = self.policy(*args, **kwargs)
+        policy.check_options(HEDGE_UNSUPPORTED_OPTIONS, 'with escape.hedge()')
+
+        return Hedge(policy, attempts, delay, executor)
+
+    def collect(self, *args: Union[Type[BaseException], Condition, EllipsisType], size: int = 100, dedup: bool = False, **kwargs: Any) -> Collector:
+        """
+        Creates a policy that keeps the last "size" suppressed exceptions, to be inspected after the work is done. It can be used both as a decorator and as a context manager, and the other arguments are the same as for "escape.policy()".
+        """
+        if not isinstance(size, int) or size <= 0:
+            raise ValueError('The size of the collector must be a positive integer.')
+
+        return Collector(size, dedup, lambda collector: self.policy(*args, collector=collector, **kwargs))
+
+    def match(self, exception_type: Type[BaseException], *, message: Union[None, str, Pattern[str]] = None, predicate: Optional[Callable[[BaseException], bool]] = None, **attributes: Any) -> Condition:
+        """
+        Creates a condition that can be passed to "escape()" along with exception types: the exceptions of the type are suppressed only if their attributes have the given values (or one of the values, if a set is given), their messages match the regular expression and the predicate returns True.
+        """
+        if not (isclass(exception_type) and issubclass(exception_type, BaseException)):
+            raise ValueError('Only exception types can be used in conditions.')
+        if not (message is None or isinstance(message, (str, re.Pattern))):
+            raise ValueError('The message must be a string or a compiled regular expression.')
+        if predicate is not None and not callable(predicate):
+            raise ValueError('The predicate must be a callable object.')
+
+        return Condition.create(exception_type, message, predicate, tuple(attributes.items()))
+
+    def stats(self, format: str = 'dict') -> Union[Dict[str, Dict[str, Any]], str]:  # noqa: A002
+        """
+        Returns a snapshot of the counters of all call sites where they are enabled with "stats=True", as a dictionary or as a Prometheus text exposition.
+        """
+        snapshot = take_snapshot()
+
+        if format == 'dict':
+            return snapshot
+        elif format == 'prometheus':
+            return render_prometheus(snapshot)
+
+        raise ValueError(f'Unknown format of statistics: {format!r}. Use "dict" or "prometheus".')
+
     def __enter__(self) -> 'ProxyModule':
         return self
 
     def __exit__(self, exception_type: Optional[Type[BaseException]], exception_value: Optional[BaseException], traceback: Optional[TracebackType]) -> bool:
-        if exception_type is not None:
-            for muted_exception_type in muted_by_default_exceptions:
-                if issubclass(exception_type, muted_exception_type):
-                    return True
+        return exception_type is not None and muted_by_default_matcher(exception_type) is True
 
-        return False
+    @classmethod
+    def expand_exceptions(cls, args: Tuple[Union[Type[BaseException], Condition, Callable[..., Any], EllipsisType], ...]) -> Tuple[Union[Type[BaseException], Condition], ...]:
+        if cls.is_there_ellipsis(args):
+            return tuple(chain((x for x in args if x is not Ellipsis), muted_by_default_exceptions))  # type: ignore[misc]
+        return args  # type: ignore[return-value]
 
     @staticmethod
-    def is_there_ellipsis(args: Tuple[Union[Type[BaseException], Callable[..., Any], EllipsisType], ...]) -> bool:
+    def is_there_ellipsis(args: Tuple[Union[Type[BaseException], Condition, Callable[..., Any], EllipsisType], ...]) -> bool:
         return any(x is Ellipsis for x in args)
 
     @staticmethod
-    def are_it_exceptions(args: Tuple[Union[Type[BaseException], Callable[..., Any], EllipsisType], ...]) -> bool:
-        return all((x is Ellipsis) or (isclass(x) and issubclass(x, BaseException)) for x in args)
+    def are_it_exceptions(args: Tuple[Union[Type[BaseException], Condition, Callable[..., Any], EllipsisType], ...]) -> bool:
+        return all((x is Ellipsis) or isinstance(x, Condition) or (isclass(x) and issubclass(x, BaseException)) for x in args)
 
     @staticmethod
-    def are_it_function(args: Tuple[Union[Type[BaseException], Callable[..., Any], EllipsisType], ...]) -> bool:
+    def are_it_function(args: Tuple[Union[Type[BaseException], Condition, Callable[..., Any], EllipsisType], ...]) -> bool:
         return len(args) == 1 and callable(args[0]) and not (isclass(args[0]) and issubclass(args[0], BaseException))
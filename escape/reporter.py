@@ -0,0 +1,69 @@
+from logging import ERROR, WARNING
+from typing import Any, Callable, Optional
+
+from emptylog import LoggerProtocol, EmptyLogger
+
+
+class ExceptionDescription:
+    """
+    A lazy "%s" argument for log messages: the exception is converted to a string only when the message is actually rendered.
+    """
+    __slots__ = ('exception',)
+
+    def __init__(self, exception: Optional[BaseException]) -> None:
+        self.exception = exception
+
+    def __str__(self) -> str:
+        text = str(self.exception)
+        return '' if not text else f' ("{text}")'
+
+
+class Reporter:
+    """
+    Sends messages about exceptions to the logger, doing as little work as possible when nothing is going to be written.
+
+    Messages are passed as templates with %-style arguments. Loggers from the standard library (which have the "isEnabledFor" method) receive them as is and format them only if the record passes the level check. For other loggers the message is rendered in advance, since they are not obliged to format anything. Empty loggers are not called at all.
+    """
+    __slots__ = ('logger', 'is_empty', 'is_enabled_for')
+
+    def __init__(self, logger: LoggerProtocol) -> None:
+        self.logger = logger
+        self.is_empty = isinstance(logger, EmptyLogger)
+        self.is_enabled_for: Optional[Callable[[int], bool]] = getattr(logger, 'isEnabledFor', None)
+
+    def is_enabled(self) -> bool:
+        if self.is_empty:
+            return False
+        if self.is_enabled_for is not None:
+            return self.is_enabled_for(ERROR)
+        return True
+
+    def report(self, template: str, *args: Any) -> None:
+        if self.is_empty:
+            return
+
+        if self.is_enabled_for is not None:
+            if self.is_enabled_for(ERROR):
+                self.logger.exception(template, *args)
+        else:
+            self.logger.exception(template % args)
+
+    def error(self, template: str, *args: Any) -> None:
+        if self.is_empty:
+            return
+
+        if self.is_enabled_for is not None:
+            if self.is_enabled_for(ERROR):
+                self.logger.error(template, *args)
+        else:
+            self.logger.error(template % args)
+
+    def warn(self, template: str, *args: Any) -> None:
+        if self.is_empty:
+            return
+
+        if self.is_enabled_for is not None:
+            if self.is_enabled_for(WARNING):
+                self.logger.warning(template, *args)
+        else:
+            self.logger.warning(template % args)
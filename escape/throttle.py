@@ -0,0 +1,52 @@
+from random import random
+from threading import Lock
+from time import monotonic
+from typing import Tuple, Optional
+
+
+class Throttle:
+    """
+    Decides whether a message about an exception should be written to the log: first by random sampling, then by a token bucket.
+
+    The bucket is refilled at "rate" tokens per second and holds at most max(1, rate) tokens. The messages dropped by the bucket are counted, and the number is handed over with the first message that passes after the burst.
+    """
+    __slots__ = ('rate', 'capacity', 'sample_rate', 'tokens', 'updated_at', 'dropped', 'lock')
+
+    def __init__(self, rate: Optional[float], sample_rate: float) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, rate) if rate is not None else 0.0
+        self.sample_rate = sample_rate
+        self.tokens = self.capacity
+        self.updated_at = monotonic()
+        self.dropped = 0
+        self.lock = Lock()
+
+    def allow(self) -> Tuple[bool, int]:
+        """
+        Returns whether the message is allowed and how many messages have been dropped by the bucket before it.
+        """
+        if self.sample_rate < 1.0 and random() >= self.sample_rate:
+            return False, 0
+
+        if self.rate is None:
+            return True, 0
+
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                dropped = self.dropped
+                self.dropped = 0
+                return True, dropped
+
+            self.dropped += 1
+            return False, 0
+
+    def take_dropped(self) -> int:
+        with self.lock:
+            dropped = self.dropped
+            self.dropped = 0
+            return dropped
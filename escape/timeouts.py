@@ -0,0 +1,65 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from threading import Lock
+from typing import Callable, Awaitable, Tuple, Dict, Union, Optional, Any
+
+from escape.errors import FunctionTimeoutError
+
+
+TIMEOUT_MESSAGE = 'The function "%s" did not finish in %s seconds.'
+
+shared_executor: Optional[ThreadPoolExecutor] = None
+shared_executor_lock = Lock()
+
+
+def get_executor(executor: Union[None, str, Executor]) -> Executor:
+    """
+    With timeout_executor='thread', all the decorated functions share one pool of threads, which is created on the first call.
+    """
+    global shared_executor
+
+    if isinstance(executor, Executor):
+        return executor
+
+    if shared_executor is None:
+        with shared_executor_lock:
+            if shared_executor is None:
+                shared_executor = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4), thread_name_prefix='escape-timeout')
+    return shared_executor
+
+
+async def await_with_timeout(awaitable: Awaitable[Any], timeout: float, name: str) -> Any:
+    """
+    Unlike "asyncio.wait_for()", the cancellation of the caller always wins: if the caller is cancelled, the call is cancelled too and CancelledError goes up, even if the deadline has passed at the same moment.
+    """
+    task = asyncio.ensure_future(awaitable)
+
+    try:
+        await asyncio.wait({task}, timeout=timeout)
+    except BaseException:
+        task.cancel()
+        raise
+
+    if not task.done():
+        task.cancel()
+        await asyncio.wait({task})
+        if task.cancelled():
+            raise FunctionTimeoutError(TIMEOUT_MESSAGE % (name, timeout))
+
+    return task.result()
+
+
+def call_with_timeout(executor: Executor, timeout: float, function: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+    """
+    A thread cannot be stopped from the outside, so after the deadline the function keeps running in the executor, but nobody waits for its result.
+    """
+    future = executor.submit(function, *args, **kwargs)
+
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        if not future.done():
+            future.cancel()
+            raise FunctionTimeoutError(TIMEOUT_MESSAGE % (function.__name__, timeout)) from None
+        return future.result()
@@ -0,0 +1,38 @@
+from traceback import StackSummary, walk_tb
+from types import TracebackType
+from typing import List, Optional
+
+
+def clear_frames(traceback: Optional[TracebackType]) -> None:
+    """
+    Frames that are still executing (for example, the frame of the wrapper itself) cannot be cleared, and they are skipped.
+    """
+    while traceback is not None:
+        try:
+            traceback.tb_frame.clear()
+        except RuntimeError:
+            pass
+        traceback = traceback.tb_next
+
+
+def release_traceback(exception: BaseException, mode: str, is_shared: bool = False) -> None:
+    """
+    Lets the frames of a suppressed exception (and everything that their local variables refer to) be freed, even if the exception object itself is kept somewhere.
+
+    With the "summary" mode, a light "traceback.StackSummary" is saved to the "traceback_summary" attribute of the exception first. The leaves of exception groups are released too. The chained exceptions ("__cause__" and "__context__") are left as they are, since they may still be handled by the outer code.
+
+    A part of an exception group made by "split()" shares the traceback of the group with the other part, and the leaves may have been raised in the same frames as the group. If the other part is raised further ("is_shared"), the frames are not cleared: only the references to them are dropped, so the frames that nothing else uses are still freed.
+    """
+    exceptions: List[BaseException] = [exception]
+
+    while exceptions:
+        exception = exceptions.pop()
+
+        if exception.__traceback__ is not None:
+            if mode == 'summary':
+                exception.traceback_summary = StackSummary.extract(walk_tb(exception.__traceback__))  # type: ignore[attr-defined]
+            if not is_shared:
+                clear_frames(exception.__traceback__)
+            exception.__traceback__ = None
+
+        exceptions.extend(getattr(exception, 'exceptions', ()))
@@ -1,64 +1,759 @@
-from typing import Type, Callable, Tuple, Optional, Any
-from inspect import iscoroutinefunction
+import sys
+from asyncio import CancelledError, sleep as async_sleep
+from random import random
+from time import monotonic, sleep
+from typing import Type, Callable, Iterable, Iterator, Tuple, Dict, Generator, AsyncGenerator, Hashable, Union, Optional, Any
+from inspect import Parameter, signature, isclass, isawaitable, iscoroutinefunction, isgeneratorfunction, isasyncgenfunction
 from functools import wraps
-from types import TracebackType
+from concurrent.futures import Executor
+from types import TracebackType, CodeType, FrameType
 
 from emptylog import LoggerProtocol
 
-from escape.errors import SetDefaultReturnValueForContextManagerError
+from escape.cache import MISSING
+from escape.errors import SetDefaultReturnValueForContextManagerError, SetDefaultReturnValueForAsyncGeneratorError, SetAsyncDefaultFactoryForSyncFunctionError, SetTimeoutForSyncFunctionError, FunctionTimeoutError, ConcurrencyLimitError, SetAsyncFallbackForSyncFunctionError, UnsupportedOptionError
+from escape.callsite import CallSite
+from escape.collector import Collector
+from escape.conditions import Condition
+from escape.log_queue import LogQueue
+from escape.matcher import ExceptionsMatcher
+from escape.reporter import Reporter, ExceptionDescription
+from escape.timeouts import get_executor, await_with_timeout, call_with_timeout
+from escape.tracebacks import release_traceback
+
+
+FUNCTION_SUPPRESSED_TEMPLATE = 'When executing %s "%s", the exception "%s"%s was suppressed.'
+FUNCTION_NOT_SUPPRESSED_TEMPLATE = 'When executing %s "%s", the exception "%s"%s was not suppressed.'
+RETRY_TEMPLATE = 'When executing %s "%s", the exception "%s"%s was suppressed, the call will be repeated in %.3f seconds (attempt %d of %d).'
+CONTEXT_SUPPRESSED_TEMPLATE = 'The "%s"%s exception was suppressed inside the context.'
+CONTEXT_NOT_SUPPRESSED_TEMPLATE = 'The "%s"%s exception was not suppressed inside the context.'
+
+GENERATOR_UNSUPPORTED_OPTIONS = ('timeout', 'max_concurrency', 'retries', 'fallback', 'failure_cache', 'failure_cache_size', 'stale_cache', 'stale_cache_size', 'breaker_threshold')
+CONTEXT_MANAGER_UNSUPPORTED_OPTIONS = ('timeout', 'max_concurrency', 'retries', 'fallback', 'failure_cache', 'failure_cache_size', 'stale_cache', 'stale_cache_size', 'breaker_threshold')
+
+if sys.version_info < (3, 11):
+    exception_group_types: Tuple[Type[BaseException], ...] = ()  # pragma: no cover
+else:
+    exception_group_types = (BaseExceptionGroup,)
 
 
 class Wrapper:
-    def __init__(self, default: Any, exceptions: Tuple[Type[BaseException], ...], logger: LoggerProtocol) -> None:
-        self.default: Any = default
-        self.exceptions: Tuple[Type[BaseException], ...] = exceptions
-        self.logger: LoggerProtocol = logger
+    """
+    An immutable suppression policy. It can be used both as a decorator and as a context manager, as many times as needed.
+    """
+    __slots__ = ('default', 'default_factory', 'exceptions', 'logger', 'stats', 'log_rate_limit', 'log_sample_rate', 'log_aggregation', 'log_queue', 'log_queue_overflow', 'breaker_threshold', 'breaker_window', 'breaker_cooldown', 'failure_cache', 'failure_cache_size', 'stale_cache', 'stale_cache_size', 'timeout', 'timeout_executor', 'max_concurrency', 'max_wait', 'max_waiting', 'retries', 'retry_delay', 'retry_max_delay', 'retry_budget', 'retry_on', 'retry_matcher', 'fallback', 'traceback', 'collector', 'matcher', 'reporter', 'queue', 'is_extended', 'context_callsites', 'is_factory_async', 'factory_arguments')
+
+    options = {
+        'default_factory': None,
+        'stats': False,
+        'log_rate_limit': None,
+        'log_sample_rate': 1.0,
+        'log_aggregation': None,
+        'log_queue': None,
+        'log_queue_overflow': 'drop',
+        'breaker_threshold': None,
+        'breaker_window': 60.0,
+        'breaker_cooldown': 30.0,
+        'failure_cache': None,
+        'failure_cache_size': 1024,
+        'stale_cache': None,
+        'stale_cache_size': 1024,
+        'timeout': None,
+        'timeout_executor': None,
+        'max_concurrency': None,
+        'max_wait': None,
+        'max_waiting': None,
+        'retries': 0,
+        'retry_delay': 0.1,
+        'retry_max_delay': 10.0,
+        'retry_budget': None,
+        'retry_on': None,
+        'fallback': (),
+        'traceback': 'keep',
+        'collector': None,
+    }
+
+    default: Any
+    default_factory: Optional[Callable[..., Any]]
+    exceptions: Tuple[Union[Type[BaseException], Condition], ...]
+    logger: LoggerProtocol
+    stats: Union[bool, str]
+    log_rate_limit: Optional[float]
+    log_sample_rate: float
+    log_aggregation: Optional[float]
+    log_queue: Optional[int]
+    log_queue_overflow: str
+    breaker_threshold: Optional[int]
+    breaker_window: float
+    breaker_cooldown: float
+    failure_cache: Optional[float]
+    failure_cache_size: int
+    stale_cache: Optional[float]
+    stale_cache_size: int
+    timeout: Optional[float]
+    timeout_executor: Union[None, str, Executor]
+    max_concurrency: Optional[int]
+    max_wait: Optional[float]
+    max_waiting: Optional[int]
+    retries: int
+    retry_delay: float
+    retry_max_delay: float
+    retry_budget: Optional[float]
+    retry_on: Optional[Tuple[Type[BaseException], ...]]
+    retry_matcher: Optional[ExceptionsMatcher]
+    fallback: Tuple[Union[Callable[..., Any], Tuple[Callable[..., Any], 'Wrapper']], ...]
+    traceback: str
+    collector: Optional[Collector]
+    matcher: ExceptionsMatcher
+    reporter: Reporter
+    queue: Optional[LogQueue]
+    is_extended: bool
+    context_callsites: Dict[CodeType, CallSite]
+    is_factory_async: bool
+    factory_arguments: str
+
+    def __init__(self, default: Any, exceptions: Tuple[Union[Type[BaseException], Condition], ...], logger: LoggerProtocol, default_factory: Optional[Callable[..., Any]] = None, stats: Union[bool, str] = False, log_rate_limit: Optional[float] = None, log_sample_rate: float = 1.0, log_aggregation: Optional[float] = None, log_queue: Optional[int] = None, log_queue_overflow: str = 'drop', breaker_threshold: Optional[int] = None, breaker_window: float = 60.0, breaker_cooldown: float = 30.0, failure_cache: Optional[float] = None, failure_cache_size: int = 1024, stale_cache: Optional[float] = None, stale_cache_size: int = 1024, timeout: Optional[float] = None, timeout_executor: Union[None, str, Executor] = None, max_concurrency: Optional[int] = None, max_wait: Optional[float] = None, max_waiting: Optional[int] = None, retries: int = 0, retry_delay: float = 0.1, retry_max_delay: float = 10.0, retry_budget: Optional[float] = None, retry_on: Optional[Tuple[Type[BaseException], ...]] = None, fallback: Iterable[Union[Callable[..., Any], Tuple[Callable[..., Any], 'Wrapper']]] = (), traceback: str = 'keep', collector: Optional[Collector] = None) -> None:
+        if default_factory is not None and default is not None:
+            raise ValueError('You cannot set both a default value and a default factory.')
+        if log_rate_limit is not None and log_rate_limit <= 0:
+            raise ValueError('The rate limit for logging must be a positive number of messages per second.')
+        if not 0.0 <= log_sample_rate <= 1.0:
+            raise ValueError('The sample rate for logging must be a number from 0 to 1.')
+        if log_aggregation is not None and log_aggregation <= 0:
+            raise ValueError('The aggregation window for logging must be a positive number of seconds.')
+        if log_queue is not None and log_queue <= 0:
+            raise ValueError('The size of the log queue must be a positive number.')
+        if log_queue_overflow not in ('drop', 'block'):
+            raise ValueError('The overflow policy of the log queue must be "drop" or "block".')
+        if breaker_threshold is not None and breaker_threshold <= 0:
+            raise ValueError('The threshold of the circuit breaker must be a positive number of failures.')
+        if breaker_window <= 0 or breaker_cooldown <= 0:
+            raise ValueError('The window and the cooldown of the circuit breaker must be positive numbers of seconds.')
+        if failure_cache is not None and failure_cache <= 0:
+            raise ValueError('The lifetime of entries in the failure cache must be a positive number of seconds.')
+        if failure_cache_size <= 0:
+            raise ValueError('The size of the failure cache must be a positive number.')
+        if stale_cache is not None and stale_cache <= 0:
+            raise ValueError('The lifetime of entries in the cache of stale results must be a positive number of seconds.')
+        if stale_cache_size <= 0:
+            raise ValueError('The size of the cache of stale results must be a positive number.')
+        if timeout is not None and timeout <= 0:
+            raise ValueError('The timeout must be a positive number of seconds.')
+        if not (timeout_executor is None or timeout_executor == 'thread' or isinstance(timeout_executor, Executor)):
+            raise ValueError('The executor for timeouts must be "thread" or an instance of concurrent.futures.Executor.')
+        if max_concurrency is not None and max_concurrency <= 0:
+            raise ValueError('The maximum number of concurrent calls must be a positive number.')
+        if max_wait is not None and max_wait < 0:
+            raise ValueError('The maximum time to wait for a free place must be a non-negative number of seconds.')
+        if max_waiting is not None and max_waiting <= 0:
+            raise ValueError('The maximum number of waiting calls must be a positive number.')
+        if not isinstance(retries, int) or retries < 0:
+            raise ValueError('The number of retries must be a non-negative integer.')
+        if retry_delay < 0 or retry_max_delay < 0:
+            raise ValueError('The delays between retries must be non-negative numbers of seconds.')
+        if retry_budget is not None and retry_budget <= 0:
+            raise ValueError('The time budget for retries must be a positive number of seconds.')
+        if retry_on is not None and not (isinstance(retry_on, tuple) and all(isclass(x) and issubclass(x, BaseException) for x in retry_on)):
+            raise ValueError('Only a tuple of exception types can be used to choose exceptions for retries.')
+        fallback = tuple(fallback)
+        if not all(callable(x) or (isinstance(x, tuple) and len(x) == 2 and callable(x[0]) and isinstance(x[1], Wrapper)) for x in fallback):
+            raise ValueError('Only functions and pairs of a function and a policy can be used as fallbacks.')
+        if traceback not in ('keep', 'summary', 'drop'):
+            raise ValueError('The traceback mode must be "keep", "summary" or "drop".')
+
+        object.__setattr__(self, 'default', default)
+        object.__setattr__(self, 'default_factory', default_factory)
+        object.__setattr__(self, 'exceptions', exceptions)
+        object.__setattr__(self, 'logger', logger)
+        object.__setattr__(self, 'stats', stats)
+        object.__setattr__(self, 'log_rate_limit', log_rate_limit)
+        object.__setattr__(self, 'log_sample_rate', log_sample_rate)
+        object.__setattr__(self, 'log_aggregation', log_aggregation)
+        object.__setattr__(self, 'log_queue', log_queue)
+        object.__setattr__(self, 'log_queue_overflow', log_queue_overflow)
+        object.__setattr__(self, 'breaker_threshold', breaker_threshold)
+        object.__setattr__(self, 'breaker_window', breaker_window)
+        object.__setattr__(self, 'breaker_cooldown', breaker_cooldown)
+        object.__setattr__(self, 'failure_cache', failure_cache)
+        object.__setattr__(self, 'failure_cache_size', failure_cache_size)
+        object.__setattr__(self, 'stale_cache', stale_cache)
+        object.__setattr__(self, 'stale_cache_size', stale_cache_size)
+        object.__setattr__(self, 'timeout', timeout)
+        object.__setattr__(self, 'timeout_executor', timeout_executor)
+        object.__setattr__(self, 'max_concurrency', max_concurrency)
+        object.__setattr__(self, 'max_wait', max_wait)
+        object.__setattr__(self, 'max_waiting', max_waiting)
+        object.__setattr__(self, 'retries', retries)
+        object.__setattr__(self, 'retry_delay', retry_delay)
+        object.__setattr__(self, 'retry_max_delay', retry_max_delay)
+        object.__setattr__(self, 'retry_budget', retry_budget)
+        object.__setattr__(self, 'retry_on', retry_on)
+        object.__setattr__(self, 'retry_matcher', ExceptionsMatcher(retry_on) if retry_on is not None else None)
+        object.__setattr__(self, 'fallback', fallback)
+        object.__setattr__(self, 'traceback', traceback)
+        object.__setattr__(self, 'collector', collector)
+        object.__setattr__(self, 'matcher', ExceptionsMatcher(tuple(x for x in exceptions if not isinstance(x, Condition)), tuple(x for x in exceptions if isinstance(x, Condition))))
+        object.__setattr__(self, 'reporter', Reporter(logger))
+        object.__setattr__(self, 'queue', LogQueue(self.reporter, log_queue, log_queue_overflow) if log_queue is not None else None)
+        object.__setattr__(self, 'is_extended', bool(self.matcher.conditions) or any(getattr(self, name) != value for name, value in self.options.items()))
+        object.__setattr__(self, 'context_callsites', {})
+        object.__setattr__(self, 'is_factory_async', iscoroutinefunction(default_factory))
+        object.__setattr__(self, 'factory_arguments', self.get_factory_arguments(default_factory) if default_factory is not None else 'nothing')
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f'Policies are immutable, you cannot set the "{name}" attribute.')
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f'Policies are immutable, you cannot delete the "{name}" attribute.')
+
+    def __hash__(self) -> int:
+        return hash((self.exceptions, self.logger, *(getattr(self, name) for name in self.options)))
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Wrapper):
+            return NotImplemented
+        return (
+            self.exceptions == other.exceptions
+            and self.logger == other.logger
+            and all(getattr(self, name) == getattr(other, name) for name in self.options)
+            and self.default.__class__ is other.default.__class__
+            and bool(self.default == other.default)
+        )
+
+    def __repr__(self) -> str:
+        arguments = [repr(x) if isinstance(x, Condition) else x.__name__ for x in self.exceptions]
+        arguments.append(f'default={self.default!r}')
+        arguments.append(f'logger={self.logger!r}')
+        arguments.extend(f'{name}={getattr(self, name)!r}' for name, value in self.options.items() if getattr(self, name) != value)
+        return f'{type(self).__name__}({", ".join(arguments)})'
+
+    def check_options(self, names: Tuple[str, ...], purpose: str) -> None:
+        """
+        Raises an exception if one of the given options is set, because it can not be honoured in this way of using the policy.
+        """
+        for name in names:
+            if getattr(self, name) != self.options[name]:
+                raise UnsupportedOptionError(f'The "{name}" option cannot be used {purpose}.')
+
+    def check_function(self, function: Callable[..., Any]) -> None:
+        """
+        The checks that are made at decoration time, before anything is wrapped.
+        """
+        if self.is_factory_async and not iscoroutinefunction(function):
+            raise SetAsyncDefaultFactoryForSyncFunctionError('An async default factory can only be used with coroutine functions.')
+
+        if not iscoroutinefunction(function) and any(iscoroutinefunction(fallback_function) for fallback_function, _ in self.iterate_fallbacks()):
+            raise SetAsyncFallbackForSyncFunctionError('Coroutine functions can be used as fallbacks only for coroutine functions.')
+
+        if self.timeout is not None and self.timeout_executor is None and not (iscoroutinefunction(function) or isgeneratorfunction(function) or isasyncgenfunction(function)):
+            raise SetTimeoutForSyncFunctionError('A timeout for an ordinary function works only with an executor to run it in, for example, timeout_executor="thread".')
 
     def __call__(self, function: Callable[..., Any]) -> Callable[..., Any]:
-        @wraps(function)
+        """
+        The wrapper is specialized at decoration time: the logging code is left out entirely when there is nothing to log to. The closure keeps only the function and the policy, so that decorating a large number of functions stays cheap.
+        """
+        self.check_function(function)
+        callsite = CallSite(f'{function.__module__}.{function.__qualname__}', self) if self.is_extended else None
+
+        if isgeneratorfunction(function):
+            self.check_options(GENERATOR_UNSUPPORTED_OPTIONS, 'with generator functions')
+            return wraps(function)(self.wrap_generator_function(function, callsite))
+
+        elif isasyncgenfunction(function):
+            self.check_options(GENERATOR_UNSUPPORTED_OPTIONS, 'with async generator functions')
+            if self.default is not None or self.default_factory is not None:
+                raise SetDefaultReturnValueForAsyncGeneratorError('You cannot set a default value for an async generator function, since it cannot return anything.')
+            return wraps(function)(self.wrap_async_generator_function(function, callsite))
+
+        elif iscoroutinefunction(function):
+            if callsite is not None:
+                return wraps(function)(self.wrap_coroutine_function_with_extensions(function, callsite))
+            elif self.reporter.is_empty:
+                return wraps(function)(self.wrap_coroutine_function_silently(function))
+            return wraps(function)(self.wrap_coroutine_function(function))
+
+        if callsite is not None:
+            return wraps(function)(self.wrap_function_with_extensions(function, callsite))
+        elif self.reporter.is_empty:
+            return wraps(function)(self.wrap_function_silently(function))
+        return wraps(function)(self.wrap_function(function))
+
+    def handle_function_exception(self, exception: BaseException, callsite: Optional[CallSite], kind: str, name: str) -> bool:
+        """
+        Decides whether the exception raised by the wrapped function should be suppressed, counts it and writes it to the log.
+        """
+        remainder = self.resolve_exception(exception, self.is_suppressing(exception), callsite, kind, name)
+        if remainder is not None and remainder is not exception:
+            raise remainder from exception.__cause__
+        return remainder is None
+
+    def resolve_exception(self, exception: BaseException, is_suppressed: bool, callsite: Optional[CallSite], kind: str, name: str) -> Optional[BaseException]:
+        """
+        Reports the exception and returns what should be raised instead of it: None if it is suppressed, the exception itself if it is not, or the part of an exception group that is not suppressed.
+        """
+        matched, remainder = (exception, None) if is_suppressed else self.split_exception(exception)
+        if matched is not None:
+            self.report_exception(matched, True, callsite, kind, name, remainder is not None)
+        if remainder is not None:
+            self.report_exception(remainder, False, callsite, kind, name)
+        return remainder
+
+    def split_exception(self, exception: BaseException) -> Tuple[Optional[BaseException], Optional[BaseException]]:
+        """
+        Returns the part of the exception that should be suppressed and the rest. An exception group that is not suppressed as a whole is split in the same way as with "except*": the matching leaves (or nested groups) are suppressed, and only a group of the other ones is raised. If nothing or everything matches, the group itself is used instead of its copy made by "split()". Other exceptions are not split.
+
+        "split()" accepts only plain functions, and not bound methods, hence the lambda.
+        """
+        if not isinstance(exception, exception_group_types):
+            return None, exception
+
+        matched, remainder = exception.split(lambda x: self.is_suppressing(x))  # type: ignore[attr-defined]
+        if matched is None:
+            return None, exception
+        elif remainder is None:
+            return exception, None
+        return matched, remainder
+
+    def is_suppressing(self, exception: BaseException) -> bool:
+        return self.matcher.matches(exception) or (self.timeout is not None and isinstance(exception, FunctionTimeoutError))
+
+    def get_retry_delay(self, exception: BaseException, attempt: int, started_at: float) -> Optional[float]:
+        """
+        Returns the pause before the next attempt, or None if there will be no more attempts. The pause grows exponentially and is randomized with "full jitter", so that many clients do not retry in sync.
+        """
+        if attempt >= self.retries or (self.retry_matcher is not None and not self.retry_matcher(type(exception))):
+            return None
+
+        delay = random() * min(self.retry_max_delay, self.retry_delay * 2.0 ** attempt)
+        if self.retry_budget is not None and monotonic() - started_at + delay > self.retry_budget:
+            return None
+
+        return delay
+
+    def report_retry(self, exception: BaseException, callsite: CallSite, kind: str, name: str, attempt: int, delay: float) -> None:
+        if callsite.counters is not None:
+            shard = callsite.counters.shard()
+            shard.count_exception(type(exception), True)
+            shard.retries += 1
+
+        callsite.report(True, exception, RETRY_TEMPLATE, kind, name, type(exception).__name__, ExceptionDescription(exception), delay, attempt + 2, self.retries + 1)
+        self.release_traceback(exception, True)
+
+    def report_exception(self, exception: BaseException, is_suppressed: bool, callsite: Optional[CallSite], kind: str, name: str, is_shared: bool = False) -> None:
+        if callsite is not None and callsite.counters is not None:
+            callsite.counters.shard().count_exception(type(exception), is_suppressed)
+
+        template = FUNCTION_SUPPRESSED_TEMPLATE if is_suppressed else FUNCTION_NOT_SUPPRESSED_TEMPLATE
+        if callsite is not None:
+            callsite.report(is_suppressed, exception, template, kind, name, type(exception).__name__, ExceptionDescription(exception))
+        else:
+            self.reporter.report(template, kind, name, type(exception).__name__, ExceptionDescription(exception))
+
+        self.collect_exception(exception, is_suppressed)
+        self.release_traceback(exception, is_suppressed, is_shared)
+
+    def collect_exception(self, exception: BaseException, is_suppressed: bool) -> None:
+        if is_suppressed and self.collector is not None:
+            self.collector.add(exception)
+
+    def release_traceback(self, exception: BaseException, is_suppressed: bool, is_shared: bool = False) -> None:
+        """
+        Called when the exception has already been written to the log. Only suppressed exceptions are released, the others keep their tracebacks for the code above. The suppressed part of a split exception group shares its frames with the part that is raised ("is_shared"), and those frames are not cleared.
+        """
+        if is_suppressed and self.traceback != 'keep':
+            release_traceback(exception, self.traceback, is_shared)
+
+    def expose_caches(self, wrapper: Callable[..., Any], callsite: CallSite) -> None:
+        """
+        Statistics of the caches are available as methods of the decorated function, in the same way as "cache_info()" of "functools.lru_cache".
+        """
+        if callsite.failure_cache is not None:
+            wrapper.failure_cache_info = callsite.failure_cache.info  # type: ignore[attr-defined]
+        if callsite.stale_cache is not None:
+            wrapper.stale_cache_info = callsite.stale_cache.info  # type: ignore[attr-defined]
+
+    def get_default(self, exception: Optional[BaseException], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        """
+        The default factory is called only when the default value is actually needed. A factory with one positional parameter gets the exception (None if the function was not called at all), and a factory with more of them gets the arguments of the call too.
+        """
+        if self.default_factory is None:
+            return self.default
+        elif self.factory_arguments == 'all':
+            return self.default_factory(exception, *args, **kwargs)
+        elif self.factory_arguments == 'exception':
+            return self.default_factory(exception)
+        return self.default_factory()
+
+    def get_substitute(self, callsite: CallSite, key: Optional[Hashable], exception: Optional[BaseException], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        """
+        Returns what the decorated function returns instead of its own result: the stale result if there is one, otherwise the result of the first fallback that has not failed, otherwise the default value.
+        """
+        result = callsite.get_stale_result(key)
+        if result is not MISSING:
+            return result
+
+        for fallback_function, policy in self.iterate_fallbacks():
+            try:
+                return fallback_function(*args, **kwargs)
+            except BaseException as e:
+                if not policy.handle_function_exception(e, callsite if policy is self else None, 'fallback function', fallback_function.__name__):
+                    raise
+
+        return self.get_default(exception, args, kwargs)
+
+    async def get_substitute_async(self, callsite: CallSite, key: Optional[Hashable], exception: Optional[BaseException], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        result = callsite.get_stale_result(key)
+        if result is not MISSING:
+            return result
+
+        for fallback_function, policy in self.iterate_fallbacks():
+            try:
+                result = fallback_function(*args, **kwargs)
+                if isawaitable(result):
+                    result = await result
+                return result
+            except BaseException as e:
+                if not policy.handle_function_exception(e, callsite if policy is self else None, 'fallback function', fallback_function.__name__):
+                    raise
+
+        result = self.get_default(exception, args, kwargs)
+        if self.is_factory_async:
+            result = await result
+        return result
+
+    def iterate_fallbacks(self) -> Iterator[Tuple[Callable[..., Any], 'Wrapper']]:
+        """
+        A fallback without its own policy uses the policy of the decorated function.
+        """
+        for fallback in self.fallback:
+            if isinstance(fallback, tuple):
+                yield fallback
+            else:
+                yield fallback, self
+
+    @staticmethod
+    def get_factory_arguments(factory: Callable[..., Any]) -> str:
+        """
+        Returns what the factory should be called with: 'nothing', only the 'exception', or 'all' (the exception and the arguments of the call).
+        """
+        try:
+            parameters = signature(factory).parameters.values()
+        except (TypeError, ValueError):
+            return 'nothing'
+
+        positional = [parameter for parameter in parameters if parameter.kind in (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD)]
+
+        is_variadic = any(parameter.kind == Parameter.VAR_POSITIONAL for parameter in parameters)
+
+        if not is_variadic and not (positional and positional[0].default is Parameter.empty):
+            return 'nothing'
+        elif is_variadic or len(positional) > 1:
+            return 'all'
+        return 'exception'
+
+    def count_call(self, callsite: Optional[CallSite]) -> None:
+        if callsite is not None and callsite.counters is not None:
+            callsite.counters.shard().calls += 1
+
+    def wrap_function_silently(self, function: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return function(*args, **kwargs)
+            except BaseException as e:
+                is_suppressed = self.matcher.decisions.get(id(type(e)))
+                if is_suppressed is None:
+                    is_suppressed = self.matcher.learn(type(e))
+                if is_suppressed or (isinstance(e, exception_group_types) and self.handle_function_exception(e, None, 'function', function.__name__)):
+                    return self.default
+                raise
+
+        return wrapper
+
+    def wrap_function(self, function: Callable[..., Any]) -> Callable[..., Any]:
         def wrapper(*args: Any, **kwargs: Any) -> Any:
             try:
                 return function(*args, **kwargs)
-            except self.exceptions as e:
-                exception_massage = '' if not str(e) else f' ("{e}")'
-                self.logger.exception(f'When executing function "{function.__name__}", the exception "{type(e).__name__}"{exception_massage} was suppressed.')
-                return self.default
             except BaseException as e:
-                exception_massage = '' if not str(e) else f' ("{e}")'
-                self.logger.exception(f'When executing function "{function.__name__}", the exception "{type(e).__name__}"{exception_massage} was not suppressed.')
-                raise e
+                is_suppressed = self.matcher.decisions.get(id(type(e)))
+                if is_suppressed is None:
+                    is_suppressed = self.matcher.learn(type(e))
+                if is_suppressed:
+                    self.reporter.report(FUNCTION_SUPPRESSED_TEMPLATE, 'function', function.__name__, type(e).__name__, ExceptionDescription(e))
+                    return self.default
+                elif isinstance(e, exception_group_types):
+                    if self.handle_function_exception(e, None, 'function', function.__name__):
+                        return self.default
+                    raise
+                self.reporter.report(FUNCTION_NOT_SUPPRESSED_TEMPLATE, 'function', function.__name__, type(e).__name__, ExceptionDescription(e))
+                raise
+
+        return wrapper
 
-        @wraps(function)
-        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+    def wrap_coroutine_function_silently(self, function: Callable[..., Any]) -> Callable[..., Any]:
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
             try:
                 return await function(*args, **kwargs)
-            except self.exceptions as e:
-                exception_massage = '' if not str(e) else f' ("{e}")'
-                self.logger.exception(f'When executing coroutine function "{function.__name__}", the exception "{type(e).__name__}"{exception_massage} was suppressed.')
-                return self.default
             except BaseException as e:
-                exception_massage = '' if not str(e) else f' ("{e}")'
-                self.logger.exception(f'When executing coroutine function "{function.__name__}", the exception "{type(e).__name__}"{exception_massage} was not suppressed.')
-                raise e
+                is_suppressed = self.matcher.decisions.get(id(type(e)))
+                if is_suppressed is None:
+                    is_suppressed = self.matcher.learn(type(e))
+                if is_suppressed or (isinstance(e, exception_group_types) and self.handle_function_exception(e, None, 'coroutine function', function.__name__)):
+                    return self.default
+                raise
 
-        if iscoroutinefunction(function):
-            return async_wrapper
         return wrapper
 
-    def __enter__(self) -> 'Wrapper':
-        if self.default is not None:
-            raise SetDefaultReturnValueForContextManagerError('You cannot set a default value for the context manager. This is only possible for the decorator.')
+    def wrap_coroutine_function(self, function: Callable[..., Any]) -> Callable[..., Any]:
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return await function(*args, **kwargs)
+            except BaseException as e:
+                is_suppressed = self.matcher.decisions.get(id(type(e)))
+                if is_suppressed is None:
+                    is_suppressed = self.matcher.learn(type(e))
+                if is_suppressed:
+                    self.reporter.report(FUNCTION_SUPPRESSED_TEMPLATE, 'coroutine function', function.__name__, type(e).__name__, ExceptionDescription(e))
+                    return self.default
+                elif isinstance(e, exception_group_types):
+                    if self.handle_function_exception(e, None, 'coroutine function', function.__name__):
+                        return self.default
+                    raise
+                self.reporter.report(FUNCTION_NOT_SUPPRESSED_TEMPLATE, 'coroutine function', function.__name__, type(e).__name__, ExceptionDescription(e))
+                raise
+
+        return wrapper
+
+    def wrap_function_with_extensions(self, function: Callable[..., Any], callsite: CallSite) -> Callable[..., Any]:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            self.count_call(callsite)
+            key = callsite.make_key(args, kwargs)
+            if callsite.is_known_failure(key) or (callsite.breaker is not None and not callsite.breaker.allow()):
+                return self.get_substitute(callsite, key, None, args, kwargs)
+
+            if callsite.bulkhead is None:
+                return self.call_function(function, callsite, key, args, kwargs)
+            elif not callsite.bulkhead.acquire(self.max_wait):
+                return self.shed_call(function, callsite, key, 'function', args, kwargs)
+
+            try:
+                return self.call_function(function, callsite, key, args, kwargs)
+            finally:
+                callsite.bulkhead.release()
+
+        self.expose_caches(wrapper, callsite)
+        return wrapper
+
+    def wrap_coroutine_function_with_extensions(self, function: Callable[..., Any], callsite: CallSite) -> Callable[..., Any]:
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            self.count_call(callsite)
+            key = callsite.make_key(args, kwargs)
+            if callsite.is_known_failure(key) or (callsite.breaker is not None and not callsite.breaker.allow()):
+                return await self.get_substitute_async(callsite, key, None, args, kwargs)
+
+            if callsite.bulkhead is None:
+                return await self.call_coroutine_function(function, callsite, key, args, kwargs)
+            elif not await callsite.bulkhead.acquire_async(self.max_wait):
+                return await self.shed_call_async(function, callsite, key, 'coroutine function', args, kwargs)
+
+            try:
+                return await self.call_coroutine_function(function, callsite, key, args, kwargs)
+            finally:
+                callsite.bulkhead.release()
+
+        self.expose_caches(wrapper, callsite)
+        return wrapper
+
+    def call_function(self, function: Callable[..., Any], callsite: CallSite, key: Optional[Hashable], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        started_at = monotonic() if self.retries else 0.0
+        attempt = 0
+
+        while True:
+            try:
+                if self.timeout is None:
+                    result = function(*args, **kwargs)
+                else:
+                    result = call_with_timeout(get_executor(self.timeout_executor), self.timeout, function, args, kwargs)
+                break
+            except BaseException as e:
+                is_suppressed = self.is_suppressing(e)
+                delay = self.get_retry_delay(e, attempt, started_at) if is_suppressed and self.retries else None
+                if delay is None:
+                    remainder = self.resolve_exception(e, is_suppressed, callsite, 'function', function.__name__)
+                    callsite.record_failure(remainder is None)
+                    if remainder is None:
+                        callsite.remember_failure(key)
+                        return self.get_substitute(callsite, key, e, args, kwargs)
+                    elif remainder is not e:
+                        raise remainder from e.__cause__
+                    raise
+                self.report_retry(e, callsite, 'function', function.__name__, attempt, delay)
+
+            sleep(delay)
+            attempt += 1
 
+        if callsite.breaker is not None:
+            callsite.breaker.record_success()
+        callsite.remember_result(key, result)
+        return result
+
+    async def call_coroutine_function(self, function: Callable[..., Any], callsite: CallSite, key: Optional[Hashable], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        started_at = monotonic() if self.retries else 0.0
+        attempt = 0
+
+        while True:
+            try:
+                if self.timeout is None:
+                    result = await function(*args, **kwargs)
+                else:
+                    result = await await_with_timeout(function(*args, **kwargs), self.timeout, function.__name__)
+                break
+            except CancelledError:
+                raise
+            except BaseException as e:
+                is_suppressed = self.is_suppressing(e)
+                delay = self.get_retry_delay(e, attempt, started_at) if is_suppressed and self.retries else None
+                if delay is None:
+                    remainder = self.resolve_exception(e, is_suppressed, callsite, 'coroutine function', function.__name__)
+                    callsite.record_failure(remainder is None)
+                    if remainder is None:
+                        callsite.remember_failure(key)
+                        return await self.get_substitute_async(callsite, key, e, args, kwargs)
+                    elif remainder is not e:
+                        raise remainder from e.__cause__
+                    raise
+                self.report_retry(e, callsite, 'coroutine function', function.__name__, attempt, delay)
+
+            await async_sleep(delay)
+            attempt += 1
+
+        if callsite.breaker is not None:
+            callsite.breaker.record_success()
+        callsite.remember_result(key, result)
+        return result
+
+    def report_shed_call(self, function: Callable[..., Any], callsite: CallSite, kind: str) -> ConcurrencyLimitError:
+        """
+        A call that has not got a place is reported as a suppressed exception, raised here so that the log record has a traceback.
+        """
+        try:
+            raise ConcurrencyLimitError(f'The limit of {self.max_concurrency} concurrent calls of "{function.__name__}" has been reached.')
+        except ConcurrencyLimitError as e:
+            self.report_exception(e, True, callsite, kind, function.__name__)
+            return e
+
+    def shed_call(self, function: Callable[..., Any], callsite: CallSite, key: Optional[Hashable], kind: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        return self.get_substitute(callsite, key, self.report_shed_call(function, callsite, kind), args, kwargs)
+
+    async def shed_call_async(self, function: Callable[..., Any], callsite: CallSite, key: Optional[Hashable], kind: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        return await self.get_substitute_async(callsite, key, self.report_shed_call(function, callsite, kind), args, kwargs)
+
+    def wrap_generator_function(self, function: Callable[..., Any], callsite: Optional[CallSite]) -> Callable[..., Any]:
+        """
+        An exception suppressed during the iteration stops the stream, and the default value becomes the return value of the generator. The values passed with "send()" and "throw()", as well as "close()", get to the original generator through "yield from".
+        """
+        def wrapper(*args: Any, **kwargs: Any) -> Generator[Any, Any, Any]:
+            self.count_call(callsite)
+            try:
+                return (yield from function(*args, **kwargs))
+            except GeneratorExit:
+                raise
+            except BaseException as e:
+                if self.handle_function_exception(e, callsite, 'generator function', function.__name__):
+                    return self.get_default(e, args, kwargs)
+                raise
+
+        return wrapper
+
+    def wrap_async_generator_function(self, function: Callable[..., Any], callsite: Optional[CallSite]) -> Callable[..., Any]:
+        """
+        An exception suppressed during the iteration stops the stream. There is no "yield from" for async generators, so "asend()", "athrow()" and "aclose()" are forwarded by hand.
+        """
+        async def wrapper(*args: Any, **kwargs: Any) -> AsyncGenerator[Any, Any]:
+            self.count_call(callsite)
+            generator = function(*args, **kwargs)
+            try:
+                value = await generator.__anext__()
+                while True:
+                    try:
+                        sent = yield value
+                    except GeneratorExit:
+                        raise
+                    except BaseException as e:
+                        value = await generator.athrow(e)
+                    else:
+                        value = await generator.asend(sent)
+            except StopAsyncIteration:
+                return
+            except GeneratorExit:
+                raise
+            except BaseException as e:
+                if self.handle_function_exception(e, callsite, 'async generator function', function.__name__):
+                    return
+                raise
+            finally:
+                await generator.aclose()
+
+        return wrapper
+
+    def __enter__(self) -> 'Wrapper':
+        self.enter_context(sys._getframe(1) if self.is_extended else None)
         return self
 
     def __exit__(self, exception_type: Optional[Type[BaseException]], exception_value: Optional[BaseException], traceback: Optional[TracebackType]) -> bool:
-        if exception_type is not None:
-            exception_massage = '' if not str(exception_value) else f' ("{exception_value}")'
+        return self.exit_context(exception_type, exception_value, sys._getframe(1) if exception_type is not None and self.is_extended else None)
+
+    def enter_context(self, frame: Optional[FrameType]) -> None:
+        """
+        The frame is the one that contains the "with" statement. It is passed only if the policy is extended.
+        """
+        if self.default is not None or self.default_factory is not None:
+            raise SetDefaultReturnValueForContextManagerError('You cannot set a default value for the context manager. This is only possible for the decorator.')
 
-            for muted_exception_type in self.exceptions:
-                if issubclass(exception_type, muted_exception_type):
-                    self.logger.exception(f'The "{exception_type.__name__}"{exception_massage} exception was suppressed inside the context.')
-                    return True
-            self.logger.exception(f'The "{exception_type.__name__}"{exception_massage} exception was not suppressed inside the context.')
+        if frame is not None:
+            self.check_options(CONTEXT_MANAGER_UNSUPPORTED_OPTIONS, 'with the context manager')
+            self.count_call(self.get_context_callsite(frame))
 
+    def exit_context(self, exception_type: Optional[Type[BaseException]], exception_value: Optional[BaseException], frame: Optional[FrameType]) -> bool:
+        if exception_type is None:
+            return False
+
+        is_suppressed = self.matcher.matches(exception_value) if exception_value is not None else self.matcher(exception_type) is True
+        if is_suppressed or exception_value is None:
+            self.report_context_exception(exception_type, exception_value, is_suppressed, frame)
+            return is_suppressed
+
+        matched, remainder = self.split_exception(exception_value)
+        if matched is not None:
+            self.report_context_exception(type(matched), matched, True, frame, remainder is not None)
+        if remainder is None:
+            return True
+
+        self.report_context_exception(type(remainder), remainder, False, frame)
+        if remainder is not exception_value:
+            raise remainder from exception_value.__cause__
         return False
+
+    def report_context_exception(self, exception_type: Type[BaseException], exception_value: Optional[BaseException], is_suppressed: bool, frame: Optional[FrameType], is_shared: bool = False) -> None:
+        template = CONTEXT_SUPPRESSED_TEMPLATE if is_suppressed else CONTEXT_NOT_SUPPRESSED_TEMPLATE
+
+        if frame is not None:
+            callsite = self.get_context_callsite(frame)
+            if callsite.counters is not None:
+                callsite.counters.shard().count_exception(exception_type, is_suppressed)
+            callsite.report(is_suppressed, exception_value, template, exception_type.__name__, ExceptionDescription(exception_value))
+        else:
+            self.reporter.report(template, exception_type.__name__, ExceptionDescription(exception_value))
+
+        if exception_value is not None:
+            self.collect_exception(exception_value, is_suppressed)
+            self.release_traceback(exception_value, is_suppressed, is_shared)
+
+    def get_context_callsite(self, frame: FrameType) -> CallSite:
+        """
+        When a policy is used as a context manager, the call site is the function (or the module) whose code contains the "with" statement.
+        """
+        callsite = self.context_callsites.get(frame.f_code)
+        if callsite is None:
+            module_name = frame.f_globals.get('__name__', '<unknown>')
+            callsite = self.context_callsites.setdefault(frame.f_code, CallSite(f'{module_name}.{frame.f_code.co_name}', self))
+        return callsite
@@ -1,4 +1,7 @@
 import asyncio
+import logging
+import sys
+import time
 
 import pytest
 import full_match
@@ -27,6 +30,32 @@ def test_decorator_mode_passing_exceptions():
     asyncio.run(async_function())  # Silence.
 
 
+def test_decorator_mode_conditions():
+    import errno
+    import re
+
+    class HTTPError(Exception):
+        def __init__(self, status):
+            self.status = status
+
+    @escape(
+        escape.match(OSError, errno={errno.ENOENT, errno.EEXIST}),
+        escape.match(HTTPError, status=503),
+        escape.match(ConnectionError, message=re.compile('reset|refused')),
+        escape.match(ValueError, predicate=lambda exception: len(exception.args) > 1),
+        KeyError,
+    )
+    def function(exception):
+        raise exception
+
+    for exception in (FileNotFoundError(errno.ENOENT, 'kek'), HTTPError(503), ConnectionError('connection refused'), ValueError(1, 2), KeyError()):
+        assert function(exception) is None
+
+    for exception in (PermissionError(errno.EACCES, 'kek'), HTTPError(500), ConnectionError('kek'), ValueError(1)):
+        with pytest.raises(type(exception)):
+            function(exception)
+
+
 def test_decorator_mode_not_suppressing_exception():
     @escape()
     def function():
@@ -74,6 +103,37 @@ def test_decorator_mode_exception_and_ellipsis_separated_by_comma():
     function()
 
 
+@pytest.mark.skipif(sys.version_info < (3, 11), reason='TaskGroup appeared in Python 3.11.')
+def test_decorator_mode_exception_groups():
+    async def raise_value_error():
+        raise ValueError
+
+    async def raise_memory_error():
+        raise MemoryError
+
+    @escape(ValueError)
+    async def function():
+        async with asyncio.TaskGroup() as group:
+            group.create_task(raise_value_error())
+            group.create_task(raise_memory_error())
+
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        asyncio.run(function())
+
+    assert exception_info.value.message == 'unhandled errors in a TaskGroup'
+    assert [type(x) for x in exception_info.value.exceptions] == [MemoryError]
+
+
+def test_decorator_mode_generator():
+    @escape(ValueError, default='oh!')
+    def generator():
+        yield 1
+        yield 2
+        raise ValueError
+
+    assert list(generator()) == [1, 2]
+
+
 def test_context_manager_basic_examples():
     with escape(ValueError):
         raise ValueError
@@ -89,3 +149,208 @@ def test_context_manager_attempt_to_set_default_value():
     with pytest.raises(escape.errors.SetDefaultReturnValueForContextManagerError, match=full_match('You cannot set a default value for the context manager. This is only possible for the decorator.')):
         with escape(default='some value'):
             ...
+
+
+def test_logging_traceback_summary():
+    @escape(ValueError, default_factory=lambda exception: exception, traceback='summary')
+    def function():
+        big_buffer = bytearray(10_000_000)  # noqa: F841
+        raise ValueError
+
+    exception = function()
+
+    assert exception.__traceback__ is None
+    assert exception.traceback_summary[-1].name == 'function'
+
+
+def test_policies():
+    logger = logging.getLogger('logger_name')
+
+    policy = escape.policy(ValueError, ..., logger=logger)
+
+    @policy
+    def function():
+        raise ValueError
+
+    for number in range(1000):
+        with policy:
+            raise ValueError
+
+    function()
+
+    assert escape(ValueError, logger=logger) is escape.policy(ValueError, logger=logger)
+
+
+def test_circuit_breaker():
+    calls = []
+
+    @escape(ConnectionError, default=[], breaker_threshold=5, breaker_window=60, breaker_cooldown=30)
+    def fetch_recommendations(user_id):
+        calls.append(user_id)
+        raise ConnectionError
+
+    for user_id in range(10):
+        assert fetch_recommendations(user_id) == []
+
+    assert calls == [0, 1, 2, 3, 4]
+
+
+def test_failure_cache():
+    users = {1: 'Ivan'}
+    calls = []
+
+    @escape(KeyError, default='unknown', failure_cache=60)
+    def get_user_name(user_id):
+        calls.append(user_id)
+        return users[user_id]
+
+    assert str(get_user_name.failure_cache_info()) == 'CacheInfo(hits=0, misses=0, maxsize=1024, currsize=0)'
+
+    assert get_user_name(2) == 'unknown'
+    assert get_user_name(2) == 'unknown'
+    assert get_user_name(1) == 'Ivan'
+    assert calls == [2, 1]
+
+
+def test_stale_cache():
+    prices = {1: 100}
+
+    @escape(ConnectionError, default=None, stale_cache=300)
+    async def get_price(product_id):
+        if product_id not in prices:
+            raise ConnectionError
+        return prices[product_id]
+
+    assert asyncio.run(get_price(1)) == 100
+    prices.clear()
+    assert asyncio.run(get_price(1)) == 100
+    assert asyncio.run(get_price(2)) is None
+
+
+def test_decorator_mode_default_factory():
+    @escape(ValueError, default_factory=dict)
+    def function():
+        raise ValueError
+
+    assert function() == {}
+    assert function() is not function()
+
+    async def get_from_cache(exception, key):
+        return f'cached {key}'
+
+    @escape(ConnectionError, default_factory=get_from_cache)
+    async def get(key):
+        raise ConnectionError
+
+    assert asyncio.run(get('kek')) == 'cached kek'
+
+
+def test_batch_processing():
+    assert list(escape.map(int, ['1', '2', 'three'], ValueError, default=0)) == [1, 2, 0]
+
+
+def test_awaiting_many_coroutines():
+    async def fetch(number):
+        await asyncio.sleep(0.01 * number)
+        if number == 2:
+            raise ConnectionError
+        return number
+
+    async def main():
+        results = await escape.gather(
+            fetch(1),
+            fetch(2),
+            fetch(3),
+            exceptions=(ConnectionError, TimeoutError),
+            default=None,
+            limit=2,
+            logger=logging.getLogger('kek'),
+        )
+        streamed = [result async for result in escape.as_completed(fetch(1), fetch(2), exceptions=ConnectionError)]
+        return results, streamed
+
+    assert asyncio.run(main()) == ([1, None, 3], [1, None])
+
+
+def test_timeouts():
+    @escape(ConnectionError, default=None, timeout=0.01)
+    async def fetch(url):
+        await asyncio.sleep(1)
+
+    @escape(ConnectionError, default=None, timeout=0.01, timeout_executor='thread')
+    def fetch_in_thread(url):
+        time.sleep(0.1)
+
+    assert asyncio.run(fetch('kek')) is None
+    assert fetch_in_thread('kek') is None
+
+
+def test_hedging():
+    delays = [1, 0]
+
+    @escape.hedge(ConnectionError, attempts=3, delay=0.05, default=None)
+    async def get_user(user_id):
+        await asyncio.sleep(delays.pop(0))
+        return user_id
+
+    assert asyncio.run(get_user(1)) == 1
+
+
+def test_load_shedding():
+    @escape(ConnectionError, default=None, max_concurrency=10)
+    async def fetch(url):
+        await asyncio.sleep(0.01)
+        return url
+
+    async def main():
+        return await asyncio.gather(*(fetch(number) for number in range(11)))
+
+    assert asyncio.run(main()) == list(range(10)) + [None]
+
+
+def test_retries():
+    outcomes = [ConnectionError, 'ok']
+
+    @escape(ConnectionError, TimeoutError, default=None, retries=3, retry_delay=0.001, retry_max_delay=2, retry_budget=5, retry_on=(ConnectionError,))
+    def fetch(url):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, type):
+            raise outcome
+        return outcome
+
+    assert fetch('kek') == 'ok'
+
+
+def test_decorator_mode_fallback():
+    def get_from_cache(product_id):
+        raise KeyError(product_id)
+
+    def estimate(product_id):
+        return 100
+
+    @escape(ConnectionError, default=None, fallback=[(get_from_cache, escape.policy(KeyError)), estimate])
+    def get_price(product_id):
+        raise ConnectionError
+
+    assert get_price(1) == 100
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason='ExceptionGroup appeared in Python 3.11.')
+def test_collecting_exceptions():
+    def process(item):
+        return int(item)
+
+    errors = escape.collect(ValueError, size=100, dedup=True)
+
+    for item in ['1', 'kek', '2', 'kek']:
+        with errors:
+            process(item)
+
+    assert errors.total == 2
+    assert errors.counts == [2]
+
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        if errors:
+            raise errors.group('Some items were not processed')
+
+    assert exception_info.value.message == 'Some items were not processed'
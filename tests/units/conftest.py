@@ -0,0 +1,22 @@
+import pytest
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def make_clock(monkeypatch):
+    """
+    Replaces "monotonic()" in the given module with a clock that is moved by hand, by changing its "now" attribute.
+    """
+    def make(module):
+        clock = Clock()
+        monkeypatch.setattr(module, 'monotonic', clock)
+        return clock
+
+    return make
@@ -0,0 +1,132 @@
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape import aggregator as aggregator_module
+from escape.aggregator import Aggregator
+from escape.callsite import flush_callsites
+
+
+@pytest.fixture
+def clock(make_clock):
+    return make_clock(aggregator_module)
+
+
+def test_repeats_inside_window_are_collapsed(clock):
+    aggregator = Aggregator(10)
+    fingerprint = (True, 'KeyError', "'x'")
+
+    assert aggregator.register(fingerprint) == (True, [])
+    assert aggregator.register(fingerprint) == (False, [])
+    assert aggregator.register(fingerprint) == (False, [])
+
+    clock.now += 10
+
+    assert aggregator.register(fingerprint) == (True, [(fingerprint, 2, 10.0)])
+
+
+def test_expired_windows_are_swept_by_other_fingerprints(clock):
+    aggregator = Aggregator(10)
+    first = (True, 'KeyError', "'x'")
+    second = (True, 'KeyError', "'y'")
+
+    aggregator.register(first)
+    aggregator.register(first)
+
+    clock.now += 11
+
+    assert aggregator.register(second) == (True, [(first, 1, 10.0)])
+    assert list(aggregator.entries) == [second]
+
+
+def test_span_of_late_aggregate_is_capped_by_window(clock):
+    aggregator = Aggregator(10)
+    fingerprint = (True, 'KeyError', "'x'")
+
+    aggregator.register(fingerprint)
+    aggregator.register(fingerprint)
+
+    clock.now += 3600
+
+    assert aggregator.register(fingerprint) == (True, [(fingerprint, 1, 10.0)])
+
+
+def test_lru_is_bounded(clock):
+    aggregator = Aggregator(10, limit=2)
+    fingerprints = [(True, 'KeyError', str(index)) for index in range(3)]
+
+    aggregator.register(fingerprints[0])
+    aggregator.register(fingerprints[0])
+    aggregator.register(fingerprints[1])
+
+    clock.now += 1
+
+    assert aggregator.register(fingerprints[2]) == (True, [(fingerprints[0], 1, 1.0)])
+    assert len(aggregator.entries) == 2
+
+
+def test_flush(clock):
+    aggregator = Aggregator(10)
+    fingerprint = (False, 'ValueError', '')
+
+    aggregator.register(fingerprint)
+    aggregator.register(fingerprint)
+    clock.now += 3
+
+    assert aggregator.flush() == [(fingerprint, 1, 3.0)]
+    assert aggregator.flush() == []
+
+
+def test_aggregated_logging_in_decorator(clock):
+    logger = MemoryLogger()
+
+    @escape(KeyError, logger=logger, log_aggregation=10)
+    def function(key):
+        return {}[key]
+
+    for _ in range(100):
+        function('x')
+    function('y')
+
+    assert len(logger.data.exception) == 2
+
+    clock.now += 10
+    function('x')
+
+    assert len(logger.data.exception) == 3
+    assert len(logger.data.error) == 1
+    assert logger.data.error[0].message == f'The exception "KeyError" ("\'x\'") was suppressed 99 more times within 10.0 seconds in "{__name__}.test_aggregated_logging_in_decorator.<locals>.function".'
+
+
+def test_aggregated_logging_in_context_manager(clock):
+    logger = MemoryLogger()
+
+    for _ in range(5):
+        with escape(ValueError, logger=logger, log_aggregation=10):
+            raise ValueError
+
+    flush_callsites()
+
+    assert len(logger.data.exception) == 1
+    assert logger.data.error[0].message == f'The exception "ValueError" was suppressed 4 more times within 0.0 seconds in "{__name__}.test_aggregated_logging_in_context_manager".'
+
+
+def test_not_suppressed_exceptions_are_aggregated_separately(clock):
+    logger = MemoryLogger()
+
+    @escape(ValueError, logger=logger, log_aggregation=10)
+    def function(exception_type):
+        raise exception_type('kek')
+
+    for _ in range(3):
+        function(ValueError)
+        with pytest.raises(KeyError):
+            function(KeyError)
+
+    assert len(logger.data.exception) == 2
+
+
+def test_wrong_aggregation_window():
+    with pytest.raises(ValueError, match=full_match('The aggregation window for logging must be a positive number of seconds.')):
+        escape(ValueError, log_aggregation=0)
@@ -0,0 +1,208 @@
+import asyncio
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape.errors import UnsupportedOptionError
+
+
+async def success(number, delay=0):
+    await asyncio.sleep(delay)
+    return number
+
+
+async def failure(exception, delay=0):
+    await asyncio.sleep(delay)
+    raise exception
+
+
+def test_gather_without_exceptions():
+    assert asyncio.run(escape.gather(success(1), success(2), success(3))) == [1, 2, 3]
+
+
+def test_gather_without_awaitables():
+    assert asyncio.run(escape.gather()) == []
+
+
+def test_gather_substitutes_default_value_for_suppressed_exceptions():
+    async def main():
+        return await escape.gather(success(1, 0.02), failure(ValueError()), success(3), exceptions=ValueError, default='default')
+
+    assert asyncio.run(main()) == [1, 'default', 3]
+
+
+def test_gather_suppresses_ellipsis_exceptions_by_default():
+    assert asyncio.run(escape.gather(failure(ValueError()), failure(KeyError()))) == [None, None]
+
+
+def test_gather_with_several_types_of_exceptions():
+    assert asyncio.run(escape.gather(failure(ValueError()), failure(KeyError()), exceptions=(ValueError, KeyError), default=1)) == [1, 1]
+
+
+def test_gather_with_default_factory():
+    async def factory(exception):
+        return str(exception)
+
+    assert asyncio.run(escape.gather(failure(ValueError('kek')), exceptions=ValueError, default_factory=factory)) == ['kek']
+
+
+def test_not_suppressed_exception_cancels_other_awaitables():
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(10)
+        finished.append(True)
+
+    async def main():
+        task = asyncio.ensure_future(slow())
+        with pytest.raises(KeyError):
+            await escape.gather(task, failure(KeyError(), 0.01), exceptions=ValueError)
+        return task
+
+    task = asyncio.run(main())
+
+    assert task.cancelled()
+    assert finished == []
+
+
+def test_cancellation_of_caller_is_not_suppressed():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        task = asyncio.ensure_future(escape.gather(slow(), slow(), exceptions=...))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+    assert cancelled == [True, True]
+
+
+def test_gather_with_limit():
+    running = []
+    maximum = []
+
+    async def function(number):
+        running.append(number)
+        maximum.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(number)
+        if number % 2:
+            raise ValueError
+        return number
+
+    result = asyncio.run(escape.gather(*(function(number) for number in range(10)), exceptions=ValueError, limit=3))
+
+    assert result == [0, None, 2, None, 4, None, 6, None, 8, None]
+    assert max(maximum) == 3
+
+
+def test_gather_writes_to_log():
+    logger = MemoryLogger()
+
+    asyncio.run(escape.gather(failure(ValueError('kek')), exceptions=ValueError, logger=logger))
+
+    assert len(logger.data.exception) == 1
+    assert logger.data.exception[0].message == 'When executing coroutine "failure", the exception "ValueError" ("kek") was suppressed.'
+
+
+def test_gather_stats_are_collected_for_calling_function():
+    async def caller_of_gather():
+        return await escape.gather(success(1), failure(ValueError()), exceptions=ValueError, stats=True)
+
+    asyncio.run(caller_of_gather())
+
+    assert escape.stats()[f'{__name__}.caller_of_gather'] == {'calls': 2, 'suppressed': 1, 'reraised': 0, 'retries': 0, 'exceptions': {'ValueError': 1}}
+
+
+def test_as_completed():
+    async def main():
+        return [result async for result in escape.as_completed(success(1, 0.03), failure(ValueError(), 0.01), success(3, 0.02), exceptions=ValueError, default=2)]
+
+    assert asyncio.run(main()) == [2, 3, 1]
+
+
+def test_as_completed_raises_not_suppressed_exception():
+    async def main():
+        results = []
+        with pytest.raises(KeyError):
+            async for result in escape.as_completed(success(1), failure(KeyError(), 0.01), success(3, 10), exceptions=ValueError):
+                results.append(result)
+        return results
+
+    assert asyncio.run(main()) == [1]
+
+
+def test_as_completed_cancels_rest_when_stopped_early():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        iterator = escape.as_completed(success(1), slow(), exceptions=ValueError)
+        async for result in iterator:
+            break
+        await iterator.aclose()
+        return result
+
+    assert asyncio.run(main()) == 1
+    assert cancelled == [True]
+
+
+@pytest.mark.parametrize(
+    ['function_name'],
+    [
+        ('gather',),
+        ('as_completed',),
+    ],
+)
+def test_wrong_arguments_for_awaiting(function_name):
+    function = getattr(escape, function_name)
+
+    with pytest.raises(ValueError, match=full_match('Only awaitable objects can be awaited.')):
+        function(1, 2)
+
+    with pytest.raises(ValueError, match=full_match('The limit of concurrency must be a positive number.')):
+        function(limit=0)
+
+
+@pytest.mark.parametrize(
+    ['function_name'],
+    [
+        ('gather',),
+        ('as_completed',),
+    ],
+)
+@pytest.mark.parametrize(
+    ['arguments', 'name'],
+    [
+        ({'fallback': [abs]}, 'fallback'),
+        ({'stale_cache': 60}, 'stale_cache'),
+        ({'failure_cache': 60}, 'failure_cache'),
+        ({'retries': 2}, 'retries'),
+        ({'timeout': 1}, 'timeout'),
+        ({'breaker_threshold': 5}, 'breaker_threshold'),
+        ({'max_concurrency': 1}, 'max_concurrency'),
+    ],
+)
+def test_options_not_supported_for_awaiting(function_name, arguments, name):
+    function = getattr(escape, function_name)
+
+    with pytest.raises(UnsupportedOptionError, match=full_match(f'The "{name}" option cannot be used with escape.{function_name}().')):
+        function(exceptions=ValueError, **arguments)
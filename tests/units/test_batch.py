@@ -0,0 +1,184 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import count
+from multiprocessing import get_context
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape.errors import UnsupportedOptionError, SetAsyncDefaultFactoryForSyncFunctionError, SetAsyncFallbackForSyncFunctionError, SetTimeoutForSyncFunctionError
+
+
+def function(number):
+    if number % 3 == 0:
+        raise ValueError(number)
+    return number * 2
+
+
+def function_with_key_error(number):
+    raise KeyError(number)
+
+
+EXPECTED = [None, 2, 4, None, 8, 10, None, 14, 16, None]
+
+
+@pytest.mark.parametrize(
+    ['arguments'],
+    [
+        ({},),
+        ({'executor': 'thread'},),
+        ({'executor': 'thread', 'chunksize': 3},),
+        ({'executor': 'thread', 'workers': 1},),
+        ({'executor': 'process', 'workers': 2, 'chunksize': 4},),
+    ],
+)
+def test_ordered_map(arguments):
+    assert list(escape.map(function, range(10), ValueError, **arguments)) == EXPECTED
+
+
+@pytest.mark.parametrize(
+    ['executor'],
+    [
+        ('thread',),
+        ('process',),
+    ],
+)
+def test_unordered_map(executor):
+    results = list(escape.map(function, range(10), ValueError, default=-1, executor=executor, ordered=False, chunksize=2))
+
+    assert sorted(results) == sorted(-1 if x is None else x for x in EXPECTED)
+
+
+@pytest.mark.parametrize(
+    ['executor'],
+    [
+        (None,),
+        ('thread',),
+        ('process',),
+    ],
+)
+def test_not_suppressed_exception_is_raised_from_map(executor):
+    with pytest.raises(KeyError):
+        list(escape.map(function_with_key_error, range(10), ValueError, executor=executor))
+
+
+@pytest.mark.parametrize(
+    ['executor'],
+    [
+        (None,),
+        ('thread',),
+        ('process',),
+    ],
+)
+def test_map_writes_suppressed_exceptions_to_log(executor):
+    logger = MemoryLogger()
+
+    list(escape.map(function, range(10), ValueError, logger=logger, executor=executor))
+
+    assert len(logger.data.exception) == 4
+    assert sorted(record.message for record in logger.data.exception) == sorted(f'When executing function "function", the exception "ValueError" ("{number}") was suppressed.' for number in (0, 3, 6, 9))
+
+
+def test_map_with_default_factory():
+    assert list(escape.map(function, range(4), ValueError, default_factory=lambda exception, number: -number, executor='process')) == [0, 2, 4, -3]
+
+
+@pytest.mark.parametrize(
+    ['executor'],
+    [
+        (None,),
+        ('thread',),
+        ('process',),
+    ],
+)
+def test_async_default_factory_is_rejected_before_iteration(executor):
+    async def factory():
+        pass
+
+    with pytest.raises(SetAsyncDefaultFactoryForSyncFunctionError, match=full_match('An async default factory can only be used with coroutine functions.')):
+        escape.map(function, range(4), ValueError, default_factory=factory, executor=executor)
+
+
+def test_wrong_policy_for_function_is_rejected_before_iteration():
+    async def fallback(number):
+        pass
+
+    with pytest.raises(SetAsyncFallbackForSyncFunctionError):
+        escape.map(function, range(4), ValueError, fallback=[fallback], executor='thread')
+
+    with pytest.raises(SetTimeoutForSyncFunctionError):
+        escape.map(function, range(4), ValueError, timeout=1)
+
+
+def test_map_is_lazy():
+    consumed = []
+
+    def numbers():
+        for number in count():
+            consumed.append(number)
+            yield number
+
+    results = escape.map(function, numbers(), ValueError, executor='thread', workers=2)
+    assert [next(results) for _ in range(3)] == [None, 2, 4]
+    results.close()
+
+    assert len(consumed) <= 3 + 2 * 2
+
+
+def test_map_with_own_executor():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert list(escape.map(function, range(10), ValueError, executor=executor)) == EXPECTED
+        assert list(escape.map(function, range(10), ValueError, executor=executor)) == EXPECTED
+
+
+def test_map_with_stats():
+    list(escape.map(function, range(10), ValueError, stats='test_map_with_stats', executor='process'))
+
+    assert escape.stats()['test_map_with_stats'] == {'calls': 10, 'suppressed': 4, 'reraised': 0, 'retries': 0, 'exceptions': {'ValueError': 4}}
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'message'],
+    [
+        ({'executor': 'fiber'}, 'The executor must be None, "thread", "process" or an instance of concurrent.futures.Executor.'),
+        ({'workers': 0}, 'The number of workers must be a positive number.'),
+        ({'chunksize': 0}, 'The size of a chunk must be a positive number.'),
+    ],
+)
+def test_wrong_map_arguments(arguments, message):
+    with pytest.raises(ValueError, match=full_match(message)):
+        escape.map(function, range(10), ValueError, **arguments)
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'name'],
+    [
+        ({'fallback': [abs]}, 'fallback'),
+        ({'stale_cache': 60}, 'stale_cache'),
+        ({'failure_cache': 60}, 'failure_cache'),
+        ({'retries': 2}, 'retries'),
+        ({'timeout': 1}, 'timeout'),
+        ({'breaker_threshold': 5}, 'breaker_threshold'),
+        ({'max_concurrency': 1}, 'max_concurrency'),
+    ],
+)
+def test_options_not_supported_by_process_pool(arguments, name):
+    with pytest.raises(UnsupportedOptionError, match=full_match(f'The "{name}" option cannot be used with a process pool.')):
+        escape.map(function, range(10), ValueError, executor='process', **arguments)
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        with pytest.raises(UnsupportedOptionError):
+            escape.map(function, range(10), ValueError, executor=executor, **arguments)
+
+
+def test_fallback_with_thread_pool():
+    assert list(escape.map(function, range(4), ValueError, default='default', fallback=[lambda number: 'fallback'], executor='thread')) == ['fallback', 2, 4, 'fallback']
+
+
+def test_map_with_coroutine_function():
+    async def coroutine_function(number):
+        pass
+
+    with pytest.raises(ValueError, match=full_match('Only ordinary functions can be used with escape.map().')):
+        escape.map(coroutine_function, range(10), ValueError)
@@ -0,0 +1,275 @@
+import asyncio
+from threading import Thread
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape import breaker as breaker_module
+from escape.breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from escape.errors import UnsupportedOptionError
+
+
+@pytest.fixture
+def clock(make_clock):
+    return make_clock(breaker_module)
+
+
+def test_breaker_opens_after_threshold(clock):
+    breaker = CircuitBreaker(3, 10.0, 5.0)
+
+    assert breaker.record_failure() is False
+    assert breaker.record_failure() is False
+    assert breaker.allow()
+    assert breaker.record_failure() is True
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_old_failures_leave_the_window(clock):
+    breaker = CircuitBreaker(3, 10.0, 5.0)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 11
+    assert breaker.record_failure() is False
+
+    assert breaker.state == CLOSED
+    assert len(breaker.failures) == 1
+
+
+def test_half_open_lets_only_one_probe(clock):
+    breaker = CircuitBreaker(1, 10.0, 5.0)
+    breaker.record_failure()
+
+    clock.now += 4.9
+    assert not breaker.allow()
+
+    clock.now += 0.1
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes_breaker(clock):
+    breaker = CircuitBreaker(2, 10.0, 5.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 5
+
+    assert breaker.allow()
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+    assert breaker.record_failure() is False
+
+
+def test_failed_probe_opens_breaker_again(clock):
+    breaker = CircuitBreaker(2, 10.0, 5.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 5
+
+    assert breaker.allow()
+    assert breaker.record_failure() is True
+
+    assert breaker.state == OPEN
+    clock.now += 4.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.allow()
+
+
+def test_unexpected_failure_of_probe_opens_breaker_again(clock):
+    breaker = CircuitBreaker(1, 10.0, 5.0)
+    breaker.record_failure()
+    clock.now += 5
+    assert breaker.allow()
+
+    breaker.record_unexpected_failure()
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_lost_probe_is_replaced_after_cooldown(clock):
+    breaker = CircuitBreaker(1, 10.0, 5.0)
+    breaker.record_failure()
+    clock.now += 5
+    assert breaker.allow()
+
+    clock.now += 4.9
+    assert not breaker.allow()
+
+    clock.now += 0.1
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+
+def test_unexpected_failure_in_closed_state_is_ignored(clock):
+    breaker = CircuitBreaker(1, 10.0, 5.0)
+
+    breaker.record_unexpected_failure()
+
+    assert breaker.state == CLOSED
+    assert not breaker.failures
+
+
+def test_decorated_function_is_not_called_while_breaker_is_open(clock):
+    calls = []
+
+    @escape(ValueError, default='default', breaker_threshold=2, breaker_cooldown=5)
+    def function(number):
+        calls.append(number)
+        if number < 0:
+            raise ValueError
+        return number
+
+    assert function(-1) == 'default'
+    assert function(-2) == 'default'
+    assert function(3) == 'default'
+    assert calls == [-1, -2]
+
+    clock.now += 5
+    assert function(4) == 4
+    assert function(5) == 5
+    assert calls == [-1, -2, 4, 5]
+
+
+def test_decorated_coroutine_function_is_not_called_while_breaker_is_open(clock):
+    calls = []
+
+    @escape(ValueError, default='default', breaker_threshold=1, breaker_cooldown=5)
+    async def function(number):
+        calls.append(number)
+        if number < 0:
+            raise ValueError
+        return number
+
+    assert asyncio.run(function(-1)) == 'default'
+    assert asyncio.run(function(2)) == 'default'
+    assert calls == [-1]
+
+    clock.now += 5
+    assert asyncio.run(function(-3)) == 'default'
+    assert asyncio.run(function(4)) == 'default'
+    assert calls == [-1, -3]
+
+    clock.now += 5
+    assert asyncio.run(function(5)) == 5
+
+
+def test_breaker_is_not_stuck_after_probe_cancelled_during_retry_sleep(clock):
+    calls = []
+
+    @escape(ValueError, KeyError, default='default', breaker_threshold=1, breaker_cooldown=5, retries=1, retry_delay=100, retry_on=(KeyError,))
+    async def function(key):
+        calls.append(key)
+        if key is None:
+            raise ValueError
+        return {'good': 'result'}[key]
+
+    async def cancelled_probe():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(function('bad'), 0.01)
+
+    assert asyncio.run(function(None)) == 'default'
+    assert calls == [None]
+
+    clock.now += 5
+    asyncio.run(cancelled_probe())
+    assert calls == [None, 'bad']
+    assert asyncio.run(function('good')) == 'default'
+
+    clock.now += 5
+    assert asyncio.run(function('good')) == 'result'
+    assert calls == [None, 'bad', 'good']
+
+
+def test_breaker_is_rejected_where_code_can_not_be_skipped():
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "breaker_threshold" option cannot be used with the context manager.')):
+        with escape(ValueError, breaker_threshold=1):
+            pass
+
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "breaker_threshold" option cannot be used with generator functions.')):
+        @escape(ValueError, breaker_threshold=1)
+        def function():
+            yield 1
+
+
+def test_not_suppressed_exceptions_do_not_open_breaker(clock):
+    @escape(ValueError, breaker_threshold=1)
+    def function():
+        raise KeyError
+
+    for _ in range(10):
+        with pytest.raises(KeyError):
+            function()
+
+
+def test_each_function_has_its_own_breaker(clock):
+    policy = escape.policy(ValueError, default=1, breaker_threshold=1)
+
+    @policy
+    def first():
+        raise ValueError
+
+    @policy
+    def second():
+        return 2
+
+    assert first() == 1
+    assert second() == 2
+
+
+def test_opening_of_breaker_is_logged(clock):
+    logger = MemoryLogger()
+
+    @escape(ValueError, logger=logger, breaker_threshold=2, breaker_cooldown=30)
+    def function():
+        raise ValueError
+
+    for _ in range(5):
+        function()
+
+    assert len(logger.data.exception) == 2
+    assert len(logger.data.warning) == 1
+    assert logger.data.warning[0].message == f'The circuit breaker of "{function.__module__}.{function.__qualname__}" has opened, the default value will be returned without calling the function for 30.0 seconds.'
+
+
+def test_breaker_in_threads():
+    breaker = CircuitBreaker(1000, 60.0, 60.0)
+    opened = []
+
+    def worker():
+        for _ in range(100):
+            if breaker.record_failure():
+                opened.append(True)
+
+    threads = [Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert opened == [True]
+    assert breaker.state == OPEN
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'message'],
+    [
+        ({'breaker_threshold': 0}, 'The threshold of the circuit breaker must be a positive number of failures.'),
+        ({'breaker_threshold': -1}, 'The threshold of the circuit breaker must be a positive number of failures.'),
+        ({'breaker_threshold': 1, 'breaker_window': 0}, 'The window and the cooldown of the circuit breaker must be positive numbers of seconds.'),
+        ({'breaker_threshold': 1, 'breaker_cooldown': -1}, 'The window and the cooldown of the circuit breaker must be positive numbers of seconds.'),
+    ],
+)
+def test_wrong_breaker_options(arguments, message):
+    with pytest.raises(ValueError, match=full_match(message)):
+        escape.policy(ValueError, **arguments)
@@ -0,0 +1,216 @@
+import asyncio
+import time
+from threading import Thread, Event
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape.bulkhead import Bulkhead
+from escape.errors import UnsupportedOptionError
+
+
+def test_bulkhead_without_waiting():
+    bulkhead = Bulkhead(2, None)
+
+    assert bulkhead.acquire(None)
+    assert bulkhead.acquire(None)
+    assert not bulkhead.acquire(None)
+
+    bulkhead.release()
+    assert bulkhead.acquire(None)
+
+
+def test_waiting_for_free_place_with_timeout():
+    bulkhead = Bulkhead(1, None)
+    bulkhead.acquire(None)
+
+    started = time.monotonic()
+    assert not bulkhead.acquire(0.05)
+    assert time.monotonic() - started >= 0.05
+    assert not bulkhead.waiters
+
+
+def test_released_place_is_handed_over_to_waiter():
+    bulkhead = Bulkhead(1, None)
+    bulkhead.acquire(None)
+    results = []
+
+    thread = Thread(target=lambda: results.append(bulkhead.acquire(5)))
+    thread.start()
+    while not bulkhead.waiters:
+        time.sleep(0.001)
+
+    bulkhead.release()
+    thread.join()
+
+    assert results == [True]
+    assert bulkhead.active == 1
+    assert not bulkhead.try_acquire()
+
+
+def test_queue_of_waiters_is_bounded():
+    bulkhead = Bulkhead(1, 1)
+    bulkhead.acquire(None)
+
+    thread = Thread(target=lambda: bulkhead.acquire(0.2))
+    thread.start()
+    while not bulkhead.waiters:
+        time.sleep(0.001)
+
+    started = time.monotonic()
+    assert not bulkhead.acquire(5)
+    assert time.monotonic() - started < 1
+
+    thread.join()
+
+
+def test_async_waiting_for_free_place():
+    bulkhead = Bulkhead(1, None)
+
+    async def main():
+        assert await bulkhead.acquire_async(None)
+        assert not await bulkhead.acquire_async(0.01)
+
+        waiting = asyncio.ensure_future(bulkhead.acquire_async(5))
+        await asyncio.sleep(0.01)
+        bulkhead.release()
+        assert await waiting
+
+    asyncio.run(main())
+
+    assert bulkhead.active == 1
+
+
+def test_cancelled_async_waiter_leaves_queue():
+    bulkhead = Bulkhead(1, None)
+    bulkhead.acquire(None)
+
+    async def main():
+        waiting = asyncio.ensure_future(bulkhead.acquire_async(5))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(main())
+
+    assert not bulkhead.waiters
+    bulkhead.release()
+    assert bulkhead.active == 0
+
+
+def test_excess_calls_are_shed_with_default():
+    logger = MemoryLogger()
+    entered = Event()
+    release = Event()
+
+    @escape(ValueError, default='shed', max_concurrency=1, logger=logger)
+    def function():
+        entered.set()
+        release.wait()
+        return 'ok'
+
+    results = []
+    thread = Thread(target=lambda: results.append(function()))
+    thread.start()
+    entered.wait()
+
+    assert function() == 'shed'
+
+    release.set()
+    thread.join()
+
+    assert results == ['ok']
+    assert function() == 'ok'
+    assert len(logger.data.exception) == 1
+    assert logger.data.exception[0].message == 'When executing function "function", the exception "ConcurrencyLimitError" ("The limit of 1 concurrent calls of "function" has been reached.") was suppressed.'
+
+
+def test_excess_coroutine_calls_are_shed_with_default():
+    running = []
+    maximum = []
+
+    @escape(ValueError, default='shed', max_concurrency=2, stats='test_excess_coroutine_calls_are_shed_with_default')
+    async def function(number):
+        running.append(number)
+        maximum.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(number)
+        return number
+
+    async def main():
+        return await asyncio.gather(*(function(number) for number in range(5)))
+
+    assert asyncio.run(main()) == [0, 1, 'shed', 'shed', 'shed']
+    assert max(maximum) == 2
+    assert escape.stats()['test_excess_coroutine_calls_are_shed_with_default'] == {'calls': 5, 'suppressed': 3, 'reraised': 0, 'retries': 0, 'exceptions': {'escape.errors.ConcurrencyLimitError': 3}}
+
+
+def test_coroutine_calls_wait_for_free_place():
+    @escape(ValueError, default='shed', max_concurrency=2, max_wait=1, max_waiting=2)
+    async def function(number):
+        await asyncio.sleep(0.01)
+        return number
+
+    async def main():
+        return await asyncio.gather(*(function(number) for number in range(5)))
+
+    assert asyncio.run(main()) == [0, 1, 2, 3, 'shed']
+
+
+def test_place_is_released_after_exception():
+    @escape(ValueError, default='default', max_concurrency=1)
+    def function(exception):
+        raise exception
+
+    assert function(ValueError) == 'default'
+    with pytest.raises(KeyError):
+        function(KeyError)
+    assert function(ValueError) == 'default'
+
+
+def test_shed_call_gets_exception_in_default_factory():
+    entered = Event()
+    release = Event()
+
+    @escape(ValueError, default_factory=lambda exception: type(exception).__name__, max_concurrency=1)
+    def function():
+        entered.set()
+        release.wait()
+
+    thread = Thread(target=function)
+    thread.start()
+    entered.wait()
+
+    assert function() == 'ConcurrencyLimitError'
+
+    release.set()
+    thread.join()
+
+
+def test_context_manager_with_max_concurrency():
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "max_concurrency" option cannot be used with the context manager.')):
+        with escape(ValueError, max_concurrency=1):
+            pass
+
+
+def test_generator_function_with_max_concurrency():
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "max_concurrency" option cannot be used with generator functions.')):
+        @escape(ValueError, max_concurrency=1)
+        def function():
+            yield 1
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'message'],
+    [
+        ({'max_concurrency': 0}, 'The maximum number of concurrent calls must be a positive number.'),
+        ({'max_concurrency': 1, 'max_wait': -1}, 'The maximum time to wait for a free place must be a non-negative number of seconds.'),
+        ({'max_concurrency': 1, 'max_waiting': 0}, 'The maximum number of waiting calls must be a positive number.'),
+    ],
+)
+def test_wrong_bulkhead_options(arguments, message):
+    with pytest.raises(ValueError, match=full_match(message)):
+        escape.policy(ValueError, **arguments)
@@ -0,0 +1,304 @@
+import asyncio
+
+import pytest
+import full_match
+
+import escape
+from escape import cache as cache_module
+from escape.cache import ExpiringCache, CacheInfo, MISSING, make_key
+from escape.errors import UnsupportedOptionError
+
+
+@pytest.fixture
+def clock(make_clock):
+    return make_clock(cache_module)
+
+
+def test_make_key():
+    assert make_key((1, 2), {}) == (1, 2)
+    assert make_key((1,), {'a': 1, 'b': 2}) == make_key((1,), {'b': 2, 'a': 1})
+    assert make_key((1,), {'a': 2}) != make_key((1, 2), {})
+    assert make_key((1,), {'a': 1}) != make_key(((1,), (('a', 1),)), {})
+    assert make_key(([],), {}) is None
+    assert make_key((), {'a': {}}) is None
+
+
+def test_get_and_set(clock):
+    cache = ExpiringCache(10, 5.0)
+
+    assert cache.get('key') is MISSING
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
+
+    assert cache.info() == CacheInfo(hits=1, misses=1, maxsize=10, currsize=1)
+
+
+def test_none_can_be_cached(clock):
+    cache = ExpiringCache(10, 5.0)
+
+    cache.set('key', None)
+
+    assert cache.get('key') is None
+
+
+def test_entries_expire(clock):
+    cache = ExpiringCache(10, 5.0)
+    cache.set('key', 'value')
+
+    clock.now += 4.9
+    assert cache.get('key') == 'value'
+    clock.now += 0.1
+    assert cache.get('key') is MISSING
+
+    assert cache.info() == CacheInfo(hits=1, misses=1, maxsize=10, currsize=0)
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = ExpiringCache(2, 5.0)
+    cache.set(1, 1)
+    cache.set(2, 2)
+    cache.get(1)
+    cache.set(3, 3)
+
+    assert cache.get(2) is MISSING
+    assert cache.get(1) == 1
+    assert cache.get(3) == 3
+    assert cache.info().currsize == 2
+
+
+def test_clear(clock):
+    cache = ExpiringCache(2, 5.0)
+    cache.set(1, 1)
+    cache.get(1)
+
+    cache.clear()
+
+    assert cache.info() == CacheInfo(hits=0, misses=0, maxsize=2, currsize=0)
+
+
+def test_failed_arguments_are_not_called_again(clock):
+    calls = []
+
+    @escape(KeyError, default='default', failure_cache=60)
+    def function(key, **kwargs):
+        calls.append(key)
+        return {'good': 'value'}[key]
+
+    assert function('bad') == 'default'
+    assert function('bad') == 'default'
+    assert function('good') == 'value'
+    assert function('good') == 'value'
+    assert function('bad', flag=True) == 'default'
+    assert calls == ['bad', 'good', 'good', 'bad']
+
+    assert function.failure_cache_info() == CacheInfo(hits=1, misses=4, maxsize=1024, currsize=2)
+
+    clock.now += 60
+    assert function('bad') == 'default'
+    assert calls == ['bad', 'good', 'good', 'bad', 'bad']
+
+
+def test_keyword_arguments_do_not_collide_with_positional_ones(clock):
+    calls = []
+
+    @escape(ValueError, default='default', failure_cache=60)
+    def function(*args, **kwargs):
+        calls.append((args, kwargs))
+        if kwargs:
+            raise ValueError
+        return 'value'
+
+    assert function(1, a=1) == 'default'
+    assert function((1,), (('a', 1),)) == 'value'
+    assert calls == [((1,), {'a': 1}), (((1,), (('a', 1),)), {})]
+
+
+def test_failure_cache_for_coroutine_function(clock):
+    calls = []
+
+    @escape(KeyError, default='default', failure_cache=60, failure_cache_size=1)
+    async def function(key):
+        calls.append(key)
+        raise KeyError(key)
+
+    assert asyncio.run(function('a')) == 'default'
+    assert asyncio.run(function('a')) == 'default'
+    assert asyncio.run(function('b')) == 'default'
+    assert asyncio.run(function('a')) == 'default'
+    assert calls == ['a', 'b', 'a']
+
+    assert function.failure_cache_info() == CacheInfo(hits=1, misses=3, maxsize=1, currsize=1)
+
+
+def test_unhashable_arguments_are_not_cached(clock):
+    calls = []
+
+    @escape(KeyError, failure_cache=60)
+    def function(keys):
+        calls.append(keys)
+        raise KeyError
+
+    function(['a'])
+    function(['a'])
+
+    assert calls == [['a'], ['a']]
+    assert function.failure_cache_info() == CacheInfo(hits=0, misses=0, maxsize=1024, currsize=0)
+
+
+def test_not_suppressed_exceptions_are_not_cached(clock):
+    calls = []
+
+    @escape(KeyError, failure_cache=60)
+    def function(key):
+        calls.append(key)
+        raise ValueError
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            function('a')
+
+    assert calls == ['a', 'a']
+
+
+def test_functions_without_cache_have_no_info():
+    @escape(KeyError)
+    def function():
+        pass
+
+    assert not hasattr(function, 'failure_cache_info')
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'message'],
+    [
+        ({'failure_cache': 0}, 'The lifetime of entries in the failure cache must be a positive number of seconds.'),
+        ({'failure_cache': 1, 'failure_cache_size': 0}, 'The size of the failure cache must be a positive number.'),
+    ],
+)
+def test_wrong_failure_cache_options(arguments, message):
+    with pytest.raises(ValueError, match=full_match(message)):
+        escape.policy(ValueError, **arguments)
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'name'],
+    [
+        ({'failure_cache': 1.0}, 'failure_cache'),
+        ({'failure_cache_size': 10}, 'failure_cache_size'),
+    ],
+)
+def test_failure_cache_is_rejected_where_it_is_ignored(arguments, name):
+    with pytest.raises(UnsupportedOptionError, match=full_match(f'The "{name}" option cannot be used with the context manager.')):
+        with escape(ValueError, **arguments):
+            pass
+
+    with pytest.raises(UnsupportedOptionError, match=full_match(f'The "{name}" option cannot be used with generator functions.')):
+        @escape(ValueError, **arguments)
+        def function():
+            yield 1
+
+
+def test_stale_result_is_returned_on_suppressed_exception(clock):
+    prices = {'apple': 10}
+
+    @escape(ConnectionError, default=0, stale_cache=60)
+    def get_price(name):
+        if name not in prices:
+            raise ConnectionError
+        return prices[name]
+
+    assert get_price('apple') == 10
+    del prices['apple']
+    assert get_price('apple') == 10
+    assert get_price('pear') == 0
+
+    clock.now += 60
+    assert get_price('apple') == 0
+
+
+def test_stale_result_is_updated_by_each_success(clock):
+    results = [1, 2, ConnectionError]
+
+    @escape(ConnectionError, stale_cache=60)
+    def function():
+        result = results.pop(0)
+        if isinstance(result, type):
+            raise result
+        return result
+
+    assert [function(), function(), function()] == [1, 2, 2]
+    assert function.stale_cache_info() == CacheInfo(hits=1, misses=0, maxsize=1024, currsize=1)
+
+
+def test_stale_result_for_coroutine_function(clock):
+    is_broken = False
+
+    @escape(ConnectionError, default='default', stale_cache=60)
+    async def function(key):
+        if is_broken:
+            raise ConnectionError
+        return key * 2
+
+    assert asyncio.run(function('a')) == 'aa'
+    is_broken = True
+    assert asyncio.run(function('a')) == 'aa'
+    assert asyncio.run(function('b')) == 'default'
+
+
+def test_stale_result_is_returned_while_breaker_is_open(clock):
+    calls = []
+
+    @escape(ConnectionError, default='default', stale_cache=60, breaker_threshold=1)
+    def function(key):
+        calls.append(key)
+        if len(calls) > 1:
+            raise ConnectionError
+        return key
+
+    assert function('a') == 'a'
+    assert function('b') == 'default'
+    assert function('a') == 'a'
+    assert calls == ['a', 'b']
+
+
+def test_none_as_stale_result(clock):
+    is_broken = False
+
+    @escape(ConnectionError, default='default', stale_cache=60)
+    def function():
+        if is_broken:
+            raise ConnectionError
+
+    assert function() is None
+    is_broken = True
+    assert function() is None
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'message'],
+    [
+        ({'stale_cache': -1}, 'The lifetime of entries in the cache of stale results must be a positive number of seconds.'),
+        ({'stale_cache': 1, 'stale_cache_size': 0}, 'The size of the cache of stale results must be a positive number.'),
+    ],
+)
+def test_wrong_stale_cache_options(arguments, message):
+    with pytest.raises(ValueError, match=full_match(message)):
+        escape.policy(ValueError, **arguments)
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'name'],
+    [
+        ({'stale_cache': 5}, 'stale_cache'),
+        ({'stale_cache_size': 10}, 'stale_cache_size'),
+    ],
+)
+def test_stale_cache_is_rejected_where_it_is_ignored(arguments, name):
+    with pytest.raises(UnsupportedOptionError, match=full_match(f'The "{name}" option cannot be used with the context manager.')):
+        with escape(ValueError, **arguments):
+            pass
+
+    with pytest.raises(UnsupportedOptionError, match=full_match(f'The "{name}" option cannot be used with async generator functions.')):
+        @escape(ValueError, **arguments)
+        async def function():
+            yield 1
@@ -0,0 +1,251 @@
+import asyncio
+import sys
+import threading
+import tracemalloc
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape.collector import Collector
+
+
+def test_context_manager_in_loop():
+    errors = escape.collect(ValueError)
+
+    for number in range(5):
+        with errors:
+            if number % 2:
+                raise ValueError(number)
+
+    assert [str(exception) for exception in errors.exceptions] == ['1', '3']
+    assert errors.counts == [1, 1]
+    assert errors.total == 2
+    assert errors.dropped == 0
+    assert len(errors) == 2
+
+
+def test_context_manager_returns_collector():
+    errors = escape.collect(ValueError)
+
+    with errors as context:
+        raise ValueError
+
+    assert context is errors
+    assert len(errors) == 1
+
+
+def test_not_suppressed_exceptions_are_not_collected():
+    errors = escape.collect(ValueError)
+
+    with pytest.raises(ZeroDivisionError):
+        with errors:
+            1/0
+
+    assert errors.exceptions == []
+    assert errors.total == 0
+
+
+def test_decorator():
+    errors = escape.collect(ValueError, default='default')
+
+    @errors
+    def function(number):
+        raise ValueError(number)
+
+    assert [function(number) for number in range(3)] == ['default'] * 3
+    assert [str(exception) for exception in errors.exceptions] == ['0', '1', '2']
+
+
+def test_coroutine_function():
+    errors = escape.collect(ValueError)
+
+    @errors
+    async def function():
+        raise ValueError
+
+    asyncio.run(function())
+
+    assert len(errors) == 1
+
+
+def test_collector_as_option_shared_by_functions():
+    errors = escape.collect(ValueError)
+
+    @escape(ValueError, collector=errors)
+    def first():
+        raise ValueError('first')
+
+    @escape(ValueError, collector=errors)
+    def second():
+        raise ValueError('second')
+
+    first()
+    second()
+
+    assert [str(exception) for exception in errors.exceptions] == ['first', 'second']
+
+
+def test_ring_buffer_keeps_last_exceptions():
+    errors = escape.collect(ValueError, size=3)
+
+    for number in range(10):
+        with errors:
+            raise ValueError(number)
+
+    assert [str(exception) for exception in errors.exceptions] == ['7', '8', '9']
+    assert errors.total == 10
+    assert errors.dropped == 7
+
+
+def test_deduplication():
+    errors = escape.collect(ValueError, KeyError, dedup=True)
+
+    for number in range(10):
+        with errors:
+            raise ValueError(number % 2)
+    with errors:
+        raise KeyError(0)
+
+    assert [(type(exception), str(exception)) for exception in errors.exceptions] == [(ValueError, '0'), (ValueError, '1'), (KeyError, '0')]
+    assert errors.counts == [5, 5, 1]
+    assert errors.total == 11
+    assert errors.dropped == 0
+
+
+def test_deduplication_pushes_out_least_recently_seen_kinds():
+    errors = escape.collect(ValueError, size=2, dedup=True)
+
+    for message in ['a', 'b', 'a', 'c']:
+        with errors:
+            raise ValueError(message)
+
+    assert [str(exception) for exception in errors.exceptions] == ['a', 'c']
+    assert errors.counts == [2, 1]
+    assert errors.dropped == 1
+
+
+def test_clear():
+    errors = escape.collect(ValueError)
+
+    with errors:
+        raise ValueError
+
+    errors.clear()
+
+    assert errors.exceptions == []
+    assert errors.total == 0
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason='ExceptionGroup appeared in Python 3.11.')
+def test_group():
+    errors = escape.collect(ValueError)
+
+    assert errors.group() is None
+
+    for number in range(3):
+        with errors:
+            raise ValueError(number)
+
+    group = errors.group('Batch failed')
+
+    assert isinstance(group, ExceptionGroup)  # noqa: F821
+    assert group.message == 'Batch failed'
+    assert list(group.exceptions) == errors.exceptions
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason='ExceptionGroup appeared in Python 3.11.')
+def test_group_with_base_exceptions():
+    errors = escape.collect(KeyboardInterrupt)
+
+    with errors:
+        raise KeyboardInterrupt
+
+    assert isinstance(errors.group(), BaseExceptionGroup)  # noqa: F821
+    assert not isinstance(errors.group(), Exception)
+
+
+def test_collected_exceptions_are_logged_too():
+    logger = MemoryLogger()
+    errors = escape.collect(ValueError, logger=logger)
+
+    with errors:
+        raise ValueError('kek')
+
+    assert len(logger.data.exception) == 1
+    assert len(errors) == 1
+
+
+def test_traceback_summary_for_collected_exceptions():
+    errors = escape.collect(ValueError, traceback='summary')
+
+    with errors:
+        raise ValueError
+
+    assert errors.exceptions[0].__traceback__ is None
+    assert errors.exceptions[0].traceback_summary
+
+
+def test_collection_from_threads():
+    errors = escape.collect(ValueError, size=10_000)
+
+    @errors
+    def function():
+        raise ValueError
+
+    def worker():
+        for _ in range(1000):
+            function()
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors.total == 8000
+    assert len(errors) == 8000
+
+
+def test_memory_is_capped():
+    errors = escape.collect(ValueError, size=10, traceback='drop')
+
+    @errors
+    def function():
+        buffer = bytearray(100_000)  # noqa: F841
+        raise ValueError
+
+    tracemalloc.start()
+    try:
+        for _ in range(1000):
+            function()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert errors.total == 1000
+    assert len(errors) == 10
+    assert current < 1_000_000
+
+
+def test_collector_policy_is_not_interned():
+    first = escape.collect(ValueError)
+    second = escape.collect(ValueError)
+
+    assert first.policy is not second.policy
+    assert first.policy.collector is first
+    assert isinstance(first, Collector)
+
+
+@pytest.mark.parametrize(
+    ['size'],
+    [
+        (0,),
+        (-1,),
+        (1.5,),
+    ],
+)
+def test_wrong_size(size):
+    with pytest.raises(ValueError, match=full_match('The size of the collector must be a positive integer.')):
+        escape.collect(ValueError, size=size)
@@ -0,0 +1,246 @@
+import asyncio
+import errno
+import re
+import sys
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape.conditions import Condition
+
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f'HTTP {status}')
+        self.status = status
+
+
+def test_errno_set():
+    @escape(escape.match(OSError, errno={errno.ENOENT, errno.EEXIST}), default='default')
+    def function(number):
+        raise OSError(number, 'kek')
+
+    assert function(errno.ENOENT) == 'default'
+    assert function(errno.EEXIST) == 'default'
+
+    with pytest.raises(PermissionError):
+        function(errno.EACCES)
+
+
+def test_attribute_equality():
+    @escape(escape.match(HTTPError, status=503), default='default')
+    def function(status):
+        raise HTTPError(status)
+
+    assert function(503) == 'default'
+
+    with pytest.raises(HTTPError):
+        function(500)
+
+
+def test_missing_attribute_does_not_match():
+    @escape(escape.match(ValueError, status=None))
+    def function():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        function()
+
+
+def test_unhashable_attribute_does_not_match_set():
+    error = ValueError()
+    error.codes = [1]
+
+    @escape(escape.match(ValueError, codes={1}))
+    def function():
+        raise error
+
+    with pytest.raises(ValueError):
+        function()
+
+
+@pytest.mark.parametrize(
+    ['message'],
+    [
+        ('connection (reset|refused)',),
+        (re.compile('CONNECTION RESET', re.IGNORECASE),),
+    ],
+)
+def test_message_pattern(message):
+    @escape(escape.match(ConnectionError, message=message), default='default')
+    def function(text):
+        raise ConnectionError(text)
+
+    assert function('the connection reset by peer') == 'default'
+
+    with pytest.raises(ConnectionError):
+        function('kek')
+
+
+def test_predicate():
+    @escape(escape.match(ValueError, predicate=lambda exception: len(exception.args) == 2), default='default')
+    def function(*args):
+        raise ValueError(*args)
+
+    assert function(1, 2) == 'default'
+
+    with pytest.raises(ValueError):
+        function(1)
+
+
+def test_all_checks_must_pass():
+    condition = escape.match(HTTPError, message='HTTP 5', predicate=lambda exception: exception.status != 501, status={500, 501, 503})
+
+    @escape(condition, default='default')
+    def function(status):
+        raise HTTPError(status)
+
+    assert function(500) == 'default'
+    assert function(503) == 'default'
+    for status in (501, 404):
+        with pytest.raises(HTTPError):
+            function(status)
+
+
+def test_subclasses_are_matched():
+    @escape(escape.match(OSError, errno={errno.ENOENT}), default='default')
+    def function():
+        raise FileNotFoundError(errno.ENOENT, 'kek')
+
+    assert function() == 'default'
+
+
+def test_conditions_with_types_and_ellipsis():
+    @escape(escape.match(HTTPError, status=503), KeyError, default='default')
+    def function(exception):
+        raise exception
+
+    assert function(HTTPError(503)) == 'default'
+    assert function(KeyError()) == 'default'
+    with pytest.raises(HTTPError):
+        function(HTTPError(500))
+
+    @escape(escape.match(KeyboardInterrupt, predicate=lambda exception: True), ..., default='default')
+    def other_function(exception):
+        raise exception
+
+    assert other_function(KeyboardInterrupt()) == 'default'
+    assert other_function(ValueError()) == 'default'
+
+
+def test_predicates_are_not_called_for_other_types():
+    calls = []
+
+    @escape(escape.match(HTTPError, predicate=lambda exception: calls.append(exception) or True), ValueError)
+    def function(exception):
+        raise exception
+
+    function(ValueError())
+    with pytest.raises(KeyError):
+        function(KeyError())
+
+    assert calls == []
+
+
+def test_coroutine_function():
+    @escape(escape.match(HTTPError, status=503), default='default')
+    async def function(status):
+        raise HTTPError(status)
+
+    assert asyncio.run(function(503)) == 'default'
+    with pytest.raises(HTTPError):
+        asyncio.run(function(500))
+
+
+def test_generator_function():
+    @escape(escape.match(HTTPError, status=503), default='default')
+    def function(status):
+        yield 1
+        raise HTTPError(status)
+
+    assert list(function(503)) == [1]
+    with pytest.raises(HTTPError):
+        list(function(500))
+
+
+def test_context_manager():
+    with escape(escape.match(HTTPError, status=503)):
+        raise HTTPError(503)
+
+    with pytest.raises(HTTPError):
+        with escape(escape.match(HTTPError, status=503)):
+            raise HTTPError(500)
+
+
+def test_logging():
+    logger = MemoryLogger()
+
+    @escape(escape.match(HTTPError, status=503), logger=logger)
+    def function(status):
+        raise HTTPError(status)
+
+    function(503)
+    with pytest.raises(HTTPError):
+        function(500)
+
+    assert logger.data.exception[0].message == 'When executing function "function", the exception "HTTPError" ("HTTP 503") was suppressed.'
+    assert logger.data.exception[1].message == 'When executing function "function", the exception "HTTPError" ("HTTP 500") was not suppressed.'
+
+
+def test_retries_use_conditions():
+    statuses = [503, 503, 'ok']
+
+    @escape(escape.match(HTTPError, status=503), retries=3, retry_delay=0.001)
+    def function():
+        status = statuses.pop(0)
+        if status != 'ok':
+            raise HTTPError(status)
+        return status
+
+    assert function() == 'ok'
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason='ExceptionGroup appeared in Python 3.11.')
+def test_exception_groups_are_split_by_conditions():
+    @escape(escape.match(HTTPError, status=503))
+    def function():
+        raise ExceptionGroup('group', [HTTPError(503), HTTPError(500)])  # noqa: F821
+
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        function()
+
+    assert [exception.status for exception in exception_info.value.exceptions] == [500]
+
+
+def test_condition_is_a_part_of_policy():
+    assert escape.match(OSError, errno={1, 2}) == escape.match(OSError, errno=frozenset({2, 1}))
+    assert escape.match(OSError, errno={1}) != escape.match(OSError, errno={2})
+    assert escape.policy(escape.match(OSError, errno={1, 2})) is escape.policy(escape.match(OSError, errno={2, 1}))
+    assert escape.policy(escape.match(OSError, message='kek')) == escape.policy(escape.match(OSError, message='kek'))
+    assert escape.policy(escape.match(OSError, errno={1})) != escape.policy(OSError)
+
+
+def test_repr():
+    assert repr(escape.match(HTTPError, status=503, message='HTTP')) == "Condition(HTTPError, status=503, message='HTTP')"
+    assert repr(escape.policy(escape.match(HTTPError, status=503), KeyError)) == "Wrapper(Condition(HTTPError, status=503), KeyError, default=None, logger=EmptyLogger())"
+
+
+def test_condition_is_not_taken_for_function():
+    condition = escape.match(HTTPError, status=503)
+
+    assert isinstance(condition, Condition)
+    assert not callable(condition)
+    assert isinstance(escape(condition), escape.policy(ValueError).__class__)
+
+
+def test_wrong_arguments():
+    with pytest.raises(ValueError, match=full_match('Only exception types can be used in conditions.')):
+        escape.match(1)
+    with pytest.raises(ValueError, match=full_match('Only exception types can be used in conditions.')):
+        escape.match(int)
+    with pytest.raises(ValueError, match=full_match('The message must be a string or a compiled regular expression.')):
+        escape.match(ValueError, message=1)
+    with pytest.raises(ValueError, match=full_match('The predicate must be a callable object.')):
+        escape.match(ValueError, predicate=1)
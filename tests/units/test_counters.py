@@ -0,0 +1,162 @@
+import asyncio
+from threading import Thread
+
+import pytest
+import full_match
+
+import escape
+from escape.counters import Counters, get_counters, render_prometheus
+
+
+def test_counters_are_disabled_by_default():
+    @escape(ValueError)
+    def function():
+        raise ValueError
+
+    function()
+
+    assert f'{__name__}.test_counters_are_disabled_by_default.<locals>.function' not in escape.stats()
+
+
+def test_function_counters():
+    @escape(ValueError, stats=True)
+    def function(exception_type):
+        if exception_type is not None:
+            raise exception_type
+
+    function(None)
+    function(ValueError)
+    function(UnicodeError)
+    with pytest.raises(KeyError):
+        function(KeyError)
+
+    assert escape.stats()[f'{__name__}.test_function_counters.<locals>.function'] == {
+        'calls': 4,
+        'suppressed': 2,
+        'reraised': 1,
+        'retries': 0,
+        'exceptions': {'ValueError': 1, 'UnicodeError': 1, 'KeyError': 1},
+    }
+
+
+def test_coroutine_function_counters():
+    @escape(ValueError, stats='coroutine_counters')
+    async def function():
+        raise ValueError
+
+    asyncio.run(function())
+    asyncio.run(function())
+
+    assert escape.stats()['coroutine_counters'] == {'calls': 2, 'suppressed': 2, 'reraised': 0, 'retries': 0, 'exceptions': {'ValueError': 2}}
+
+
+def test_generator_counters():
+    @escape(ValueError, stats='generator_counters')
+    def generator():
+        yield 1
+        raise ValueError
+
+    assert list(generator()) == [1]
+
+    assert escape.stats()['generator_counters'] == {'calls': 1, 'suppressed': 1, 'reraised': 0, 'retries': 0, 'exceptions': {'ValueError': 1}}
+
+
+def test_context_manager_counters():
+    for _ in range(3):
+        with escape(ValueError, stats=True):
+            raise ValueError
+
+    with escape(ValueError, stats=True):
+        pass
+
+    with pytest.raises(KeyError), escape(ValueError, stats=True):
+        raise KeyError
+
+    assert escape.stats()[f'{__name__}.test_context_manager_counters'] == {'calls': 5, 'suppressed': 3, 'reraised': 1, 'retries': 0, 'exceptions': {'ValueError': 3, 'KeyError': 1}}
+
+
+def test_functions_with_the_same_name_share_counters():
+    def make_function():
+        @escape(stats='shared_counters')
+        def function():
+            pass
+        return function
+
+    make_function()()
+    make_function()()
+
+    assert escape.stats()['shared_counters']['calls'] == 2
+
+
+def test_counters_from_threads_are_merged():
+    @escape(ValueError, stats='threaded_counters')
+    def function():
+        raise ValueError
+
+    def run():
+        for _ in range(1000):
+            function()
+
+    threads = [Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert escape.stats()['threaded_counters']['suppressed'] == 8000
+    assert escape.stats()['threaded_counters']['calls'] == 8000
+
+
+def test_non_builtin_exception_names():
+    class LocalError(Exception):
+        pass
+
+    @escape(..., stats='non_builtin_counters')
+    def function():
+        raise LocalError
+
+    function()
+
+    assert escape.stats()['non_builtin_counters']['exceptions'] == {f'{__name__}.test_non_builtin_exception_names.<locals>.LocalError': 1}
+
+
+def test_get_counters_returns_the_same_object_for_the_same_name():
+    assert get_counters('kek_counters') is get_counters('kek_counters')
+    assert isinstance(get_counters('kek_counters'), Counters)
+
+
+def test_prometheus_format():
+    snapshot = {'some "place"': {'calls': 3, 'suppressed': 2, 'reraised': 1, 'retries': 0, 'exceptions': {'ValueError': 3}}}
+
+    assert render_prometheus(snapshot) == '\n'.join([
+        '# HELP escape_calls_total Calls of decorated functions and entries into context managers.',
+        '# TYPE escape_calls_total counter',
+        'escape_calls_total{callsite="some \\"place\\""} 3',
+        '# HELP escape_suppressed_total Suppressed exceptions.',
+        '# TYPE escape_suppressed_total counter',
+        'escape_suppressed_total{callsite="some \\"place\\""} 2',
+        '# HELP escape_reraised_total Exceptions that were not suppressed.',
+        '# TYPE escape_reraised_total counter',
+        'escape_reraised_total{callsite="some \\"place\\""} 1',
+        '# HELP escape_retries_total Repeated calls after suppressed exceptions.',
+        '# TYPE escape_retries_total counter',
+        'escape_retries_total{callsite="some \\"place\\""} 0',
+        '# HELP escape_exceptions_total Exceptions by type, both suppressed and not.',
+        '# TYPE escape_exceptions_total counter',
+        'escape_exceptions_total{callsite="some \\"place\\"",exception="ValueError"} 3',
+    ]) + '\n'
+
+
+def test_stats_in_prometheus_format():
+    @escape(stats='prometheus_counters')
+    def function():
+        pass
+
+    function()
+
+    assert 'escape_calls_total{callsite="prometheus_counters"} 1' in escape.stats(format='prometheus')
+
+
+def test_stats_in_unknown_format():
+    with pytest.raises(ValueError, match=full_match('Unknown format of statistics: \'kek\'. Use "dict" or "prometheus".')):
+        escape.stats(format='kek')
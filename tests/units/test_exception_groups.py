@@ -0,0 +1,215 @@
+import asyncio
+import sys
+import time
+
+import pytest
+from emptylog import MemoryLogger
+
+import escape
+
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 11), reason='ExceptionGroup appeared in Python 3.11.')
+
+
+def make_group():
+    return ExceptionGroup('group', [ValueError('value'), ZeroDivisionError('zero'), ExceptionGroup('nested', [ValueError('nested value'), KeyError('key')])])  # noqa: F821
+
+
+def get_leaves(group):
+    leaves = []
+    for exception in group.exceptions:
+        if isinstance(exception, BaseExceptionGroup):  # noqa: F821
+            leaves.extend(get_leaves(exception))
+        else:
+            leaves.append(exception)
+    return leaves
+
+
+@pytest.mark.parametrize(
+    ['logger'],
+    [
+        (None,),
+        (MemoryLogger(),),
+    ],
+)
+def test_decorator_raises_only_not_suppressed_leaves(logger):
+    group = make_group()
+
+    @escape(ValueError, **({} if logger is None else {'logger': logger}))
+    def function():
+        raise group
+
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        function()
+
+    remainder = exception_info.value
+    assert remainder is not group
+    assert remainder.message == 'group'
+    assert [type(leaf) for leaf in get_leaves(remainder)] == [ZeroDivisionError, KeyError]
+    assert remainder.__suppress_context__
+
+
+def test_decorator_with_coroutine_function():
+    @escape(ValueError)
+    async def function():
+        raise make_group()
+
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        asyncio.run(function())
+
+    assert [type(leaf) for leaf in get_leaves(exception_info.value)] == [ZeroDivisionError, KeyError]
+
+
+def test_group_of_suppressed_leaves_is_suppressed():
+    @escape(ValueError, KeyError, default='default')
+    def function():
+        raise ExceptionGroup('group', [ValueError(), ExceptionGroup('nested', [KeyError()])])  # noqa: F821
+
+    assert function() == 'default'
+
+
+def test_group_without_suppressed_leaves_is_raised_as_is():
+    group = ExceptionGroup('group', [ZeroDivisionError()])  # noqa: F821
+
+    @escape(ValueError)
+    def function():
+        raise group
+
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        function()
+
+    assert exception_info.value is group
+
+
+def test_group_suppressed_as_whole_by_default():
+    @escape
+    def function():
+        raise BaseExceptionGroup('group', [ValueError(), KeyboardInterrupt()])  # noqa: F821
+
+    assert function() is None
+
+
+def test_cause_is_kept():
+    cause = RuntimeError('cause')
+
+    @escape(ValueError)
+    def function():
+        raise ExceptionGroup('group', [ValueError(), ZeroDivisionError()]) from cause  # noqa: F821
+
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        function()
+
+    assert exception_info.value.__cause__ is cause
+
+
+def test_both_parts_are_logged():
+    logger = MemoryLogger()
+
+    @escape(ValueError, logger=logger)
+    def function():
+        raise ExceptionGroup('group', [ValueError(), ZeroDivisionError()])  # noqa: F821
+
+    with pytest.raises(ExceptionGroup):  # noqa: F821
+        function()
+
+    assert len(logger.data.exception) == 2
+    assert logger.data.exception[0].message == 'When executing function "function", the exception "ExceptionGroup" ("group (1 sub-exception)") was suppressed.'
+    assert logger.data.exception[1].message == 'When executing function "function", the exception "ExceptionGroup" ("group (1 sub-exception)") was not suppressed.'
+
+
+def test_extended_decorator():
+    @escape(ValueError, default='default', stats=True)
+    def function(is_partial):
+        if is_partial:
+            raise ExceptionGroup('group', [ValueError(), ZeroDivisionError()])  # noqa: F821
+        raise ExceptionGroup('group', [ValueError()])  # noqa: F821
+
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        function(True)
+
+    assert [type(leaf) for leaf in get_leaves(exception_info.value)] == [ZeroDivisionError]
+    assert function(False) == 'default'
+
+
+def test_extended_coroutine_function():
+    @escape(ValueError, default='default', stats=True)
+    async def function():
+        raise ExceptionGroup('group', [ValueError(), ZeroDivisionError()])  # noqa: F821
+
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        asyncio.run(function())
+
+    assert [type(leaf) for leaf in get_leaves(exception_info.value)] == [ZeroDivisionError]
+
+
+def test_context_manager():
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        with escape(ValueError):
+            raise make_group()
+
+    assert [type(leaf) for leaf in get_leaves(exception_info.value)] == [ZeroDivisionError, KeyError]
+
+
+def test_context_manager_suppresses_group_of_suppressed_leaves():
+    logger = MemoryLogger()
+
+    with escape(ValueError, logger=logger):
+        raise ExceptionGroup('group', [ValueError(), ValueError()])  # noqa: F821
+
+    assert len(logger.data.exception) == 1
+    assert logger.data.exception[0].message == 'The "ExceptionGroup" ("group (2 sub-exceptions)") exception was suppressed inside the context.'
+
+
+def test_extended_context_manager():
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        with escape(ValueError, stats=True):
+            raise make_group()
+
+    assert [type(leaf) for leaf in get_leaves(exception_info.value)] == [ZeroDivisionError, KeyError]
+
+
+def test_task_group():
+    results = []
+
+    async def work(number):
+        await asyncio.sleep(0)
+        if number == 1:
+            raise ValueError
+        results.append(number)
+
+    @escape(ValueError)
+    async def main():
+        async with asyncio.TaskGroup() as group:
+            for number in range(3):
+                group.create_task(work(number))
+
+    asyncio.run(main())
+
+    assert sorted(results) == [0, 2]
+
+
+def test_collector_gets_suppressed_part():
+    errors = escape.collect(ValueError)
+
+    with pytest.raises(ExceptionGroup):  # noqa: F821
+        with errors:
+            raise make_group()
+
+    assert len(errors) == 1
+    assert [type(leaf) for leaf in get_leaves(errors.exceptions[0])] == [ValueError, ValueError]
+
+
+def test_big_group_is_split_fast():
+    leaves = [ValueError() if number % 2 else KeyError() for number in range(10_000)]
+    group = ExceptionGroup('group', [ExceptionGroup('nested', leaves[index:index + 100]) for index in range(0, len(leaves), 100)])  # noqa: F821
+
+    @escape(ValueError)
+    def function():
+        raise group
+
+    started_at = time.perf_counter()
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        function()
+
+    assert time.perf_counter() - started_at < 1
+    assert len(get_leaves(exception_info.value)) == 5_000
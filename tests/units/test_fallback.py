@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape.errors import SetAsyncFallbackForSyncFunctionError, UnsupportedOptionError
+
+
+def broken(*args, **kwargs):
+    raise ValueError('broken')
+
+
+def test_first_working_fallback_is_used():
+    calls = []
+
+    def cache_lookup(key, flag=False):
+        calls.append(('cache_lookup', key, flag))
+        raise ValueError
+
+    def approximate_compute(key, flag=False):
+        calls.append(('approximate_compute', key, flag))
+        return f'approximate {key}'
+
+    def never_called(key, flag=False):
+        calls.append(('never_called', key, flag))
+
+    @escape(ValueError, default='default', fallback=[cache_lookup, approximate_compute, never_called])
+    def function(key, flag=False):
+        raise ValueError
+
+    assert function('kek', flag=True) == 'approximate kek'
+    assert calls == [('cache_lookup', 'kek', True), ('approximate_compute', 'kek', True)]
+
+
+def test_default_is_used_when_all_fallbacks_fail():
+    @escape(ValueError, default='default', fallback=(broken, broken))
+    def function():
+        raise ValueError
+
+    assert function() == 'default'
+
+
+def test_fallbacks_are_not_called_on_success():
+    @escape(ValueError, fallback=[broken])
+    def function():
+        return 'ok'
+
+    assert function() == 'ok'
+
+
+def test_not_suppressed_exception_of_fallback_is_raised():
+    def fallback():
+        raise KeyError
+
+    @escape(ValueError, fallback=[fallback])
+    def function():
+        raise ValueError
+
+    with pytest.raises(KeyError):
+        function()
+
+
+def test_fallback_with_own_policy():
+    logger = MemoryLogger()
+    own_logger = MemoryLogger()
+
+    def fallback():
+        raise KeyError('kek')
+
+    @escape(ValueError, default='default', logger=logger, fallback=[(fallback, escape.policy(KeyError, logger=own_logger))])
+    def function():
+        raise ValueError
+
+    assert function() == 'default'
+    assert len(logger.data.exception) == 1
+    assert [record.message for record in own_logger.data.exception] == ['When executing fallback function "fallback", the exception "KeyError" ("\'kek\'") was suppressed.']
+
+
+def test_failed_fallbacks_are_logged():
+    logger = MemoryLogger()
+
+    @escape(ValueError, logger=logger, fallback=[broken])
+    def function():
+        raise ValueError
+
+    function()
+
+    assert [record.message for record in logger.data.exception] == [
+        'When executing function "function", the exception "ValueError" was suppressed.',
+        'When executing fallback function "broken", the exception "ValueError" ("broken") was suppressed.',
+    ]
+
+
+def test_sync_and_async_fallbacks_for_coroutine_function():
+    async def async_broken(key):
+        raise ValueError
+
+    async def async_fallback(key):
+        await asyncio.sleep(0)
+        return f'async {key}'
+
+    @escape(ValueError, fallback=[broken, async_broken, async_fallback])
+    async def function(key):
+        raise ValueError
+
+    @escape(ValueError, fallback=[broken, lambda key: f'sync {key}'])
+    async def other_function(key):
+        raise ValueError
+
+    assert asyncio.run(function('kek')) == 'async kek'
+    assert asyncio.run(other_function('kek')) == 'sync kek'
+
+
+def test_fallbacks_are_used_when_breaker_is_open():
+    @escape(ValueError, breaker_threshold=1, fallback=[lambda: 'fallback'])
+    def function():
+        raise ValueError
+
+    assert function() == 'fallback'
+    assert function() == 'fallback'
+
+
+def test_async_fallback_for_sync_function():
+    async def fallback():
+        pass
+
+    with pytest.raises(SetAsyncFallbackForSyncFunctionError, match=full_match('Coroutine functions can be used as fallbacks only for coroutine functions.')):
+        @escape(ValueError, fallback=[fallback])
+        def function():
+            pass
+
+
+def test_context_manager_with_fallbacks():
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "fallback" option cannot be used with the context manager.')):
+        with escape(ValueError, fallback=[broken]):
+            pass
+
+
+def test_generator_function_with_fallbacks():
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "fallback" option cannot be used with generator functions.')):
+        @escape(ValueError, fallback=[broken])
+        def function():
+            yield 1
+
+
+@pytest.mark.parametrize(
+    ['fallback'],
+    [
+        ([1],),
+        ([(broken, 1)],),
+        ([(broken,)],),
+    ],
+)
+def test_wrong_fallbacks(fallback):
+    with pytest.raises(ValueError, match=full_match('Only functions and pairs of a function and a policy can be used as fallbacks.')):
+        escape.policy(ValueError, fallback=fallback)
@@ -0,0 +1,239 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape.errors import SetAsyncDefaultFactoryForSyncFunctionError, SetAsyncFallbackForSyncFunctionError, UnsupportedOptionError
+
+
+def test_fast_coroutine_function_is_called_once():
+    calls = []
+
+    @escape.hedge(ValueError, attempts=3, delay=1)
+    async def function(number):
+        calls.append(number)
+        return number
+
+    assert asyncio.run(function(1)) == 1
+    assert calls == [1]
+
+
+def test_slow_attempt_is_hedged_and_cancelled():
+    delays = [10, 0]
+    cancelled = []
+
+    @escape.hedge(ValueError, attempts=2, delay=0.01)
+    async def function():
+        delay = delays.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    async def main():
+        result = await function()
+        await asyncio.sleep(0.01)
+        return result
+
+    assert asyncio.run(main()) == 0
+    assert cancelled == [10]
+
+
+def test_failed_attempt_starts_next_one_immediately():
+    outcomes = [ValueError, 'result']
+
+    @escape.hedge(ValueError, attempts=2, delay=10)
+    async def function():
+        outcome = outcomes.pop(0)
+        if outcome is ValueError:
+            raise ValueError
+        return outcome
+
+    started = time.monotonic()
+    assert asyncio.run(function()) == 'result'
+    assert time.monotonic() - started < 1
+
+
+def test_default_when_all_attempts_fail():
+    logger = MemoryLogger()
+    calls = []
+
+    @escape.hedge(ValueError, attempts=3, delay=0, default='default', logger=logger)
+    async def function():
+        calls.append(True)
+        raise ValueError
+
+    assert asyncio.run(function()) == 'default'
+    assert len(calls) == 3
+    assert len(logger.data.exception) == 3
+
+
+def test_not_suppressed_exception_of_attempt_is_raised():
+    @escape.hedge(ValueError, attempts=3, delay=0)
+    async def function():
+        raise KeyError
+
+    with pytest.raises(KeyError):
+        asyncio.run(function())
+
+
+def test_async_default_factory_for_hedged_coroutine_function():
+    async def factory(exception):
+        return type(exception).__name__
+
+    @escape.hedge(ValueError, attempts=2, delay=0, default_factory=factory)
+    async def function():
+        raise ValueError
+
+    assert asyncio.run(function()) == 'ValueError'
+
+
+def test_cancellation_of_caller_cancels_attempts():
+    cancelled = []
+
+    @escape.hedge(..., attempts=2, delay=0)
+    async def function():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        task = asyncio.ensure_future(function())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+
+    assert cancelled == [True, True]
+
+
+def test_hedged_sync_function():
+    lock = Lock()
+    delays = [0.5, 0]
+
+    @escape.hedge(ValueError, attempts=2, delay=0.01)
+    def function():
+        with lock:
+            delay = delays.pop(0)
+        time.sleep(delay)
+        return delay
+
+    assert function() == 0
+
+
+def test_hedged_sync_function_with_own_executor():
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        @escape.hedge(ValueError, attempts=3, delay=0, default='default', executor=executor)
+        def function():
+            raise ValueError
+
+        assert function() == 'default'
+
+
+def test_not_suppressed_exception_of_sync_attempt_is_raised():
+    @escape.hedge(ValueError, attempts=2, delay=0)
+    def function():
+        raise KeyError
+
+    with pytest.raises(KeyError):
+        function()
+
+
+def test_hedge_stats():
+    @escape.hedge(ValueError, attempts=2, delay=0, stats='test_hedge_stats')
+    def function():
+        raise ValueError
+
+    function()
+
+    assert escape.stats()['test_hedge_stats'] == {'calls': 1, 'suppressed': 2, 'reraised': 0, 'retries': 0, 'exceptions': {'ValueError': 2}}
+
+
+def test_hedge_keeps_metadata():
+    @escape.hedge(ValueError)
+    async def function():
+        """Some documentation."""
+
+    assert function.__name__ == 'function'
+    assert function.__doc__ == 'Some documentation.'
+
+
+def test_wrong_functions_for_hedge():
+    async def factory():
+        pass
+
+    with pytest.raises(ValueError, match=full_match('Only ordinary functions and coroutine functions can be hedged.')):
+        @escape.hedge(ValueError)
+        def generator():
+            yield 1
+
+    with pytest.raises(SetAsyncDefaultFactoryForSyncFunctionError):
+        @escape.hedge(ValueError, default_factory=factory)
+        def function():
+            pass
+
+    with pytest.raises(SetAsyncFallbackForSyncFunctionError):
+        @escape.hedge(ValueError, fallback=[factory])
+        def other_function():
+            pass
+
+
+def test_fallback_when_all_attempts_fail():
+    @escape.hedge(ValueError, attempts=2, delay=0, default='default', fallback=[lambda number: number * 2])
+    def function(number):
+        raise ValueError
+
+    assert function(2) == 4
+
+
+def test_async_fallback_when_all_attempts_fail():
+    async def fallback(number):
+        raise ValueError
+
+    @escape.hedge(ValueError, attempts=2, delay=0, default='default', fallback=[fallback, lambda number: number * 2])
+    async def function(number):
+        raise ValueError
+
+    assert asyncio.run(function(2)) == 4
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'name'],
+    [
+        ({'retries': 2}, 'retries'),
+        ({'timeout': 1}, 'timeout'),
+        ({'breaker_threshold': 5}, 'breaker_threshold'),
+        ({'failure_cache': 60}, 'failure_cache'),
+        ({'stale_cache': 60}, 'stale_cache'),
+        ({'max_concurrency': 1}, 'max_concurrency'),
+    ],
+)
+def test_options_not_supported_by_hedge(arguments, name):
+    with pytest.raises(UnsupportedOptionError, match=full_match(f'The "{name}" option cannot be used with escape.hedge().')):
+        escape.hedge(ValueError, **arguments)
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'message'],
+    [
+        ({'attempts': 0}, 'The number of attempts must be a positive integer.'),
+        ({'attempts': 1.5}, 'The number of attempts must be a positive integer.'),
+        ({'delay': -1}, 'The delay between attempts must be a non-negative number of seconds.'),
+        ({'executor': 'process'}, 'The executor must be "thread" or an instance of concurrent.futures.Executor.'),
+    ],
+)
+def test_wrong_hedge_arguments(arguments, message):
+    with pytest.raises(ValueError, match=full_match(message)):
+        escape.hedge(ValueError, **arguments)
@@ -0,0 +1,151 @@
+import asyncio
+import gc
+import logging
+import threading
+import weakref
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape.log_queue import LogQueue, TracebackDescription
+from escape.reporter import Reporter
+
+
+class ThreadRecordingLogger(MemoryLogger):
+    def __init__(self):
+        super().__init__()
+        self.threads = []
+
+    def error(self, message, *args, **kwargs):
+        self.threads.append(threading.current_thread().name)
+        super().error(message, *args, **kwargs)
+
+
+class BlockedLogger(MemoryLogger):
+    def __init__(self):
+        super().__init__()
+        self.event = threading.Event()
+
+    def error(self, message, *args, **kwargs):
+        self.event.wait()
+        super().error(message, *args, **kwargs)
+
+
+def test_messages_are_written_in_background_thread():
+    logger = ThreadRecordingLogger()
+    policy = escape.policy(ValueError, logger=logger, log_queue=100)
+
+    @policy
+    def function():
+        raise ValueError('kek')
+
+    function()
+    policy.queue.flush()
+
+    assert logger.threads == ['escape-log-queue']
+    assert len(logger.data.exception) == 0
+    assert len(logger.data.error) == 1
+
+    message = logger.data.error[0].message
+    assert message.startswith('When executing function "function", the exception "ValueError" ("kek") was suppressed.\nTraceback (most recent call last):\n')
+    assert 'in function' in message
+    assert message.endswith('ValueError: kek')
+
+
+def test_coroutine_function_and_context_manager_with_queue():
+    logger = MemoryLogger()
+    policy = escape.policy(ValueError, logger=logger, log_queue=100)
+
+    @policy
+    async def function():
+        raise ValueError
+
+    asyncio.run(function())
+    with policy:
+        raise ValueError
+
+    policy.queue.flush()
+
+    assert len(logger.data.error) == 2
+    assert logger.data.error[1].message.startswith('The "ValueError" exception was suppressed inside the context.\nTraceback')
+
+
+def test_standard_logger_gets_lazy_arguments(caplog):
+    logger = logging.getLogger('escape_test_log_queue')
+    policy = escape.policy(ValueError, logger=logger, log_queue=100)
+
+    @policy
+    def function():
+        raise ValueError('kek')
+
+    with caplog.at_level(logging.ERROR, logger='escape_test_log_queue'):
+        function()
+        policy.queue.flush()
+
+    assert len(caplog.records) == 1
+    assert caplog.records[0].exc_info is None
+    assert isinstance(caplog.records[0].args[-1], TracebackDescription)
+    assert 'ValueError: kek' in caplog.records[0].getMessage()
+
+
+def test_overflowed_messages_are_dropped_and_counted():
+    logger = BlockedLogger()
+    log_queue = LogQueue(Reporter(logger), 2, 'drop')
+
+    for index in range(10):
+        log_queue.put('error', 'message %d', (index,))
+
+    logger.event.set()
+    log_queue.flush()
+
+    assert 2 <= len(logger.data.error) <= 3
+    assert sum(int(x.message.split()[0]) for x in logger.data.warning) + len(logger.data.error) == 10
+    assert logger.data.warning[0].message.endswith('messages about exceptions were dropped because the log queue was full.')
+
+
+def test_block_overflow_policy_keeps_all_messages():
+    logger = MemoryLogger()
+    log_queue = LogQueue(Reporter(logger), 1, 'block')
+
+    for index in range(100):
+        log_queue.put('error', 'message %d', (index,))
+
+    log_queue.flush()
+
+    assert [x.message for x in logger.data.error] == [f'message {index}' for index in range(100)]
+
+
+def test_exception_is_not_kept_in_queue():
+    logger = BlockedLogger()
+    log_queue = LogQueue(Reporter(logger), 10, 'drop')
+
+    class Payload:
+        pass
+
+    def function():
+        payload = Payload()  # noqa: F841
+        raise ValueError
+
+    try:
+        function()
+    except ValueError as e:
+        payload_reference = weakref.ref(e.__traceback__.tb_next.tb_frame.f_locals['payload'])
+        log_queue.put('report', 'message', (), e)
+
+    gc.collect()
+    assert payload_reference() is None
+
+    logger.event.set()
+    log_queue.flush()
+
+
+def test_wrong_queue_size():
+    with pytest.raises(ValueError, match=full_match('The size of the log queue must be a positive number.')):
+        escape(ValueError, log_queue=0)
+
+
+def test_wrong_overflow_policy():
+    with pytest.raises(ValueError, match=full_match('The overflow policy of the log queue must be "drop" or "block".')):
+        escape(ValueError, log_queue=10, log_queue_overflow='kek')
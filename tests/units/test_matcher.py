@@ -0,0 +1,105 @@
+import gc
+
+import pytest
+
+import escape
+from escape.conditions import Condition
+from escape.matcher import ExceptionsMatcher
+
+
+@pytest.mark.parametrize(
+    ('exceptions', 'exception_type', 'expected'),
+    [
+        ((ValueError,), ValueError, True),
+        ((ValueError,), UnicodeDecodeError, True),
+        ((ValueError,), KeyError, False),
+        ((KeyError, ValueError), KeyError, True),
+        ((Exception,), KeyboardInterrupt, False),
+        ((), ValueError, False),
+    ],
+)
+def test_matcher_decisions(exceptions, exception_type, expected):
+    matcher = ExceptionsMatcher(exceptions)
+
+    assert matcher(exception_type) is expected
+    assert matcher(exception_type) is expected
+
+
+def test_matcher_remembers_decisions():
+    matcher = ExceptionsMatcher((ValueError,))
+
+    matcher(ValueError)
+    matcher(KeyError)
+
+    assert matcher.decisions == {id(ValueError): True, id(KeyError): False}
+
+
+def test_matcher_forgets_collected_types():
+    matcher = ExceptionsMatcher((ValueError,))
+
+    dynamic_type = type('DynamicError', (ValueError,), {})
+    key = id(dynamic_type)
+
+    assert matcher(dynamic_type)
+    assert key in matcher.decisions
+
+    del dynamic_type
+    gc.collect()
+
+    assert key not in matcher.decisions
+    assert key not in matcher.references
+
+
+def test_long_exceptions_tuple_in_decorator_and_context_manager():
+    exceptions = tuple(type(f'Error{index}', (Exception,), {}) for index in range(40))
+
+    @escape(*exceptions, default='kek')
+    def function(exception_type):
+        raise exception_type
+
+    for _ in range(3):
+        assert function(exceptions[-1]) == 'kek'
+        with escape(*exceptions):
+            raise exceptions[-1]
+
+    with pytest.raises(ValueError):
+        function(ValueError)
+
+
+def test_matcher_dispatch_table_with_conditions():
+    calls = []
+    condition = Condition.create(OSError, None, lambda exception: calls.append(exception) or True, ())
+    matcher = ExceptionsMatcher((ValueError,), (condition,))
+
+    assert matcher(ValueError) is True
+    assert matcher(KeyError) is False
+    assert matcher(FileNotFoundError) == (condition,)
+
+    assert not matcher.matches(KeyError())
+    assert matcher.matches(ValueError())
+    assert calls == []
+
+    exception = FileNotFoundError()
+    assert matcher.matches(exception)
+    assert calls == [exception]
+
+
+def test_unconditional_type_takes_precedence_over_conditions():
+    condition = Condition.create(OSError, None, lambda exception: False, ())
+    matcher = ExceptionsMatcher((FileNotFoundError,), (condition,))
+
+    assert matcher.matches(FileNotFoundError())
+    assert not matcher.matches(PermissionError())
+
+
+def test_only_conditions_for_the_type_are_checked():
+    calls = []
+    conditions = (
+        Condition.create(KeyError, None, lambda exception: calls.append('key') or False, ()),
+        Condition.create(OSError, None, lambda exception: calls.append('os') or False, ()),
+        Condition.create(FileNotFoundError, None, lambda exception: calls.append('file') or True, ()),
+    )
+    matcher = ExceptionsMatcher((), conditions)
+
+    assert matcher.matches(FileNotFoundError())
+    assert calls == ['os', 'file']
@@ -730,3 +730,102 @@ def test_async_decorator_with_just_ellipsis_when_not_escaped_by_default_exceptio
 
     with pytest.raises(exception_type, match='text'):
         asyncio.run(function())
+
+
+def test_same_arguments_give_same_policy():
+    logger = MemoryLogger()
+
+    assert escape(ValueError, logger=logger) is escape(ValueError, logger=logger)
+    assert escape(ValueError, ..., default=1) is escape(ValueError, ..., default=1)
+    assert escape.policy(ValueError, logger=logger) is escape(ValueError, logger=logger)
+
+
+def test_different_arguments_give_different_policies():
+    assert escape(ValueError) is not escape(KeyError)
+    assert escape(ValueError, logger=MemoryLogger()) is not escape(ValueError, logger=MemoryLogger())
+    assert escape(ValueError, default=1) is not escape(ValueError, default=2)
+
+
+def test_equal_defaults_of_different_types_give_different_policies():
+    assert escape(ValueError, default=0) is not escape(ValueError, default=False)
+    assert escape(ValueError, default=False).default is False
+    assert escape(ValueError, default=0).default == 0
+    default = escape(ValueError, default=0).default
+    assert isinstance(default, int) and not isinstance(default, bool)
+
+
+def test_equal_but_different_defaults_are_not_shared():
+    class Sentinel:
+        def __eq__(self, other):
+            return isinstance(other, Sentinel)
+
+        def __hash__(self):
+            return 1
+
+    first_sentinel = Sentinel()
+    second_sentinel = Sentinel()
+
+    @escape(ValueError, default=first_sentinel)
+    def first_function():
+        raise ValueError
+
+    @escape(ValueError, default=second_sentinel)
+    def second_function():
+        raise ValueError
+
+    assert first_function() is first_sentinel
+    assert second_function() is second_sentinel
+
+
+def test_order_of_keyword_arguments_does_not_matter():
+    logger = MemoryLogger()
+
+    assert escape(ValueError, default=1, logger=logger) is escape(ValueError, logger=logger, default=1)
+    assert escape.policy(ValueError, logger=logger, default=1) is escape(ValueError, default=1, logger=logger)
+
+
+def test_unhashable_default_is_not_interned():
+    policy = escape(ValueError, default=[])
+
+    assert policy is not escape(ValueError, default=[])
+    assert policy == escape(ValueError, default=[])
+
+
+def test_policy_as_decorator_and_context_manager():
+    logger = MemoryLogger()
+    policy = escape.policy(ValueError, default='kek', logger=logger)
+
+    @policy
+    def function():
+        raise ValueError
+
+    @policy
+    async def async_function():
+        raise ValueError
+
+    assert function() == 'kek'
+    assert asyncio.run(async_function()) == 'kek'
+
+    with pytest.raises(SetDefaultReturnValueForContextManagerError):
+        with policy:
+            ...
+
+    context_policy = escape.policy(ValueError, ..., logger=logger)
+    for _ in range(3):
+        with context_policy:
+            raise KeyError
+
+    assert len(logger.data.exception) == 5
+
+
+def test_policy_with_ellipsis():
+    assert escape.policy(...).exceptions == escape(...).exceptions
+    assert escape.policy(ValueError, ...).exceptions[0] is ValueError
+
+
+def test_policy_with_wrong_arguments():
+    with pytest.raises(ValueError, match=full_match('Only exception types, conditions and Ellipsis can be used to create a policy.')):
+        escape.policy(lambda: None)
+
+    with pytest.raises(ValueError, match=full_match('Only exception types, conditions and Ellipsis can be used to create a policy.')):
+        escape.policy(ValueError, 'kek')
@@ -0,0 +1,98 @@
+import logging
+
+import pytest
+from emptylog import EmptyLogger, MemoryLogger
+
+import escape
+from escape.reporter import Reporter, ExceptionDescription
+
+
+class ExpensiveError(Exception):
+    conversions = 0
+
+    def __str__(self):
+        type(self).conversions += 1
+        return 'expensive'
+
+
+@pytest.fixture
+def expensive_error():
+    ExpensiveError.conversions = 0
+    yield ExpensiveError
+
+
+def test_exception_description_without_message():
+    assert str(ExceptionDescription(ValueError())) == ''
+
+
+def test_exception_description_with_message():
+    assert str(ExceptionDescription(ValueError('kek'))) == ' ("kek")'
+
+
+def test_empty_logger_is_disabled():
+    reporter = Reporter(EmptyLogger())
+
+    assert not reporter.is_enabled()
+
+
+def test_memory_logger_is_enabled_and_gets_rendered_message():
+    logger = MemoryLogger()
+    reporter = Reporter(logger)
+
+    reporter.report('%s and %s', 'kek', ExceptionDescription(ValueError('lol')))
+
+    assert reporter.is_enabled()
+    assert logger.data.exception[0].message == 'kek and  ("lol")'
+    assert logger.data.exception[0].args == ()
+
+
+def test_standard_logger_with_disabled_level_is_disabled():
+    logger = logging.getLogger('escape_test_disabled_level')
+    logger.setLevel(logging.CRITICAL)
+
+    assert not Reporter(logger).is_enabled()
+
+
+def test_exception_is_not_converted_to_string_with_empty_logger(expensive_error):
+    @escape(expensive_error)
+    def function():
+        raise expensive_error
+
+    function()
+
+    with escape(expensive_error):
+        raise expensive_error
+
+    assert expensive_error.conversions == 0
+
+
+def test_exception_is_not_converted_to_string_when_level_is_disabled(expensive_error):
+    logger = logging.getLogger('escape_test_disabled_level')
+    logger.setLevel(logging.CRITICAL)
+
+    @escape(expensive_error, logger=logger)
+    def function():
+        raise expensive_error
+
+    function()
+
+    with escape(expensive_error, logger=logger):
+        raise expensive_error
+
+    assert expensive_error.conversions == 0
+
+
+def test_standard_logger_gets_template_and_arguments(caplog):
+    logger = logging.getLogger('escape_test_enabled_level')
+
+    @escape(ValueError, logger=logger)
+    def function():
+        raise ValueError('kek')
+
+    with caplog.at_level(logging.ERROR, logger='escape_test_enabled_level'):
+        function()
+
+    assert len(caplog.records) == 1
+    assert caplog.records[0].msg == 'When executing %s "%s", the exception "%s"%s was suppressed.'
+    assert caplog.records[0].getMessage() == 'When executing function "function", the exception "ValueError" ("kek") was suppressed.'
+    assert caplog.records[0].exc_info[0] is ValueError
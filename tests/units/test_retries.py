@@ -0,0 +1,196 @@
+import asyncio
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape import wrapper as wrapper_module
+from escape.errors import UnsupportedOptionError
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(wrapper_module, 'sleep', sleeps.append)
+    monkeypatch.setattr(wrapper_module, 'random', lambda: 1.0)
+    return sleeps
+
+
+def make_function(outcomes):
+    def function():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, type):
+            raise outcome
+        return outcome
+    return function
+
+
+def test_transient_exception_is_retried(sleeps):
+    function = escape(ValueError, default='default', retries=3)(make_function([ValueError, ValueError, 'ok']))
+
+    assert function() == 'ok'
+    assert sleeps == [0.1, 0.2]
+
+
+def test_default_after_all_retries(sleeps):
+    outcomes = [ValueError] * 4
+    function = escape(ValueError, default='default', retries=3)(make_function(outcomes))
+
+    assert function() == 'default'
+    assert outcomes == []
+    assert sleeps == [0.1, 0.2, 0.4]
+
+
+def test_delay_is_capped(sleeps):
+    function = escape(ValueError, retries=5, retry_delay=1, retry_max_delay=3)(make_function([ValueError] * 6))
+
+    function()
+
+    assert sleeps == [1, 2, 3, 3, 3]
+
+
+def test_jitter(monkeypatch, sleeps):
+    monkeypatch.setattr(wrapper_module, 'random', lambda: 0.5)
+    function = escape(ValueError, retries=2, retry_delay=1)(make_function([ValueError] * 3))
+
+    function()
+
+    assert sleeps == [0.5, 1.0]
+
+
+def test_not_suppressed_exceptions_are_not_retried(sleeps):
+    outcomes = [KeyError, 'ok']
+    function = escape(ValueError, retries=3)(make_function(outcomes))
+
+    with pytest.raises(KeyError):
+        function()
+
+    assert sleeps == []
+    assert outcomes == ['ok']
+
+
+def test_retry_only_for_chosen_exceptions(sleeps):
+    outcomes = [ConnectionError, ValueError, 'ok']
+    function = escape(ValueError, ConnectionError, default='default', retries=3, retry_on=(ConnectionError,))(make_function(outcomes))
+
+    assert function() == 'default'
+    assert outcomes == ['ok']
+    assert len(sleeps) == 1
+
+
+def test_retry_budget(monkeypatch, sleeps):
+    now = [1000.0]
+    monkeypatch.setattr(wrapper_module, 'monotonic', lambda: now[0])
+
+    def function():
+        now[0] += 1
+        raise ValueError
+
+    assert escape(ValueError, default='default', retries=10, retry_delay=1, retry_budget=4.5)(function)() == 'default'
+    assert sleeps == [1, 2]
+
+
+def test_retries_in_log_and_stats(sleeps):
+    logger = MemoryLogger()
+    function = escape(ValueError, retries=2, logger=logger, stats='test_retries_in_log_and_stats')(make_function([ValueError, ValueError, ValueError]))
+
+    function()
+
+    assert [record.message for record in logger.data.exception] == [
+        'When executing function "function", the exception "ValueError" was suppressed, the call will be repeated in 0.100 seconds (attempt 2 of 3).',
+        'When executing function "function", the exception "ValueError" was suppressed, the call will be repeated in 0.200 seconds (attempt 3 of 3).',
+        'When executing function "function", the exception "ValueError" was suppressed.',
+    ]
+    assert escape.stats()['test_retries_in_log_and_stats'] == {'calls': 1, 'suppressed': 3, 'reraised': 0, 'retries': 2, 'exceptions': {'ValueError': 3}}
+
+
+def test_retries_of_coroutine_function_use_asyncio_sleep(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(wrapper_module, 'async_sleep', fake_sleep)
+    monkeypatch.setattr(wrapper_module, 'random', lambda: 1.0)
+    outcomes = [ValueError, ValueError, 'ok']
+
+    @escape(ValueError, retries=2)
+    async def function():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, type):
+            raise outcome
+        return outcome
+
+    assert asyncio.run(function()) == 'ok'
+    assert sleeps == [0.1, 0.2]
+
+
+def test_retries_of_coroutine_function_do_not_block_loop():
+    ticks = []
+    outcomes = [ValueError, 'ok']
+
+    @escape(ValueError, retries=1, retry_delay=0.05)
+    async def function():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, type):
+            raise outcome
+        return outcome
+
+    async def ticker():
+        for _ in range(3):
+            ticks.append(True)
+            await asyncio.sleep(0)
+
+    async def main():
+        return await asyncio.gather(function(), ticker())
+
+    assert asyncio.run(main())[0] == 'ok'
+    assert len(ticks) == 3
+
+
+def test_timeouts_are_retried():
+    delays = [1, 0]
+
+    @escape(ValueError, timeout=0.01, retries=1, retry_delay=0)
+    async def function():
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return delay
+
+    assert asyncio.run(function()) == 0
+
+
+def test_generator_functions_with_retries():
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "retries" option cannot be used with generator functions.')):
+        @escape(ValueError, retries=3)
+        def function():
+            yield 1
+
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "retries" option cannot be used with async generator functions.')):
+        @escape(ValueError, retries=3)
+        async def async_function():
+            yield 1
+
+
+def test_context_manager_with_retries():
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "retries" option cannot be used with the context manager.')):
+        with escape(ValueError, retries=3):
+            pass
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'message'],
+    [
+        ({'retries': -1}, 'The number of retries must be a non-negative integer.'),
+        ({'retries': 1.5}, 'The number of retries must be a non-negative integer.'),
+        ({'retries': 1, 'retry_delay': -1}, 'The delays between retries must be non-negative numbers of seconds.'),
+        ({'retries': 1, 'retry_max_delay': -1}, 'The delays between retries must be non-negative numbers of seconds.'),
+        ({'retries': 1, 'retry_budget': 0}, 'The time budget for retries must be a positive number of seconds.'),
+        ({'retries': 1, 'retry_on': ValueError}, 'Only a tuple of exception types can be used to choose exceptions for retries.'),
+        ({'retries': 1, 'retry_on': (1,)}, 'Only a tuple of exception types can be used to choose exceptions for retries.'),
+    ],
+)
+def test_wrong_retry_options(arguments, message):
+    with pytest.raises(ValueError, match=full_match(message)):
+        escape.policy(ValueError, **arguments)
@@ -0,0 +1,167 @@
+import logging
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape import throttle as throttle_module
+from escape.callsite import flush_callsites
+from escape.throttle import Throttle
+
+
+@pytest.fixture
+def clock(make_clock):
+    return make_clock(throttle_module)
+
+
+def test_throttle_without_limits_allows_everything():
+    throttle = Throttle(None, 1.0)
+
+    assert all(throttle.allow() == (True, 0) for _ in range(1000))
+
+
+def test_token_bucket(clock):
+    throttle = Throttle(2, 1.0)
+
+    assert throttle.allow() == (True, 0)
+    assert throttle.allow() == (True, 0)
+    assert throttle.allow() == (False, 0)
+    assert throttle.allow() == (False, 0)
+
+    clock.now += 0.5
+
+    assert throttle.allow() == (True, 2)
+    assert throttle.allow() == (False, 0)
+
+    clock.now += 100
+
+    assert throttle.allow() == (True, 1)
+    assert throttle.allow() == (True, 0)
+    assert throttle.allow() == (False, 0)
+
+
+def test_small_rate_has_capacity_of_one_message(clock):
+    throttle = Throttle(0.1, 1.0)
+
+    assert throttle.allow() == (True, 0)
+    assert throttle.allow() == (False, 0)
+
+    clock.now += 10
+
+    assert throttle.allow() == (True, 1)
+
+
+def test_sampling(monkeypatch):
+    values = iter([0.1, 0.5, 0.9, 0.29])
+    monkeypatch.setattr(throttle_module, 'random', lambda: next(values))
+    throttle = Throttle(None, 0.3)
+
+    assert [throttle.allow()[0] for _ in range(4)] == [True, False, False, True]
+
+
+def test_zero_sample_rate_drops_everything():
+    logger = MemoryLogger()
+
+    @escape(ValueError, logger=logger, log_sample_rate=0.0)
+    def function():
+        raise ValueError
+
+    for _ in range(100):
+        function()
+
+    assert len(logger.data) == 0
+
+
+def test_rate_limited_decorator_with_summary(clock):
+    logger = MemoryLogger()
+
+    @escape(ValueError, logger=logger, log_rate_limit=1)
+    def function():
+        raise ValueError
+
+    for _ in range(10):
+        function()
+
+    assert len(logger.data.exception) == 1
+    assert len(logger.data.warning) == 0
+
+    clock.now += 1
+    function()
+
+    assert len(logger.data.exception) == 2
+    assert logger.data.warning[0].message == f'9 messages about exceptions in "{__name__}.test_rate_limited_decorator_with_summary.<locals>.function" were dropped by the rate limit.'
+
+
+def test_rate_limited_context_manager(clock):
+    logger = MemoryLogger()
+
+    for _ in range(10):
+        with escape(ValueError, logger=logger, log_rate_limit=2):
+            raise ValueError
+
+    assert len(logger.data.exception) == 2
+
+
+def test_rate_limited_coroutine_function_and_generator(clock):
+    logger = MemoryLogger()
+
+    @escape(ValueError, logger=logger, log_rate_limit=1)
+    def generator():
+        yield 1
+        raise ValueError
+
+    for _ in range(5):
+        assert list(generator()) == [1]
+
+    assert len(logger.data.exception) == 1
+
+
+def test_dropped_messages_are_flushed_at_exit(clock):
+    logger = MemoryLogger()
+
+    @escape(ValueError, logger=logger, log_rate_limit=1)
+    def function():
+        raise ValueError
+
+    for _ in range(3):
+        function()
+
+    flush_callsites()
+
+    assert len(logger.data.warning) == 1
+    assert logger.data.warning[0].message.startswith('2 messages about exceptions in "')
+
+
+def test_exceptions_are_not_formatted_when_dropped(clock):
+    class ExpensiveError(Exception):
+        conversions = 0
+
+        def __str__(self):
+            type(self).conversions += 1
+            return 'kek'
+
+    logger = logging.getLogger('escape_test_rate_limit')
+
+    @escape(ExpensiveError, logger=logger, log_rate_limit=1)
+    def function():
+        raise ExpensiveError
+
+    function()
+    conversions_for_one_message = ExpensiveError.conversions
+
+    for _ in range(100):
+        function()
+
+    assert ExpensiveError.conversions == conversions_for_one_message
+
+
+def test_wrong_rate_limit():
+    with pytest.raises(ValueError, match=full_match('The rate limit for logging must be a positive number of messages per second.')):
+        escape(ValueError, log_rate_limit=0)
+
+
+@pytest.mark.parametrize('sample_rate', [-0.1, 1.1])
+def test_wrong_sample_rate(sample_rate):
+    with pytest.raises(ValueError, match=full_match('The sample rate for logging must be a number from 0 to 1.')):
+        escape(ValueError, log_sample_rate=sample_rate)
@@ -0,0 +1,213 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape.errors import SetTimeoutForSyncFunctionError, FunctionTimeoutError, UnsupportedOptionError
+from escape.timeouts import await_with_timeout, call_with_timeout, get_executor
+
+
+def test_coroutine_function_with_timeout_returns_default():
+    cancelled = []
+
+    @escape(ValueError, default='default', timeout=0.01)
+    async def function():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    assert asyncio.run(function()) == 'default'
+    assert cancelled == [True]
+
+
+def test_coroutine_function_finishing_in_time():
+    @escape(ValueError, default='default', timeout=1)
+    async def function(number):
+        await asyncio.sleep(0)
+        return number
+
+    assert asyncio.run(function(5)) == 5
+
+
+def test_exceptions_inside_coroutine_function_with_timeout():
+    @escape(ValueError, default='default', timeout=1)
+    async def suppressed():
+        raise ValueError
+
+    @escape(ValueError, default='default', timeout=1)
+    async def not_suppressed():
+        raise KeyError
+
+    assert asyncio.run(suppressed()) == 'default'
+    with pytest.raises(KeyError):
+        asyncio.run(not_suppressed())
+
+
+def test_timeout_is_logged_as_suppressed_exception():
+    logger = MemoryLogger()
+
+    @escape(ValueError, timeout=0.01, logger=logger)
+    async def function():
+        await asyncio.sleep(10)
+
+    asyncio.run(function())
+
+    assert len(logger.data.exception) == 1
+    assert logger.data.exception[0].message == 'When executing coroutine function "function", the exception "FunctionTimeoutError" ("The function "function" did not finish in 0.01 seconds.") was suppressed.'
+
+
+def test_timeout_is_counted_in_stats():
+    @escape(ValueError, timeout=0.01, stats='test_timeout_is_counted_in_stats')
+    async def function():
+        await asyncio.sleep(10)
+
+    asyncio.run(function())
+
+    assert escape.stats()['test_timeout_is_counted_in_stats'] == {'calls': 1, 'suppressed': 1, 'reraised': 0, 'retries': 0, 'exceptions': {'escape.errors.FunctionTimeoutError': 1}}
+
+
+def test_cancellation_of_caller_is_not_swallowed():
+    cancelled = []
+
+    @escape(..., timeout=5)
+    async def function():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        task = asyncio.ensure_future(function())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+    assert cancelled == [True]
+
+
+def test_cancellation_of_caller_during_cleanup_is_not_swallowed():
+    async def stubborn():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.05)
+            raise
+
+    async def main():
+        task = asyncio.ensure_future(await_with_timeout(stubborn(), 0.01, 'stubborn'))
+        await asyncio.sleep(0.03)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+
+def test_await_with_timeout_raises_timeout_error():
+    async def main():
+        with pytest.raises(FunctionTimeoutError, match=full_match('The function "kek" did not finish in 0.01 seconds.')):
+            await await_with_timeout(asyncio.sleep(1), 0.01, 'kek')
+
+    asyncio.run(main())
+
+    assert issubclass(FunctionTimeoutError, TimeoutError)
+
+
+def test_own_timeout_error_of_coroutine_function_is_not_suppressed():
+    @escape(ValueError, timeout=1)
+    async def function():
+        raise TimeoutError
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(function())
+
+
+def test_sync_function_with_timeout_in_thread():
+    @escape(ValueError, default='default', timeout=0.01, timeout_executor='thread')
+    def function(delay):
+        time.sleep(delay)
+        return delay
+
+    assert function(0) == 0
+    assert function(0.2) == 'default'
+
+
+def test_sync_function_with_timeout_in_own_executor():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        @escape(ValueError, default='default', timeout=1, timeout_executor=executor)
+        def function():
+            raise ValueError
+
+        assert function() == 'default'
+
+
+def test_own_timeout_error_of_sync_function_is_not_suppressed():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(TimeoutError):
+            call_with_timeout(executor, 1, lambda: (_ for _ in ()).throw(TimeoutError('kek')), (), {})
+
+
+def test_shared_executor_is_created_once():
+    assert get_executor('thread') is get_executor('thread')
+
+
+def test_sync_function_with_timeout_without_executor():
+    with pytest.raises(SetTimeoutForSyncFunctionError, match=full_match('A timeout for an ordinary function works only with an executor to run it in, for example, timeout_executor="thread".')):
+        @escape(ValueError, timeout=1)
+        def function():
+            pass
+
+
+def test_generator_functions_with_timeout():
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "timeout" option cannot be used with generator functions.')):
+        @escape(ValueError, timeout=1)
+        def function():
+            yield 1
+
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "timeout" option cannot be used with async generator functions.')):
+        @escape(ValueError, timeout=1)
+        async def async_function():
+            yield 1
+
+
+def test_context_manager_with_timeout():
+    with pytest.raises(UnsupportedOptionError, match=full_match('The "timeout" option cannot be used with the context manager.')):
+        with escape(ValueError, timeout=1):
+            pass
+
+
+def test_cancellation_is_not_suppressed_by_extended_coroutine_function():
+    @escape(BaseException, default='default', timeout=10, retries=2)
+    async def function():
+        await asyncio.sleep(10)
+
+    async def main():
+        task = asyncio.ensure_future(function())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize(
+    ['arguments', 'message'],
+    [
+        ({'timeout': 0}, 'The timeout must be a positive number of seconds.'),
+        ({'timeout': 1, 'timeout_executor': 'process'}, 'The executor for timeouts must be "thread" or an instance of concurrent.futures.Executor.'),
+    ],
+)
+def test_wrong_timeout_options(arguments, message):
+    with pytest.raises(ValueError, match=full_match(message)):
+        escape.policy(ValueError, **arguments)
@@ -0,0 +1,302 @@
+import asyncio
+import gc
+import sys
+import tracemalloc
+import weakref
+from traceback import StackSummary
+
+import pytest
+import full_match
+from emptylog import MemoryLogger
+
+import escape
+from escape.tracebacks import release_traceback
+
+
+class Payload:
+    pass
+
+
+def raise_with_payload(payloads):
+    payload = Payload()
+    payloads.append(weakref.ref(payload))
+    raise ValueError('kek')
+
+
+@pytest.mark.parametrize(
+    ['mode'],
+    [
+        ('summary',),
+        ('drop',),
+    ],
+)
+def test_frames_of_suppressed_exception_are_released(mode):
+    payloads = []
+    exceptions = []
+
+    @escape(ValueError, default_factory=lambda exception: exceptions.append(exception), traceback=mode)
+    def function():
+        raise_with_payload(payloads)
+
+    function()
+
+    assert len(exceptions) == 1
+    assert exceptions[0].__traceback__ is None
+    assert payloads[0]() is None
+
+
+def test_frames_are_kept_by_default():
+    payloads = []
+    exceptions = []
+
+    @escape(ValueError, default_factory=lambda exception: exceptions.append(exception))
+    def function():
+        raise_with_payload(payloads)
+
+    function()
+
+    assert exceptions[0].__traceback__ is not None
+    assert payloads[0]() is not None
+
+
+def test_summary_is_saved():
+    exceptions = []
+
+    @escape(ValueError, default_factory=lambda exception: exceptions.append(exception), traceback='summary')
+    def function():
+        raise_with_payload([])
+
+    function()
+
+    summary = exceptions[0].traceback_summary
+    assert isinstance(summary, StackSummary)
+    assert [frame.name for frame in summary][-2:] == ['function', 'raise_with_payload']
+
+
+def test_summary_is_not_saved_in_drop_mode():
+    exceptions = []
+
+    @escape(ValueError, default_factory=lambda exception: exceptions.append(exception), traceback='drop')
+    def function():
+        raise_with_payload([])
+
+    function()
+
+    assert not hasattr(exceptions[0], 'traceback_summary')
+
+
+def test_traceback_is_logged_before_release():
+    logger = MemoryLogger()
+
+    @escape(ValueError, logger=logger, traceback='drop')
+    def function():
+        raise_with_payload([])
+
+    function()
+
+    record = logger.data.exception[0]
+    assert record.message == 'When executing function "function", the exception "ValueError" ("kek") was suppressed.'
+
+
+def test_not_suppressed_exception_keeps_traceback():
+    payloads = []
+
+    @escape(ZeroDivisionError, traceback='drop')
+    def function():
+        raise_with_payload(payloads)
+
+    with pytest.raises(ValueError) as exception_info:
+        function()
+
+    assert exception_info.value.__traceback__ is not None
+    assert payloads[0]() is not None
+
+
+def test_coroutine_function():
+    payloads = []
+    exceptions = []
+
+    @escape(ValueError, default_factory=lambda exception: exceptions.append(exception), traceback='drop')
+    async def function():
+        raise_with_payload(payloads)
+
+    asyncio.run(function())
+
+    assert exceptions[0].__traceback__ is None
+    assert payloads[0]() is None
+
+
+def test_retried_exceptions_are_released():
+    payloads = []
+    exceptions = []
+
+    @escape(ValueError, default_factory=lambda exception: exceptions.append(exception), retries=2, retry_delay=0.001, traceback='drop')
+    def function():
+        raise_with_payload(payloads)
+
+    function()
+
+    assert len(payloads) == 3
+    assert all(payload() is None for payload in payloads)
+
+
+def test_context_manager():
+    payloads = []
+
+    with escape(ValueError, traceback='drop'):
+        raise_with_payload(payloads)
+
+    assert payloads[0]() is None
+
+
+def test_context_manager_with_not_suppressed_exception():
+    payloads = []
+
+    with pytest.raises(ValueError) as exception_info:
+        with escape(ZeroDivisionError, traceback='drop'):
+            raise_with_payload(payloads)
+
+    assert exception_info.value.__traceback__ is not None
+    assert payloads[0]() is not None
+
+
+def test_generator_function():
+    payloads = []
+
+    @escape(ValueError, traceback='drop')
+    def function():
+        yield 1
+        raise_with_payload(payloads)
+
+    assert list(function()) == [1]
+    assert payloads[0]() is None
+
+
+def test_reference_cycle_is_broken():
+    gc.collect()
+    gc.disable()
+    try:
+        payloads = []
+
+        @escape(ValueError, default_factory=lambda exception: None, traceback='drop')
+        def function():
+            payload = Payload()
+            payloads.append(weakref.ref(payload))
+            try:
+                raise ValueError
+            except ValueError as e:
+                payload.exception = e
+                raise
+
+        function()
+
+        assert payloads[0]() is None
+    finally:
+        gc.enable()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason='ExceptionGroup appeared in Python 3.11.')
+def test_leaves_of_exception_group_are_released():
+    payloads = []
+    leaves = []
+    for _ in range(3):
+        try:
+            raise_with_payload(payloads)
+        except ValueError as e:
+            leaves.append(e)
+
+    try:
+        raise ExceptionGroup('group', leaves)  # noqa: F821
+    except ExceptionGroup as e:  # noqa: F821
+        group = e
+
+    release_traceback(group, 'summary')
+
+    assert group.__traceback__ is None
+    assert all(leaf.__traceback__ is None for leaf in leaves)
+    assert all(isinstance(leaf.traceback_summary, StackSummary) for leaf in leaves)
+    assert all(payload() is None for payload in payloads)
+
+
+def get_frame_locals(exception, name):
+    traceback = exception.__traceback__
+    while traceback is not None:
+        if traceback.tb_frame.f_code.co_name == name:
+            return traceback.tb_frame.f_locals
+        traceback = traceback.tb_next
+    return None
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason='ExceptionGroup appeared in Python 3.11.')
+@pytest.mark.parametrize(
+    ['mode'],
+    [
+        ('drop',),
+        ('summary',),
+    ],
+)
+def test_frames_of_not_suppressed_part_of_group_are_kept(mode):
+    @escape(ValueError, traceback=mode)
+    def function():
+        payload = 'payload'  # noqa: F841
+        leaves = []
+        for exception in (ValueError(), KeyError()):
+            try:
+                raise exception
+            except Exception as e:
+                leaves.append(e)
+        raise ExceptionGroup('group', leaves)  # noqa: F821
+
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        function()
+
+    remainder = exception_info.value
+    assert get_frame_locals(remainder, 'function')['payload'] == 'payload'
+    assert get_frame_locals(remainder.exceptions[0], 'function')['payload'] == 'payload'
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason='ExceptionGroup appeared in Python 3.11.')
+def test_frames_of_not_suppressed_part_of_group_are_kept_in_context_manager():
+    def function():
+        payload = 'payload'  # noqa: F841
+        raise ExceptionGroup('group', [ValueError(), KeyError()])  # noqa: F821
+
+    with pytest.raises(ExceptionGroup) as exception_info:  # noqa: F821
+        with escape(ValueError, traceback='drop'):
+            function()
+
+    assert get_frame_locals(exception_info.value, 'function')['payload'] == 'payload'
+
+
+def test_memory_does_not_grow_with_kept_exceptions():
+    """
+    The exceptions are kept by the user code, and each of them would hold a megabyte through a local variable of the failed function.
+    """
+    exceptions = []
+
+    @escape(ValueError, default_factory=lambda exception: exceptions.append(exception), traceback='drop')
+    def function():
+        buffer = bytearray(1_000_000)  # noqa: F841
+        raise ValueError
+
+    tracemalloc.start()
+    try:
+        for _ in range(100):
+            function()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(exceptions) == 100
+    assert current < 10_000_000
+
+
+def test_wrong_traceback_mode():
+    with pytest.raises(ValueError, match=full_match('The traceback mode must be "keep", "summary" or "drop".')):
+        escape(ValueError, traceback='kek')
+
+
+def test_traceback_mode_is_a_part_of_policy():
+    assert escape.policy(ValueError, traceback='drop') == escape.policy(ValueError, traceback='drop')
+    assert escape.policy(ValueError, traceback='drop') != escape.policy(ValueError, traceback='summary')
+    assert escape.policy(ValueError, traceback='keep') == escape.policy(ValueError)
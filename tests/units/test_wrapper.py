@@ -0,0 +1,444 @@
+import asyncio
+import inspect
+
+import pytest
+import full_match
+from emptylog import EmptyLogger, MemoryLogger
+
+import escape
+from escape.errors import SetDefaultReturnValueForAsyncGeneratorError, SetDefaultReturnValueForContextManagerError, SetAsyncDefaultFactoryForSyncFunctionError
+from escape.wrapper import Wrapper
+
+
+def test_wrapper_is_immutable():
+    wrapper = Wrapper(None, (ValueError,), EmptyLogger())
+
+    with pytest.raises(AttributeError):
+        wrapper.default = 'kek'
+
+    with pytest.raises(AttributeError):
+        del wrapper.exceptions
+
+    assert wrapper.default is None
+
+
+def test_wrapper_equality_and_hash():
+    logger = MemoryLogger()
+
+    assert Wrapper(1, (ValueError,), logger) == Wrapper(1, (ValueError,), logger)
+    assert hash(Wrapper(1, (ValueError,), logger)) == hash(Wrapper(1, (ValueError,), logger))
+    assert Wrapper([], (ValueError,), logger) == Wrapper([], (ValueError,), logger)
+    assert hash(Wrapper([], (ValueError,), logger)) == hash(Wrapper([], (ValueError,), logger))
+
+    assert Wrapper(1, (ValueError,), logger) != Wrapper(2, (ValueError,), logger)
+    assert Wrapper(0, (ValueError,), logger) != Wrapper(False, (ValueError,), logger)
+    assert Wrapper(1, (ValueError,), logger) != Wrapper(1, (KeyError,), logger)
+    assert Wrapper(1, (ValueError,), logger) != Wrapper(1, (ValueError,), MemoryLogger())
+    assert Wrapper(1, (ValueError,), logger) != 'kek'
+
+
+def test_wrappers_as_dictionary_keys():
+    logger = MemoryLogger()
+
+    data = {Wrapper(None, (ValueError,), logger): 'kek'}
+
+    assert data[Wrapper(None, (ValueError,), logger)] == 'kek'
+
+
+def test_wrapper_repr():
+    assert repr(Wrapper(None, (ValueError, KeyError), EmptyLogger())) == 'Wrapper(ValueError, KeyError, default=None, logger=EmptyLogger())'
+    assert repr(Wrapper('kek', (), EmptyLogger())) == "Wrapper(default='kek', logger=EmptyLogger())"
+
+
+def test_reraised_exception_is_the_same_object_and_has_no_extra_traceback_entries():
+    for logger in (EmptyLogger(), MemoryLogger()):
+        exception = ValueError('kek')
+
+        def function():
+            raise exception  # noqa: B023
+
+        wrapped = Wrapper(None, (KeyError,), logger)(function)
+
+        with pytest.raises(ValueError) as exception_info:
+            wrapped()
+
+        assert exception_info.value is exception
+
+        frame_names = []
+        traceback = exception_info.value.__traceback__
+        while traceback is not None:
+            frame_names.append(traceback.tb_frame.f_code.co_name)
+            traceback = traceback.tb_next
+
+        assert frame_names.count('wrapper') == 1
+
+
+def test_wrapper_saves_metadata_of_function():
+    def function():
+        """some documentation"""
+
+    for logger in (EmptyLogger(), MemoryLogger()):
+        wrapped = Wrapper(None, (ValueError,), logger)(function)
+
+        assert wrapped.__name__ == 'function'
+        assert wrapped.__doc__ == 'some documentation'
+        assert wrapped.__wrapped__ is function
+
+
+def test_wrapper_has_no_dict():
+    wrapper = Wrapper(None, (ValueError,), EmptyLogger())
+
+    assert not hasattr(wrapper, '__dict__')
+
+
+def test_closure_keeps_only_function_and_wrapper():
+    wrapper = Wrapper(None, (ValueError,), MemoryLogger())
+
+    def function():
+        pass
+
+    for wrapped in (wrapper(function), Wrapper(None, (ValueError,), EmptyLogger())(function)):
+        assert len(wrapped.__closure__) == 2
+
+
+def test_generator_function_without_exceptions():
+    @escape
+    def generator(number):
+        yield from range(number)
+        return 'kek'
+
+    assert list(generator(3)) == [0, 1, 2]
+    assert inspect.isgeneratorfunction(generator)
+
+    iterator = generator(0)
+    with pytest.raises(StopIteration) as exception_info:
+        next(iterator)
+    assert exception_info.value.value == 'kek'
+
+
+def test_generator_function_stops_stream_on_suppressed_exception():
+    logger = MemoryLogger()
+
+    @escape(ValueError, default='lol', logger=logger)
+    def generator():
+        yield 1
+        yield 2
+        raise ValueError('kek')
+
+    iterator = generator()
+
+    assert next(iterator) == 1
+    assert next(iterator) == 2
+    with pytest.raises(StopIteration) as exception_info:
+        next(iterator)
+
+    assert exception_info.value.value == 'lol'
+    assert len(logger.data.exception) == 1
+    assert logger.data.exception[0].message == 'When executing generator function "generator", the exception "ValueError" ("kek") was suppressed.'
+
+
+def test_generator_function_with_not_suppressed_exception():
+    logger = MemoryLogger()
+
+    @escape(KeyError, logger=logger)
+    def generator():
+        yield 1
+        raise ValueError('kek')
+
+    iterator = generator()
+
+    assert next(iterator) == 1
+    with pytest.raises(ValueError, match='kek'):
+        next(iterator)
+
+    assert logger.data.exception[0].message == 'When executing generator function "generator", the exception "ValueError" ("kek") was not suppressed.'
+
+
+def test_generator_function_is_lazy():
+    produced = []
+
+    @escape
+    def generator():
+        for number in range(3):
+            produced.append(number)
+            yield number
+
+    iterator = generator()
+    assert produced == []
+
+    next(iterator)
+    assert produced == [0]
+
+
+def test_generator_function_forwards_send_throw_and_close():
+    events = []
+
+    @escape(ValueError, logger=MemoryLogger())
+    def generator():
+        try:
+            while True:
+                try:
+                    received = yield
+                    events.append(received)
+                except KeyError:
+                    events.append('KeyError')
+        finally:
+            events.append('closed')
+
+    iterator = generator()
+    next(iterator)
+    iterator.send('kek')
+    iterator.throw(KeyError)
+    iterator.close()
+
+    assert events == ['kek', 'KeyError', 'closed']
+
+
+def test_generator_function_thrown_suppressed_exception_stops_stream():
+    @escape(ValueError)
+    def generator():
+        while True:
+            yield
+
+    iterator = generator()
+    next(iterator)
+
+    with pytest.raises(StopIteration):
+        iterator.throw(ValueError)
+
+
+def test_generator_close_is_not_logged():
+    logger = MemoryLogger()
+
+    @escape(GeneratorExit, ..., logger=logger)
+    def generator():
+        yield 1
+        yield 2
+
+    iterator = generator()
+    next(iterator)
+    iterator.close()
+
+    assert len(logger.data) == 0
+
+
+def test_async_generator_function_without_exceptions():
+    @escape
+    async def generator(number):
+        for index in range(number):
+            yield index
+
+    async def main():
+        return [x async for x in generator(3)]
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    assert inspect.isasyncgenfunction(generator)
+
+
+def test_async_generator_function_stops_stream_on_suppressed_exception():
+    logger = MemoryLogger()
+
+    @escape(ValueError, logger=logger)
+    async def generator():
+        yield 1
+        yield 2
+        raise ValueError('kek')
+
+    async def main():
+        return [x async for x in generator()]
+
+    assert asyncio.run(main()) == [1, 2]
+    assert len(logger.data.exception) == 1
+    assert logger.data.exception[0].message == 'When executing async generator function "generator", the exception "ValueError" ("kek") was suppressed.'
+
+
+def test_async_generator_function_with_not_suppressed_exception():
+    logger = MemoryLogger()
+
+    @escape(KeyError, logger=logger)
+    async def generator():
+        yield 1
+        raise ValueError('kek')
+
+    async def main():
+        return [x async for x in generator()]
+
+    with pytest.raises(ValueError, match='kek'):
+        asyncio.run(main())
+
+    assert logger.data.exception[0].message == 'When executing async generator function "generator", the exception "ValueError" ("kek") was not suppressed.'
+
+
+def test_async_generator_function_forwards_asend_athrow_and_aclose():
+    events = []
+
+    @escape(ValueError)
+    async def generator():
+        try:
+            while True:
+                try:
+                    received = yield 'value'
+                    events.append(received)
+                except KeyError:
+                    events.append('KeyError')
+        finally:
+            events.append('closed')
+
+    async def main():
+        iterator = generator()
+        assert await iterator.__anext__() == 'value'
+        assert await iterator.asend('kek') == 'value'
+        assert await iterator.athrow(KeyError) == 'value'
+        await iterator.aclose()
+
+    asyncio.run(main())
+
+    assert events == ['kek', 'KeyError', 'closed']
+
+
+def test_async_generator_function_with_default_value():
+    async def generator():
+        yield 1
+
+    with pytest.raises(SetDefaultReturnValueForAsyncGeneratorError, match=full_match('You cannot set a default value for an async generator function, since it cannot return anything.')):
+        escape(ValueError, default='kek')(generator)
+
+
+def test_default_factory_is_called_only_on_suppression():
+    calls = []
+
+    def factory():
+        calls.append(True)
+        return {}
+
+    @escape(ValueError, default_factory=factory)
+    def function(is_broken):
+        if is_broken:
+            raise ValueError
+        return 'ok'
+
+    assert function(False) == 'ok'
+    assert calls == []
+
+    first = function(True)
+    second = function(True)
+
+    assert first == {} and second == {}
+    assert first is not second
+    assert len(calls) == 2
+
+
+def test_default_factory_with_optional_parameters_gets_nothing():
+    @escape(ValueError, default_factory=list)
+    def function(a, b):
+        raise ValueError
+
+    assert function(1, 2) == []
+
+
+def test_default_factory_gets_exception_and_arguments():
+    @escape(ValueError, default_factory=lambda exception, *args, **kwargs: (str(exception), args, kwargs))
+    def function(a, b=None):
+        raise ValueError('kek')
+
+    assert function(1, b=2) == ('kek', (1,), {'b': 2})
+
+
+@pytest.mark.parametrize(
+    ['factory'],
+    [
+        (lambda exception: repr(exception),),
+        (lambda exception, *, flag=True: repr(exception),),
+    ],
+)
+def test_default_factory_with_one_parameter_gets_only_exception(factory):
+    @escape(ValueError, default_factory=factory)
+    def function(a, b=None):
+        raise ValueError('kek')
+
+    assert function(1, b=2) == "ValueError('kek')"
+
+
+def test_default_factory_for_coroutine_function():
+    @escape(ValueError, default_factory=lambda exception, number: number * 2)
+    async def function(number):
+        raise ValueError
+
+    assert asyncio.run(function(2)) == 4
+
+
+def test_async_default_factory_for_coroutine_function():
+    async def factory(exception, number):
+        await asyncio.sleep(0)
+        return type(exception).__name__, number
+
+    @escape(ValueError, default_factory=factory)
+    async def function(number):
+        raise ValueError
+
+    assert asyncio.run(function(2)) == ('ValueError', 2)
+
+
+def test_async_default_factory_for_sync_function():
+    async def factory():
+        pass
+
+    with pytest.raises(SetAsyncDefaultFactoryForSyncFunctionError, match=full_match('An async default factory can only be used with coroutine functions.')):
+        @escape(ValueError, default_factory=factory)
+        def function():
+            pass
+
+
+def test_default_factory_for_generator_function():
+    @escape(ValueError, default_factory=lambda exception: str(exception))
+    def function():
+        yield 1
+        raise ValueError('kek')
+
+    generator = function()
+    assert next(generator) == 1
+    with pytest.raises(StopIteration) as info:
+        next(generator)
+
+    assert info.value.value == 'kek'
+
+
+def test_default_factory_gets_none_when_function_is_skipped():
+    @escape(ValueError, default_factory=lambda exception: exception, breaker_threshold=1)
+    def function():
+        raise ValueError
+
+    assert isinstance(function(), ValueError)
+    assert function() is None
+
+
+def test_default_factory_is_not_called_if_there_is_stale_result():
+    results = [1, ValueError]
+
+    @escape(ValueError, default_factory=lambda: 'default', stale_cache=60)
+    def function():
+        result = results.pop(0)
+        if isinstance(result, type):
+            raise result
+        return result
+
+    assert function() == 1
+    assert function() == 1
+
+
+def test_default_and_default_factory_together():
+    with pytest.raises(ValueError, match=full_match('You cannot set both a default value and a default factory.')):
+        escape.policy(ValueError, default=1, default_factory=list)
+
+
+def test_default_factory_for_context_manager_and_async_generator():
+    policy = escape.policy(ValueError, default_factory=list)
+
+    with pytest.raises(SetDefaultReturnValueForContextManagerError):
+        with policy:
+            pass
+
+    with pytest.raises(SetDefaultReturnValueForAsyncGeneratorError):
+        @policy
+        async def function():
+            yield 1